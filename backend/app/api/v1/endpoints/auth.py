@@ -67,11 +67,14 @@ def callback(code: str, db: Session = Depends(get_db)):
         if not existing_repo:
             new_repo = Repository(
                 name=repo_data["name"],
+                full_name=repo_data.get("full_name"),
                 url=repo_data["url"], 
                 last_updated=repo_data["last_updated"],
                 owner_id=user.id
             )
             db.add(new_repo)
+        elif not existing_repo.full_name:
+            existing_repo.full_name = repo_data.get("full_name")
     
     db.commit()
 
@@ -1,64 +1,122 @@
+from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_user
+from app.core.cache import StaleWhileRevalidateCache
+from app.core.config import settings
+from app.db.session import SessionLocal, get_db
 from app.models.user import User
 from app.schemas.commit import CommitListResponse
+from app.services import commit_feed_service
 from app.services.github_service import GitHubService
+from app.services.scheduler import Priority, priority
 
 router = APIRouter()
 
+# (user_id, repo_full_name, per_page, include_stats) -> first page of the feed
+_feed_cache = StaleWhileRevalidateCache(
+    settings.COMMITS_FEED_CACHE_MAX_ENTRIES,
+    settings.COMMITS_FEED_FRESH_SECONDS,
+    settings.COMMITS_FEED_STALE_SECONDS,
+)
+
 
 @router.get("/", response_model=CommitListResponse)
 def list_commits(
     repo_full_name: Optional[str] = None,
     per_page: int = 20,
     include_stats: bool = True,
+    cursor: Optional[str] = None,
+    author: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
     Returns commits for a repository. If no repo is provided, returns recent
-    commits across monitored repositories (or all repos if none are monitored).
-    
+    commits across monitored repositories (or the most recently updated ones
+    if none are monitored).
+
+    Commits are served from the local commit index, which is synced with
+    GitHub when it is older than ``COMMIT_INDEX_FRESH_SECONDS``; ``synced_at``
+    is the oldest sync time of the covered repositories. Repositories that
+    are not among the user's synced repositories are read from GitHub
+    directly, without pagination or filters.
+
+    The unfiltered first page is cached per user for
+    ``COMMITS_FEED_FRESH_SECONDS``; until ``COMMITS_FEED_STALE_SECONDS`` a
+    cached page is served at once while it is refreshed in the background,
+    and it is also served when rebuilding it fails.
+
+    ``has_documentation`` is set from one query over the page's SHAs.
+
     Query Parameters:
     - repo_full_name: Optional repository in format 'owner/repo' 
     - per_page: Number of commits per page (1-50, default 20)
     - include_stats: Include file change statistics (default true)
+    - cursor: ``next_cursor`` of the previous page
+    - author: Author name or GitHub login
+    - since / until: Commit date bounds (ISO 8601)
     """
     if not current_user.access_token:
         raise HTTPException(status_code=401, detail="Missing GitHub access token")
 
     per_page = max(1, min(per_page, 50))
+    since, until = _naive_utc(since), _naive_utc(until)
+
+    def load(db: Session, user: User) -> dict:
+        return _load_commits(
+            db, user, repo_full_name, per_page, include_stats,
+            cursor=cursor, author=author, since=since, until=until,
+        )
 
-    if repo_full_name:
+    if cursor or author or since or until:
+        page = load(db, current_user)
+    else:
+        # The unfiltered first page is what the dashboard polls: serve it from
+        # the feed cache and refresh stale entries in the background.
+        user_id = current_user.id
+
+        def refresh() -> dict:
+            with SessionLocal() as background_db, priority(Priority.PREWARM):
+                return load(background_db, background_db.get(User, user_id))
+
+        key = (user_id, repo_full_name, per_page, include_stats)
+        page = _feed_cache.get(key, lambda: load(db, current_user), refresh)
+
+    # Annotated on every request, so cached pages show documents generated since.
+    commits = commit_feed_service.annotate_documentation(db, current_user, page["commits"])
+    return {**page, "commits": commits}
+
+
+def _load_commits(
+    db: Session,
+    user: User,
+    repo_full_name: Optional[str],
+    per_page: int,
+    include_stats: bool,
+    **filters,
+) -> dict:
+    if repo_full_name and not commit_feed_service.owns_repo(db, user, repo_full_name):
         commits = GitHubService.get_repo_commits(
-            current_user.access_token,
+            user.access_token,
             repo_full_name,
             per_page=per_page,
             include_stats=include_stats,
         )
         return {"commits": commits}
 
-    monitored_names = [repo.name for repo in current_user.repos if repo.is_active]
-    repos = GitHubService.get_user_repos(current_user.access_token)
-    if monitored_names:
-        repos = [repo for repo in repos if repo.get("name") in monitored_names]
-
-    combined = []
-    per_repo = min(per_page, 5)
-    max_repos = 5 if not monitored_names else 10
-    for repo in repos[:max_repos]:
-        if not repo.get("full_name"):
-            continue
-        combined.extend(
-            GitHubService.get_repo_commits(
-                current_user.access_token,
-                repo["full_name"],
-                per_page=per_repo,
-                include_stats=include_stats,
-            )
-        )
+    repo_full_names = [repo_full_name] if repo_full_name else commit_feed_service.feed_repos(db, user)
+    return commit_feed_service.list_commits(
+        db, user, repo_full_names, per_page, include_stats=include_stats, **filters
+    )
+
 
-    combined.sort(key=lambda item: item.get("timestamp") or "", reverse=True)
-    return {"commits": combined[:per_page]}
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,20 +1,57 @@
+import contextvars
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_user
-from app.db.session import get_db
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import SessionLocal, get_db
 from app.models.documentation import Documentation
+from app.models.shared_documentation import SharedDocumentation
 from app.models.user import User
-from app.schemas.docs import DocsGenerateRequest, DocsGenerateResponse
+from app.schemas.docs import DocsBatchRequest, DocsGenerateRequest, DocsGenerateResponse
+from app.services import commit_context, doc_ir_service
 from app.services.ai_service import generate_text
+from app.services.doc_ir_service import IR_STYLE
 from app.services.github_service import GitHubService
+from app.services.scheduler import Priority, priority
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 MAX_CONTEXT_CHARS = 4000
+# Bump when the prompts change so shared documents written with older
+# prompts are regenerated instead of served.
+PROMPT_VERSION = "1"
+MAX_BATCH_COMMITS = 100
+# Commit messages listed in the context of a commit range.
+MAX_RANGE_COMMITS = 50
+_FULL_SHA = re.compile(r"[0-9a-fA-F]{40}")
+
+_OUTPUT_FIELDS = {
+    "plainText": "plain_text",
+    "research": "research_style",
+    "latex": "latex",
+}
+
+# (user_id, repo_full_name, commit_sha, complexity) -> {style: (content, timestamp)}
+_docs_cache = TTLCache(settings.DOCS_CACHE_MAX_ENTRIES, settings.DOCS_CACHE_TTL_SECONDS)
+
+# (user_id, repo_full_name) -> whether the user's token can read the repo
+_access_cache = TTLCache(settings.DOCS_CACHE_MAX_ENTRIES, settings.DOCS_CACHE_TTL_SECONDS)
+
+CachedDocs = Dict[str, Tuple[str, Optional[datetime]]]
 
 
 def _truncate(text: str, max_chars: int) -> str:
@@ -35,23 +72,120 @@ def _build_commit_context(detail: dict) -> str:
         f"Date: {author_info.get('date', '')}",
         f"Stats: +{stats.get('additions', 0)} -{stats.get('deletions', 0)} ({len(files)} files)",
         "",
-        "Files changed:",
     ]
+    return _truncate(commit_context.build_context(lines, files, MAX_CONTEXT_CHARS), MAX_CONTEXT_CHARS)
+
+
+def _build_range_context(comparison: dict, base: str, head: str) -> str:
+    """Context for a commit range from the compare API's aggregate diff."""
+    commits = comparison.get("commits") or []
+    files = comparison.get("files") or []
+    total = comparison.get("total_commits", len(commits))
+
+    lines = [f"Commit range: {base[:7]}..{head[:7]} ({total} commits)", "", "Commits:"]
+    for item in commits[:MAX_RANGE_COMMITS]:
+        commit_info = item.get("commit") or {}
+        message = (commit_info.get("message") or "").strip().split("\n", 1)[0]
+        author = (commit_info.get("author") or {}).get("name", "")
+        lines.append(f"- {message} ({author})" if author else f"- {message}")
+    if total > MAX_RANGE_COMMITS:
+        lines.append(f"- ...and {total - MAX_RANGE_COMMITS} more")
+    additions = sum(file_info.get("additions", 0) for file_info in files)
+    deletions = sum(file_info.get("deletions", 0) for file_info in files)
+    lines.extend([
+        f"Stats: +{additions} -{deletions} ({len(files)} files)",
+        "",
+    ])
+    # The header is capped too: a long range can list many commit messages.
+    return _truncate(commit_context.build_context(lines, files, MAX_CONTEXT_CHARS), MAX_CONTEXT_CHARS)
+
 
-    for file_info in files:
-        filename = file_info.get("filename", "")
-        additions = file_info.get("additions", 0)
-        deletions = file_info.get("deletions", 0)
-        lines.append(f"- {filename} (+{additions}/-{deletions})")
-        patch = file_info.get("patch")
-        if patch:
-            lines.append(_truncate(patch, 800))
-            lines.append("")
+def _split_range(commit_key: str) -> Optional[Tuple[str, str]]:
+    """Returns (base, head) for a ``base..head`` key, None for a single commit."""
+    base, sep, head = commit_key.partition("..")
+    if not sep:
+        return None
+    if not base or not head:
+        raise HTTPException(status_code=400, detail="Commit range must look like base..head")
+    return base, head
 
-    return _truncate("\n".join(lines), MAX_CONTEXT_CHARS)
 
+def _pinned(commit_key: str) -> bool:
+    """Whether ``commit_key`` is a commit, or a range between two full SHAs."""
+    commit_range = _split_range(commit_key)
+    return not commit_range or all(_FULL_SHA.fullmatch(ref) for ref in commit_range)
 
-def _prompt_for(style: str, context: str, complexity: Optional[int]) -> str:
+
+def _resolve_range(access_token: str, repo_full_name: str, commit_key: str) -> Tuple[str, Optional[dict]]:
+    """
+    Returns the key documents of ``commit_key`` are stored under, and the
+    compare response when one was needed to work it out.
+
+    Ranges given as tags or branches (``v1.0..main``) are keyed by the SHAs
+    they resolve to now, so the document follows the branch as it moves.
+    """
+    if _pinned(commit_key):
+        return commit_key, None
+    base, head = _split_range(commit_key)
+    comparison = GitHubService.compare_commits(access_token, repo_full_name, base, head)
+    base_sha = (comparison.get("base_commit") or {}).get("sha")
+    commits = comparison.get("commits") or []
+    head_sha = commits[-1].get("sha") if commits else base_sha
+    if comparison.get("total_commits", len(commits)) > len(commits):
+        # The compare API lists at most 250 commits, oldest first.
+        head_sha, _ = GitHubService.get_head_sha(access_token, repo_full_name, ref=head)
+    if not base_sha or not head_sha:
+        raise HTTPException(status_code=502, detail="Could not resolve commit range")
+    return f"{base_sha}..{head_sha}", comparison
+
+
+def _resolve_ranges(
+    access_token: str,
+    repo_full_name: str,
+    commit_keys: List[str],
+) -> Tuple[Dict[str, str], Dict[str, dict], Dict[str, Exception]]:
+    """
+    ``_resolve_range`` for several keys, with the compare calls running
+    ``DOCS_BATCH_CONCURRENCY`` at a time at manual priority.
+
+    Returns (stored key by given key, comparison by stored key, failure by given key).
+    """
+    keys = {commit_key: commit_key for commit_key in commit_keys if _pinned(commit_key)}
+    comparisons: Dict[str, dict] = {}
+    failures: Dict[str, Exception] = {}
+    unresolved = [commit_key for commit_key in commit_keys if commit_key not in keys]
+    if not unresolved:
+        return keys, comparisons, failures
+
+    workers = min(len(unresolved), max(1, settings.DOCS_BATCH_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docs-range") as pool:
+        with priority(Priority.MANUAL):
+            futures = {
+                commit_key: pool.submit(
+                    contextvars.copy_context().run, _resolve_range, access_token, repo_full_name, commit_key
+                )
+                for commit_key in unresolved
+            }
+        for commit_key, future in futures.items():
+            try:
+                stored, comparison = future.result()
+            except Exception as exc:
+                failures[commit_key] = exc
+                continue
+            keys[commit_key] = stored
+            if comparison is not None:
+                comparisons[stored] = comparison
+    return keys, comparisons, failures
+
+
+def _short_key(commit_key: str) -> str:
+    commit_range = _split_range(commit_key)
+    if commit_range:
+        return f"{commit_range[0][:7]}..{commit_range[1][:7]}"
+    return commit_key[:7]
+
+
+def _prompt_for(style: str, context: str, complexity: Optional[int], subject: str = "commit") -> str:
     complexity_hint = ""
     if complexity is not None:
         complexity = max(0, min(complexity, 100))
@@ -59,7 +193,7 @@ def _prompt_for(style: str, context: str, complexity: Optional[int]) -> str:
 
     if style == "plainText":
         instruction = (
-            "Write concise plain-English documentation for the commit."
+            f"Write concise plain-English documentation for the {subject}."
             " Provide a short overview and bullet list of key changes."
         )
     elif style == "research":
@@ -74,17 +208,413 @@ def _prompt_for(style: str, context: str, complexity: Optional[int]) -> str:
         )
     else:
         instruction = "Write technical documentation."
+    if subject == "commit range":
+        instruction += " Consolidate all commits into one document describing the combined change."
 
     return f"""
     You are an expert technical writer.{complexity_hint}
     {instruction}
-    Base your response strictly on the commit context below.
+    Base your response strictly on the {subject} context below.
 
-    Commit context:
+    {subject.capitalize()} context:
     {context}
     """
 
 
+def _generate_styles(
+    styles: List[str],
+    context: str,
+    complexity: Optional[int],
+    subject: str = "commit",
+) -> Tuple[Dict[str, str], Dict[str, Exception]]:
+    """
+    Generates each style from the same commit context, up to
+    ``DOCS_STYLE_CONCURRENCY`` at a time. Returns (results, errors) by style.
+    """
+    def generate(style: str) -> str:
+        return generate_text(_prompt_for(style, context, complexity, subject))
+
+    results: Dict[str, str] = {}
+    errors: Dict[str, Exception] = {}
+    workers = min(len(styles), max(1, settings.DOCS_STYLE_CONCURRENCY))
+    if workers <= 1:
+        for style in styles:
+            try:
+                results[style] = generate(style)
+            except Exception as exc:
+                errors[style] = exc
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docs-style") as pool:
+        # Each task runs in a copy of this context so the scheduler priority
+        # of the request applies to its LLM calls.
+        futures = {
+            style: pool.submit(contextvars.copy_context().run, generate, style)
+            for style in styles
+        }
+        for style, future in futures.items():
+            try:
+                results[style] = future.result()
+            except Exception as exc:
+                errors[style] = exc
+    return results, errors
+
+
+def _error_detail(exc: Exception) -> str:
+    return str(exc.detail) if isinstance(exc, HTTPException) else str(exc)
+
+
+def _load_cached_docs(
+    db: Session,
+    user_id: int,
+    repo_full_name: str,
+    commit_shas: List[str],
+    complexity: int,
+    styles: List[str],
+) -> Dict[str, CachedDocs]:
+    """
+    Returns the user's cached documents for ``styles`` by commit, reading
+    misses of every commit in one query.
+    """
+    entries: Dict[str, CachedDocs] = {
+        sha: _docs_cache.get((user_id, repo_full_name, sha, complexity)) or {}
+        for sha in commit_shas
+    }
+    missing = {
+        sha: [style for style in styles if style not in entry]
+        for sha, entry in entries.items()
+    }
+    missing_shas = [sha for sha, missing_styles in missing.items() if missing_styles]
+    if missing_shas:
+        missing_styles = sorted({style for sha in missing_shas for style in missing[sha]})
+        own = Documentation.shared_id.is_(None)
+        rows = db.query(
+            Documentation.commit_sha,
+            Documentation.style,
+            case((own, Documentation.content), else_=SharedDocumentation.content),
+            case(
+                (own, func.coalesce(Documentation.updated_at, Documentation.created_at)),
+                else_=func.coalesce(SharedDocumentation.updated_at, SharedDocumentation.created_at),
+            ),
+        ).outerjoin(
+            SharedDocumentation, SharedDocumentation.id == Documentation.shared_id
+        ).filter(
+            Documentation.user_id == user_id,
+            Documentation.repo_full_name == repo_full_name,
+            Documentation.commit_sha.in_(missing_shas),
+            Documentation.complexity == complexity,
+            Documentation.style.in_(missing_styles),
+            or_(own, SharedDocumentation.prompt_version == _prompt_version()),
+        ).all()
+        found: Dict[str, CachedDocs] = {}
+        for sha, style, content, stamp in rows:
+            found.setdefault(sha, {})[style] = (content, stamp)
+        for sha, docs in found.items():
+            entries[sha] = {**entries[sha], **docs}
+            _docs_cache.set((user_id, repo_full_name, sha, complexity), entries[sha])
+    return {
+        sha: {style: entry[style] for style in styles if style in entry}
+        for sha, entry in entries.items()
+    }
+
+
+def _prompt_version() -> str:
+    return f"{PROMPT_VERSION}:{settings.DOCS_GENERATION_MODE}"
+
+
+def _load_shared_docs(
+    db: Session,
+    repo_full_name: str,
+    commit_shas: List[str],
+    complexity: int,
+    styles: List[str],
+) -> Dict[Tuple[str, str], SharedDocumentation]:
+    """Returns shared documents by (commit_sha, style)."""
+    if not commit_shas or not styles:
+        return {}
+    rows = db.query(SharedDocumentation).filter(
+        SharedDocumentation.repo_full_name == repo_full_name,
+        SharedDocumentation.commit_sha.in_(commit_shas),
+        SharedDocumentation.complexity == complexity,
+        SharedDocumentation.prompt_version == _prompt_version(),
+        SharedDocumentation.style.in_(styles),
+    )
+    return {(row.commit_sha, row.style): row for row in rows}
+
+
+def _can_read(user: User, repo_full_name: str) -> bool:
+    key = (user.id, repo_full_name)
+    allowed = _access_cache.get(key)
+    if allowed is None:
+        allowed = GitHubService.can_read_repo(user.access_token, repo_full_name)
+        _access_cache.set(key, allowed)
+    return allowed
+
+
+class _CommitPlan:
+    """What is cached for one commit and what is left to generate."""
+
+    def __init__(self, cached: CachedDocs, to_generate: List[str]):
+        self.cached = cached
+        self.to_generate = to_generate
+        # Shared documents (by style) the user gets access rows for.
+        self.linked: Dict[str, SharedDocumentation] = {}
+        self.cached_ir: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return not self.to_generate and not self.linked
+
+
+def _plan_commits(
+    db: Session,
+    user: User,
+    repo_full_name: str,
+    commit_shas: List[str],
+    complexity: int,
+    styles: List[str],
+    force: bool,
+) -> Dict[str, _CommitPlan]:
+    """
+    Works out, for each commit, which styles the user already has, which
+    can be linked from documents other users generated, and which must be
+    generated. Costs one query for the user's documents and, when anything
+    is missing, one for the IR and one for shared documents.
+    """
+    cached = _load_cached_docs(db, user.id, repo_full_name, commit_shas, complexity, styles)
+    plans = {
+        sha: _CommitPlan(
+            cached[sha],
+            list(styles) if force else [style for style in styles if style not in cached[sha]],
+        )
+        for sha in commit_shas
+    }
+    pending = [sha for sha, plan in plans.items() if plan.to_generate]
+    if force or not pending:
+        return plans
+
+    ir_mode = doc_ir_service.ir_enabled()
+    if ir_mode:
+        irs = _load_cached_docs(db, user.id, repo_full_name, pending, complexity, [IR_STYLE])
+        for sha in pending:
+            if IR_STYLE in irs[sha]:
+                plans[sha].cached_ir = irs[sha][IR_STYLE][0]
+
+    # Another user may already have generated these commits; reuse them
+    # after checking that this user can read the repository.
+    wanted = {style for sha in pending for style in plans[sha].to_generate}
+    if ir_mode and any(plans[sha].cached_ir is None for sha in pending):
+        wanted.add(IR_STYLE)
+    shared = _load_shared_docs(db, repo_full_name, pending, complexity, sorted(wanted))
+    for (sha, style), row in shared.items():
+        plan = plans[sha]
+        if style in plan.to_generate or (style == IR_STYLE and plan.cached_ir is None):
+            plan.linked[style] = row
+    if not any(plans[sha].linked for sha in pending):
+        return plans
+    if not _can_read(user, repo_full_name):
+        raise HTTPException(status_code=404, detail="Repository not found")
+    for sha in pending:
+        plan = plans[sha]
+        plan.to_generate = [style for style in plan.to_generate if style not in plan.linked]
+        if IR_STYLE in plan.linked:
+            plan.cached_ir = plan.linked[IR_STYLE].content
+    return plans
+
+
+def _generate_commit_docs(
+    access_token: str,
+    repo_full_name: str,
+    commit_sha: str,
+    complexity: Optional[int],
+    styles: List[str],
+    cached_ir: Optional[str] = None,
+    comparison: Optional[dict] = None,
+) -> Tuple[Dict[str, str], Dict[str, Exception]]:
+    """
+    Generates ``styles`` for one commit, or for a ``base..head`` range from
+    its aggregate diff (``comparison`` when it was already fetched), without
+    touching the database.
+
+    Returns (documents, failures) by style; documents include the IR when
+    one was generated. Raises if every style failed.
+    """
+    if not styles:
+        return {}, {}
+
+    commit_range = _split_range(commit_sha)
+    subject = "commit range" if commit_range else "commit"
+
+    def commit_context() -> str:
+        if commit_range:
+            base, head = commit_range
+            diff = comparison or GitHubService.compare_commits(access_token, repo_full_name, base, head)
+            return _build_range_context(diff, base, head)
+        detail = GitHubService.get_commit_detail(
+            access_token,
+            repo_full_name,
+            commit_sha,
+            include_patch=True,
+        )
+        return _build_commit_context(detail)
+
+    if doc_ir_service.ir_enabled():
+        # One LLM call for the IR, then every style is rendered locally. A
+        # cached IR renders new styles without touching GitHub or the LLM.
+        writes: Dict[str, str] = {}
+        if cached_ir:
+            ir = doc_ir_service.loads(cached_ir)
+        else:
+            prompt = doc_ir_service.ir_prompt(subject, commit_context(), complexity)
+            ir = doc_ir_service.parse_ir(generate_text(prompt))
+            writes[IR_STYLE] = doc_ir_service.dumps(ir)
+        writes.update((style, doc_ir_service.render(ir, style)) for style in styles)
+        return writes, {}
+
+    results, failures = _generate_styles(styles, commit_context(), complexity, subject)
+    if failures and not results:
+        raise next(iter(failures.values()))
+    for style, exc in failures.items():
+        logger.warning("Generating %s docs for %s@%s failed: %s",
+                       style, repo_full_name, commit_sha, _error_detail(exc))
+    return results, failures
+
+
+def _write_docs(
+    db: Session,
+    user: User,
+    request: DocsGenerateRequest,
+    complexity: int,
+    writes: Dict[str, str],
+    linked: Dict[str, SharedDocumentation],
+    now: datetime,
+) -> CachedDocs:
+    shared = {
+        style: row
+        for (_, style), row in _load_shared_docs(
+            db, request.repo_full_name, [request.commit_sha], complexity, list(writes)
+        ).items()
+    }
+    for style, content in writes.items():
+        row = shared.get(style)
+        if row:
+            row.content = content
+            row.updated_at = now
+        else:
+            row = SharedDocumentation(
+                repo_full_name=request.repo_full_name,
+                commit_sha=request.commit_sha,
+                style=style,
+                complexity=complexity,
+                prompt_version=_prompt_version(),
+                content=content,
+            )
+            db.add(row)
+            shared[style] = row
+    shared.update(linked)
+
+    existing = {
+        doc.style: doc
+        for doc in db.query(Documentation).filter(
+            Documentation.user_id == user.id,
+            Documentation.repo_full_name == request.repo_full_name,
+            Documentation.commit_sha == request.commit_sha,
+            Documentation.complexity == complexity,
+            Documentation.style.in_(list(shared)),
+        )
+    }
+    for style, row in shared.items():
+        doc = existing.get(style)
+        if doc:
+            doc.shared = row
+            doc.content = ""
+            doc.updated_at = now
+        else:
+            db.add(Documentation(
+                user_id=user.id,
+                repo_full_name=request.repo_full_name,
+                commit_sha=request.commit_sha,
+                style=style,
+                complexity=complexity,
+                content="",
+                shared=row,
+            ))
+    saved = {
+        style: (row.content, now if style in writes else row.updated_at or row.created_at)
+        for style, row in shared.items()
+    }
+    db.commit()
+    return saved
+
+
+def _save_docs(
+    db: Session,
+    user: User,
+    request: DocsGenerateRequest,
+    complexity: int,
+    writes: Dict[str, str],
+    linked: Dict[str, SharedDocumentation],
+    now: datetime,
+) -> CachedDocs:
+    """
+    Stores generated documents in the shared table and points the user's
+    access rows at them and at the reused ``linked`` rows, in one transaction.
+    """
+    try:
+        saved = _write_docs(db, user, request, complexity, writes, linked, now)
+    except IntegrityError:
+        # Another user saved the same shared rows first; overwrite them.
+        db.rollback()
+        saved = _write_docs(db, user, request, complexity, writes, linked, now)
+    key = (user.id, request.repo_full_name, request.commit_sha, complexity)
+    _docs_cache.set(key, {**(_docs_cache.get(key) or {}), **saved})
+    return saved
+
+
+def _requested_styles(style: Optional[str]) -> List[str]:
+    styles = list(_OUTPUT_FIELDS)
+    if style:
+        if style not in styles:
+            raise HTTPException(status_code=400, detail="Unsupported style")
+        styles = [style]
+    return styles
+
+
+def _latest(docs: CachedDocs) -> datetime:
+    return max((stamp for _, stamp in docs.values() if stamp), default=None) or datetime.utcnow()
+
+
+def _by_style(styles: List[str], cached: CachedDocs, generated: CachedDocs) -> CachedDocs:
+    return {
+        style: generated.get(style) or cached[style]
+        for style in styles
+        if style in generated or style in cached
+    }
+
+
+def _docs_response(
+    request: DocsGenerateRequest,
+    generated_at: datetime,
+    docs: CachedDocs,
+    errors: Optional[Dict[str, str]] = None,
+) -> dict:
+    output = {
+        "commit_sha": request.commit_sha,
+        "commit_short_sha": _short_key(request.commit_sha),
+        "repo_name": request.repo_full_name.split("/")[-1],
+        "repo_full_name": request.repo_full_name,
+        "generated_at": generated_at.isoformat() + "Z",
+        "plain_text": None,
+        "research_style": None,
+        "latex": None,
+    }
+    for style, (content, _) in docs.items():
+        output[_OUTPUT_FIELDS[style]] = content
+    if errors:
+        output["errors"] = errors
+    return output
+
+
 @router.post("/generate", response_model=DocsGenerateResponse)
 def generate_docs(
     request: DocsGenerateRequest,
@@ -93,98 +623,172 @@ def generate_docs(
 ):
     """
     Generates documentation for a commit in one or more styles.
+
+    Cached styles are served from a short-lived in-process cache backed by a
+    single query for all requested styles; only missing styles (or all of
+    them with ``force``) fetch the commit and call the LLM, concurrently.
+    If some styles fail, the others are still saved and returned, and the
+    failures are listed in ``errors``. In IR mode a single LLM call produces
+    a structured description that all styles are rendered from.
+
+    Generated documents are shared between users: a commit documented for
+    one user is served to any other user whose GitHub token can read the
+    repository, without generating it again.
+
+    With ``base_sha`` (or a ``base..head`` ``commit_sha``) the range is
+    documented as one consolidated document, built from a single compare
+    call. It is cached under the SHAs the range resolves to, so a range
+    given as tags or branches is documented again once they move; the
+    response keeps the range as given.
     """
     if not current_user.access_token:
         raise HTTPException(status_code=401, detail="Missing GitHub access token")
 
-    styles = ["plainText", "research", "latex"]
-    if request.style:
-        if request.style not in styles:
-            raise HTTPException(status_code=400, detail="Unsupported style")
-        styles = [request.style]
-
+    if request.base_sha:
+        request = request.model_copy(update={
+            "commit_sha": f"{request.base_sha}..{request.commit_sha}",
+            "base_sha": None,
+        })
+    _split_range(request.commit_sha)
+    styles = _requested_styles(request.style)
     complexity_value = request.complexity if request.complexity is not None else -1
+    commit_key, comparison = _resolve_range(
+        current_user.access_token, request.repo_full_name, request.commit_sha
+    )
+    plan = _plan_commits(
+        db, current_user, request.repo_full_name, [commit_key],
+        complexity_value, styles, request.force,
+    )[commit_key]
+    if plan.complete:
+        return _docs_response(request, _latest(plan.cached), plan.cached)
 
-    cached = {}
-    for style in styles:
-        cached_doc = db.query(Documentation).filter_by(
-            user_id=current_user.id,
-            repo_full_name=request.repo_full_name,
-            commit_sha=request.commit_sha,
-            style=style,
-            complexity=complexity_value,
-        ).first()
-        if cached_doc:
-            cached[style] = cached_doc
-
-    if cached and not request.force and len(cached) == len(styles):
-        latest_cached = max(
-            (doc.updated_at or doc.created_at) for doc in cached.values()
-        )
-        output = {
-            "commit_sha": request.commit_sha,
-            "commit_short_sha": request.commit_sha[:7],
-            "repo_name": request.repo_full_name.split("/")[-1],
-            "repo_full_name": request.repo_full_name,
-            "generated_at": (latest_cached or datetime.utcnow()).isoformat() + "Z",
-            "plain_text": cached.get("plainText").content if cached.get("plainText") else None,
-            "research_style": cached.get("research").content if cached.get("research") else None,
-            "latex": cached.get("latex").content if cached.get("latex") else None,
-        }
-        return output
-
-    detail = GitHubService.get_commit_detail(
+    writes, failures = _generate_commit_docs(
         current_user.access_token,
         request.repo_full_name,
-        request.commit_sha,
-        include_patch=True,
+        commit_key,
+        request.complexity,
+        plan.to_generate,
+        plan.cached_ir,
+        comparison,
     )
-    context = _build_commit_context(detail)
+    now = datetime.utcnow()
+    stored = request.model_copy(update={"commit_sha": commit_key})
+    generated = _save_docs(db, current_user, stored, complexity_value, writes, plan.linked, now)
+    errors = {style: _error_detail(exc) for style, exc in failures.items()}
+    return _docs_response(request, now, _by_style(styles, plan.cached, generated), errors)
 
-    output = {
-        "commit_sha": request.commit_sha,
-        "commit_short_sha": request.commit_sha[:7],
-        "repo_name": request.repo_full_name.split("/")[-1],
-        "repo_full_name": request.repo_full_name,
-        "generated_at": datetime.utcnow().isoformat() + "Z",
-        "plain_text": None,
-        "research_style": None,
-        "latex": None,
-    }
 
-    for style in styles:
-        cached_doc = cached.get(style)
-        should_generate = request.force or cached_doc is None
+@router.post("/generate-batch")
+def generate_docs_batch(
+    request: DocsBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Generates documentation for several commits of one repository.
+
+    The response is newline-delimited JSON with one line per commit, in
+    completion order: a ``/docs/generate`` response, or ``commit_sha``,
+    ``status_code`` and ``error`` when that commit failed. Cached commits
+    are probed in one query and written first; the others are fetched and
+    generated ``DOCS_BATCH_CONCURRENCY`` at a time at manual priority, so
+    interactive requests are not starved. Entries may be ``base..head``
+    ranges, keyed by the SHAs they resolve to as in ``/docs/generate``.
+    """
+    if not current_user.access_token:
+        raise HTTPException(status_code=401, detail="Missing GitHub access token")
 
-        if should_generate:
-            prompt = _prompt_for(style, context, request.complexity)
-            result = generate_text(prompt)
+    styles = _requested_styles(request.style)
+    commit_shas = list(dict.fromkeys(request.commit_shas))
+    for sha in commit_shas:
+        _split_range(sha)
+    if not commit_shas:
+        raise HTTPException(status_code=400, detail="No commits given")
+    if len(commit_shas) > MAX_BATCH_COMMITS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_COMMITS} commits per batch")
 
-            if cached_doc:
-                cached_doc.content = result
-                cached_doc.updated_at = datetime.utcnow()
-            else:
-                cached_doc = Documentation(
-                    user_id=current_user.id,
-                    repo_full_name=request.repo_full_name,
-                    commit_sha=request.commit_sha,
-                    style=style,
-                    complexity=complexity_value,
-                    content=result,
-                )
-                db.add(cached_doc)
+    complexity_value = request.complexity if request.complexity is not None else -1
+    access_token = current_user.access_token
+    user_id = current_user.id
+    keys, comparisons, unresolved = _resolve_ranges(access_token, request.repo_full_name, commit_shas)
+    plans = _plan_commits(
+        db, current_user, request.repo_full_name, list(dict.fromkeys(keys.values())),
+        complexity_value, styles, request.force,
+    )
 
-            cached[style] = cached_doc
-        else:
-            result = cached_doc.content
+    def item_request(sha: str) -> DocsGenerateRequest:
+        return DocsGenerateRequest(
+            repo_full_name=request.repo_full_name,
+            commit_sha=sha,
+            style=request.style,
+            complexity=request.complexity,
+            force=request.force,
+        )
 
-        if style == "plainText":
-            output["plain_text"] = result
-        elif style == "research":
-            output["research_style"] = result
-        elif style == "latex":
-            output["latex"] = result
+    def generate(key: str) -> Tuple[Dict[str, str], Dict[str, Exception]]:
+        plan = plans[key]
+        return _generate_commit_docs(
+            access_token, request.repo_full_name, key, request.complexity,
+            plan.to_generate, plan.cached_ir, comparisons.get(key),
+        )
 
-    db.commit()
+    def line(item: dict) -> str:
+        return json.dumps(item) + "\n"
 
-    return output
+    def error_line(sha: str, exc: Exception) -> str:
+        logger.warning("Batch docs for %s@%s failed: %s", request.repo_full_name, sha, _error_detail(exc))
+        status_code = exc.status_code if isinstance(exc, HTTPException) else 500
+        return line({"commit_sha": sha, "status_code": status_code, "error": _error_detail(exc)})
+
+    def results() -> Iterator[str]:
+        for sha, exc in unresolved.items():
+            yield error_line(sha, exc)
+        # Given entries by stored key; two ranges may resolve to the same SHAs.
+        pending: Dict[str, List[str]] = {}
+        for sha, key in keys.items():
+            plan = plans[key]
+            if plan.complete:
+                yield line(_docs_response(item_request(sha), _latest(plan.cached), plan.cached))
+            else:
+                pending.setdefault(key, []).append(sha)
+        if not pending:
+            return
+
+        workers = min(len(pending), max(1, settings.DOCS_BATCH_CONCURRENCY))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docs-batch")
+        # The stream outlives the request's session, so results are saved on
+        # a session of its own.
+        batch_db = SessionLocal()
+        try:
+            batch_user = batch_db.get(User, user_id)
+            with priority(Priority.MANUAL):
+                futures = {
+                    pool.submit(contextvars.copy_context().run, generate, key): key
+                    for key in pending
+                }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    writes, failures = future.result()
+                    now = datetime.utcnow()
+                    linked = {
+                        style: batch_db.merge(row, load=False) for style, row in plans[key].linked.items()
+                    }
+                    generated = _save_docs(
+                        batch_db, batch_user, item_request(key), complexity_value, writes, linked, now
+                    )
+                except Exception as exc:
+                    batch_db.rollback()
+                    for sha in pending[key]:
+                        yield error_line(sha, exc)
+                    continue
+                errors = {style: _error_detail(exc) for style, exc in failures.items()}
+                docs = _by_style(styles, plans[key].cached, generated)
+                for sha in pending[key]:
+                    yield line(_docs_response(item_request(sha), now, docs, errors))
+        finally:
+            # Stops queued commits if the client went away.
+            pool.shutdown(wait=False, cancel_futures=True)
+            batch_db.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
@@ -1,23 +1,34 @@
-from typing import Optional
+import asyncio
+import json
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_user
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import SessionLocal, get_db
+from app.models.repo_doc_run import RepoDocRun
 from app.models.repo_documentation import RepoDocumentation
 from app.models.repository import Repository
 from app.models.user import User
 from app.schemas.repo_docs import (
     RepoDocsActivateRequest,
     RepoDocsGenerateRequest,
+    RepoDocsJobResponse,
     RepoDocsResponse,
 )
-from app.services.repo_doc_service import generate_repo_documentation
+from app.services.doc_ir_service import IR_STYLE
+from app.services.repo_doc_service import generate_repo_documentation, queue_repo_documentation
+from app.services.scheduler import Priority, priority
 
 router = APIRouter()
 
 _ALLOWED_STYLES = {"plainText", "research", "latex"}
+_FINISHED_STATUSES = {"completed", "failed"}
+EVENT_POLL_SECONDS = 1.0
 
 
 def _find_repo(db: Session, user_id: int, repo_full_name: str) -> Optional[Repository]:
@@ -46,12 +57,87 @@ def _normalize_style(style: Optional[str]) -> str:
     return style
 
 
-@router.post("/activate", response_model=RepoDocsResponse)
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() + "Z" if value else None
+
+
+def _doc_response(doc: RepoDocumentation, repo_full_name: str) -> RepoDocsResponse:
+    return RepoDocsResponse(
+        repo_full_name=repo_full_name,
+        style=doc.style,
+        complexity=doc.complexity,
+        generated_at=(doc.updated_at or doc.created_at).isoformat() + "Z",
+        content=doc.content,
+    )
+
+
+def _job_response(run: RepoDocRun, repo_full_name: str) -> RepoDocsJobResponse:
+    return RepoDocsJobResponse(
+        job_id=run.id,
+        repo_full_name=repo_full_name,
+        style=run.style,
+        complexity=run.complexity,
+        status=run.status,
+        stage=run.stage,
+        files_done=run.files_done,
+        files_total=run.files_total,
+        error=run.error,
+        created_at=_isoformat(run.created_at),
+        finished_at=_isoformat(run.finished_at),
+    )
+
+
+def _run_documentation(
+    db: Session,
+    response: Response,
+    repo: Repository,
+    access_token: str,
+    style: str,
+    complexity: Optional[int],
+    force: bool,
+    wait: bool,
+    repo_full_name: str,
+) -> Union[RepoDocsResponse, RepoDocsJobResponse]:
+    if wait:
+        # A whole-repo run yields to single-page interactive requests.
+        with priority(Priority.MANUAL):
+            doc = generate_repo_documentation(
+                db=db,
+                repo=repo,
+                access_token=access_token,
+                style=style,
+                complexity=complexity,
+                force=force,
+                lock_wait_seconds=settings.REPO_LOCK_WAIT_SECONDS,
+            )
+        return _doc_response(doc, repo_full_name)
+
+    run = queue_repo_documentation(db, repo, style, complexity, force=force)
+    response.status_code = 202
+    return _job_response(run, repo_full_name)
+
+
+def _load_job(db: Session, user_id: int, job_id: int) -> RepoDocRun:
+    run = db.get(RepoDocRun, job_id)
+    if not run or not run.repo or run.repo.owner_id != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return run
+
+
+@router.post("/activate", response_model=Union[RepoDocsResponse, RepoDocsJobResponse])
 def activate_repo_docs(
     request: RepoDocsActivateRequest,
+    response: Response,
+    wait: bool = Query(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    """
+    Enables repo docs and starts a documentation run.
+
+    Returns 202 with a job to poll at ``/jobs/{job_id}``; with ``wait=true``
+    the run happens inside the request and the document is returned.
+    """
     if not current_user.access_token:
         raise HTTPException(status_code=401, detail="Missing GitHub access token")
 
@@ -66,30 +152,28 @@ def activate_repo_docs(
     repo.docs_complexity = complexity if complexity is not None else -1
     db.commit()
 
-    doc = generate_repo_documentation(
-        db=db,
-        repo=repo,
-        access_token=current_user.access_token,
-        style=style,
-        complexity=complexity,
-        force=request.force,
-    )
-
-    return RepoDocsResponse(
-        repo_full_name=repo.full_name or request.repo_full_name,
-        style=doc.style,
-        complexity=doc.complexity,
-        generated_at=(doc.updated_at or doc.created_at).isoformat() + "Z",
-        content=doc.content,
+    return _run_documentation(
+        db,
+        response,
+        repo,
+        current_user.access_token,
+        style,
+        complexity,
+        request.force,
+        wait,
+        repo.full_name or request.repo_full_name,
     )
 
 
-@router.post("/generate", response_model=RepoDocsResponse)
+@router.post("/generate", response_model=Union[RepoDocsResponse, RepoDocsJobResponse])
 def generate_repo_docs(
     request: RepoDocsGenerateRequest,
+    response: Response,
+    wait: bool = Query(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    """Starts a documentation run; see ``activate_repo_docs`` for ``wait``."""
     if not current_user.access_token:
         raise HTTPException(status_code=401, detail="Missing GitHub access token")
 
@@ -98,21 +182,65 @@ def generate_repo_docs(
         raise HTTPException(status_code=404, detail="Repository not found")
 
     style = _normalize_style(request.style)
-    doc = generate_repo_documentation(
-        db=db,
-        repo=repo,
-        access_token=current_user.access_token,
-        style=style,
-        complexity=request.complexity,
-        force=request.force,
+    return _run_documentation(
+        db,
+        response,
+        repo,
+        current_user.access_token,
+        style,
+        request.complexity,
+        request.force,
+        wait,
+        repo.full_name or request.repo_full_name,
     )
 
-    return RepoDocsResponse(
-        repo_full_name=repo.full_name or request.repo_full_name,
-        style=doc.style,
-        complexity=doc.complexity,
-        generated_at=(doc.updated_at or doc.created_at).isoformat() + "Z",
-        content=doc.content,
+
+@router.get("/jobs/{job_id}", response_model=RepoDocsJobResponse)
+def get_repo_docs_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    run = _load_job(db, current_user.id, job_id)
+    return _job_response(run, run.repo.full_name or run.repo.name)
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_repo_docs_job(
+    job_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Server-Sent Events stream of job progress, closed once the job finishes."""
+    run = _load_job(db, current_user.id, job_id)
+    repo_full_name = run.repo.full_name or run.repo.name
+
+    def snapshot(stream_db: Session) -> RepoDocsJobResponse:
+        stream_db.expire_all()
+        return _job_response(stream_db.get(RepoDocRun, job_id), repo_full_name)
+
+    async def events():
+        # The stream outlives the request's session, so it polls on its own.
+        stream_db = SessionLocal()
+        try:
+            last = None
+            while True:
+                state = await run_in_threadpool(snapshot, stream_db)
+                data = state.model_dump()
+                if data != last:
+                    last = data
+                    yield f"event: progress\ndata: {json.dumps(data)}\n\n"
+                if state.status in _FINISHED_STATUSES or await request.is_disconnected():
+                    return
+                await asyncio.sleep(EVENT_POLL_SECONDS)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -133,17 +261,12 @@ def get_latest_repo_docs(
             repo_id=repo.id, style=style
         ).first()
     else:
-        doc = db.query(RepoDocumentation).filter_by(repo_id=repo.id).order_by(
-            RepoDocumentation.updated_at.desc()
-        ).first()
+        doc = db.query(RepoDocumentation).filter(
+            RepoDocumentation.repo_id == repo.id,
+            RepoDocumentation.style != IR_STYLE,
+        ).order_by(RepoDocumentation.updated_at.desc()).first()
 
     if not doc:
         raise HTTPException(status_code=404, detail="No documentation found")
 
-    return RepoDocsResponse(
-        repo_full_name=repo.full_name or repo_full_name,
-        style=doc.style,
-        complexity=doc.complexity,
-        generated_at=(doc.updated_at or doc.created_at).isoformat() + "Z",
-        content=doc.content,
-    )
+    return _doc_response(doc, repo.full_name or repo_full_name)
@@ -1,15 +1,28 @@
 import hmac
 import hashlib
-from typing import Iterable
+from typing import Any, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Request
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover - orjson is optional
+    from json import loads as _json_loads
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import SessionLocal
-from app.models.repository import Repository
-from app.models.user import User
-from app.services.repo_doc_service import update_repo_from_push
+from app.db.session import get_db
+from app.services import commit_index, job_queue
+from app.services.delivery_store import claim_delivery, release_delivery
+from app.services.poller import record_head
+from app.services.push_service import (
+    collect_push_files,
+    is_default_branch_push,
+    merge_push_payloads,
+    push_coalesce_key,
+)
+from app.services.scheduler import Priority
 
 router = APIRouter()
 
@@ -28,74 +41,86 @@ def _verify_signature(payload: bytes, signature_header: str) -> None:
         raise HTTPException(status_code=401, detail="Invalid webhook signature")
 
 
-def _process_push_event(
-    repo_full_name: str,
-    head_sha: str,
-    changed_files: Iterable[str],
-    removed_files: Iterable[str],
-):
-    db: Session = SessionLocal()
+def _loads(payload: bytes) -> Any:
+    try:
+        return _json_loads(payload)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+
+
+def _enqueue_push(db: Session, payload: bytes) -> dict:
+    data = _loads(payload)
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+    repo_full_name = (data.get("repository") or {}).get("full_name")
+    head_sha = data.get("after")
+    if not repo_full_name or not head_sha:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+
+    changed_files, removed_files = collect_push_files(data.get("commits") or [])
+    base_sha = data.get("before")
+
+    # The commit index and the poller follow the default branch only.
+    if is_default_branch_push(data):
+        commit_index.record_push(db, repo_full_name, base_sha, head_sha, data.get("commits") or [])
+        record_head(db, repo_full_name, head_sha)
+
+    # Processing happens in app.worker; the API only records the job. Pushes
+    # to the same repo and ref within the coalescing window share one job.
+    job = job_queue.enqueue(
+        db,
+        "push",
+        {
+            "repo_full_name": repo_full_name,
+            "head_sha": head_sha,
+            "base_sha": base_sha,
+            "changed_files": changed_files,
+            "removed_files": removed_files,
+        },
+        delay_seconds=settings.PUSH_COALESCE_WINDOW_SECONDS,
+        coalesce_key=push_coalesce_key(repo_full_name, data),
+        merge=merge_push_payloads,
+        priority=Priority.WEBHOOK,
+    )
+    return {"status": "queued", "job_id": job.id}
+
+
+def _ingest(
+    db: Session,
+    payload: bytes,
+    event: Optional[str],
+    signature: Optional[str],
+    delivery_id: Optional[str],
+) -> dict:
+    _verify_signature(payload, signature)
+
+    # Redeliveries reuse the delivery ID; acknowledge them without new work.
+    if delivery_id and not claim_delivery(db, delivery_id, event):
+        return {"status": "duplicate"}
+
     try:
-        repo = db.query(Repository).filter(Repository.full_name == repo_full_name).first()
-        if not repo:
-            repo_name = repo_full_name.split("/")[-1]
-            repo = db.query(Repository).filter(Repository.name == repo_name).first()
-        if not repo or not repo.docs_active:
-            return
-
-        user = db.query(User).filter(User.id == repo.owner_id).first()
-        if not user or not user.access_token:
-            return
-
-        update_repo_from_push(
-            db=db,
-            repo=repo,
-            access_token=user.access_token,
-            changed_files=changed_files,
-            removed_files=removed_files,
-            head_sha=head_sha,
-        )
-    finally:
-        db.close()
+        if event == "ping":
+            return {"status": "ok"}
+        if event != "push":
+            return {"status": "ignored"}
+        return _enqueue_push(db, payload)
+    except Exception:
+        if delivery_id:
+            release_delivery(db, delivery_id)
+        raise
 
 
 @router.post("/github")
 async def github_webhook(
     request: Request,
-    background_tasks: BackgroundTasks,
     x_github_event: str = Header(None),
     x_hub_signature_256: str = Header(None),
+    x_github_delivery: str = Header(None),
+    db: Session = Depends(get_db),
 ):
     payload = await request.body()
-    _verify_signature(payload, x_hub_signature_256)
-
-    if x_github_event == "ping":
-        return {"status": "ok"}
-
-    if x_github_event != "push":
-        return {"status": "ignored"}
-
-    data = await request.json()
-    repo_full_name = data.get("repository", {}).get("full_name")
-    head_sha = data.get("after")
-    if not repo_full_name or not head_sha:
-        raise HTTPException(status_code=400, detail="Invalid webhook payload")
-
-    changed_files = set()
-    removed_files = set()
-    for commit in data.get("commits", []) or []:
-        changed_files.update(commit.get("added", []) or [])
-        changed_files.update(commit.get("modified", []) or [])
-        removed_files.update(commit.get("removed", []) or [])
-
-    changed_files = changed_files - removed_files
-
-    background_tasks.add_task(
-        _process_push_event,
-        repo_full_name,
-        head_sha,
-        list(changed_files),
-        list(removed_files),
+    # Signature check, JSON parsing and the enqueue all run in one threadpool
+    # hop so large payloads never block the event loop.
+    return await run_in_threadpool(
+        _ingest, db, payload, x_github_event, x_hub_signature_256, x_github_delivery
     )
-
-    return {"status": "queued"}
@@ -0,0 +1,169 @@
+"""
+Small in-process caches for hot read paths.
+"""
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_instances: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def clear_all() -> None:
+    """Empties every cache in the process (used between tests)."""
+    for cache in list(_instances):
+        cache.clear()
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache whose entries expire ``ttl_seconds`` after
+    they were stored.
+
+    Values are shared between threads, so callers must treat them as
+    immutable and ``set`` a new value instead of mutating a cached one.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _spawn_thread(fn: Callable[[], None]) -> None:
+    threading.Thread(target=fn, name="cache-refresh", daemon=True).start()
+
+
+class StaleWhileRevalidateCache:
+    """
+    A thread-safe LRU cache that serves stale entries while refreshing them.
+
+    Entries younger than ``fresh_seconds`` are served as they are. Entries
+    younger than ``stale_seconds`` are served immediately and refreshed by
+    one background task per key. Older entries are reloaded in the caller,
+    but are still served if that load fails. As with ``TTLCache``, values
+    must be treated as immutable.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        fresh_seconds: float,
+        stale_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        spawn: Callable[[Callable[[], None]], None] = _spawn_thread,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = max(stale_seconds, fresh_seconds)
+        self._clock = clock
+        self._spawn = spawn
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def get(
+        self,
+        key: Hashable,
+        load: Callable[[], Any],
+        refresh: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Returns the value for ``key``, calling ``load`` on a miss. ``refresh``
+        (``load`` by default) computes the value in the background and must
+        not rely on the caller's resources, such as its database session.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            start_refresh = False
+            if item is not None:
+                self._entries.move_to_end(key)
+                age = self._clock() - item[0]
+                if age < self.fresh_seconds:
+                    return item[1]
+                if age < self.stale_seconds:
+                    start_refresh = key not in self._refreshing
+                    self._refreshing.add(key)
+        if item is not None and age < self.stale_seconds:
+            if start_refresh:
+                self._spawn(lambda: self._refresh(key, refresh or load))
+            return item[1]
+
+        try:
+            value = load()
+        except Exception:
+            if item is None:
+                raise
+            logger.warning("Serving stale cache entry for %r after a failed load", key, exc_info=True)
+            return item[1]
+        self.set(key, value)
+        return value
+
+    def _refresh(self, key: Hashable, refresh: Callable[[], Any]) -> None:
+        try:
+            self.set(key, refresh())
+        except Exception:
+            logger.warning("Background refresh of %r failed; keeping the stale entry", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -38,6 +38,71 @@ class Settings(BaseSettings):
 
     # --- Webhooks ---
     GITHUB_WEBHOOK_SECRET: Optional[str] = None
+    # How long X-GitHub-Delivery IDs are remembered for redelivery dedupe.
+    WEBHOOK_DELIVERY_TTL_SECONDS: int = 3 * 24 * 3600
+
+    # --- Commit docs read cache (per process) ---
+    DOCS_CACHE_TTL_SECONDS: float = 300.0
+    DOCS_CACHE_MAX_ENTRIES: int = 1024
+    # Styles generated in parallel for one commit.
+    DOCS_STYLE_CONCURRENCY: int = 3
+    # Commits fetched and generated in parallel by /docs/generate-batch.
+    DOCS_BATCH_CONCURRENCY: int = 4
+    # "per_style": one LLM call per style. "ir": one call for a structured
+    # representation that every style is rendered from (app/services/doc_ir_service.py).
+    DOCS_GENERATION_MODE: str = "per_style"
+
+    # --- Background jobs (see app/worker.py) ---
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = 600
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 30.0
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    # Done jobs are deleted after this long; dead ones are kept.
+    JOB_DONE_RETENTION_SECONDS: int = 24 * 3600
+    # Pushes to the same repo within this window are merged into one job.
+    PUSH_COALESCE_WINDOW_SECONDS: float = 30.0
+
+    # --- Commit polling for repos without webhooks (see app/services/poller.py) ---
+    POLL_ENABLED: bool = True
+    # How often the worker looks for repositories that are due a poll.
+    POLL_TICK_SECONDS: float = 15.0
+    POLL_MIN_INTERVAL_SECONDS: float = 60.0
+    POLL_MAX_INTERVAL_SECONDS: float = 3600.0
+    POLL_BATCH_SIZE: int = 50
+
+    # --- Per-repository documentation lock (see app/services/repo_lock.py) ---
+    REPO_LOCK_TTL_SECONDS: int = 600
+    # How long a wait=true request waits for another run on the same repo.
+    REPO_LOCK_WAIT_SECONDS: float = 300.0
+    # Delay before a worker retries a job whose repository was locked.
+    REPO_LOCK_RETRY_SECONDS: float = 15.0
+
+    # --- CPU-bound preprocessing (see app/services/cpu_pool.py) ---
+    # Worker processes for parsing/outlining large files; 0 runs it inline.
+    CPU_POOL_WORKERS: int = 0
+
+    # --- Outbound call scheduling (see app/services/scheduler.py) ---
+    LLM_MAX_CONCURRENCY: int = 4
+    GITHUB_MAX_CONCURRENCY: int = 8
+    # Slots per pool that only interactive requests may use.
+    SCHEDULER_INTERACTIVE_RESERVED_SLOTS: int = 1
+    # The bounds above apply per process. Interactive calls in one process are
+    # published in the database for this long, and while another process has
+    # published demand, background calls here may hold at most this many slots.
+    SCHEDULER_SHARED_DEMAND: bool = True
+    SCHEDULER_DEMAND_HOLD_SECONDS: int = 10
+    SCHEDULER_BACKGROUND_SLOTS_UNDER_DEMAND: int = 1
+
+    # --- Local commit index (see app/services/commit_index.py) ---
+    # /commits re-syncs a repository whose index is older than this.
+    COMMIT_INDEX_FRESH_SECONDS: int = 60
+    # Most commits listed by one sync; older history is filled in on demand.
+    COMMIT_INDEX_SYNC_LIMIT: int = 500
+    # First page of /commits per user: served as is while fresh, served and
+    # refreshed in the background while stale.
+    COMMITS_FEED_FRESH_SECONDS: float = 30.0
+    COMMITS_FEED_STALE_SECONDS: float = 600.0
+    COMMITS_FEED_CACHE_MAX_ENTRIES: int = 1024
 
     # Pydantic v2 configuration
     model_config = ConfigDict(
@@ -4,9 +4,17 @@ Base = declarative_base()
 
 # Import models so SQLAlchemy registers tables before create_all.
 from app.models import (  # noqa: F401,E402
+    commit,
     documentation,
     file_summary,
+    job,
+    repo_doc_run,
     repo_documentation,
+    repo_lock,
+    repo_poll_state,
     repository,
+    scheduler_demand,
+    shared_documentation,
     user,
+    webhook_delivery,
 )
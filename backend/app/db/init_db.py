@@ -0,0 +1,54 @@
+"""
+Schema setup shared by the API and the worker.
+
+``create_all`` creates missing tables but never alters existing ones, so
+columns and indexes added to existing tables are applied here as well.
+Both entry points call ``init_db`` at startup, whichever starts first.
+"""
+from sqlalchemy import text
+
+from app.db.base import Base
+from app.db.session import engine
+from app.models.documentation import Documentation
+
+
+def _ensure_columns(table: str, columns: dict) -> None:
+    if not str(engine.url).startswith("sqlite"):
+        return
+    with engine.begin() as conn:
+        existing = {
+            row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
+        }
+        if not existing:
+            return
+        for name, ddl in columns.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def _ensure_repo_columns() -> None:
+    _ensure_columns("repositories", {
+        "full_name": "VARCHAR",
+        "docs_active": "BOOLEAN DEFAULT 0",
+        "docs_style": "VARCHAR DEFAULT 'plainText'",
+        "docs_complexity": "INTEGER DEFAULT -1",
+    })
+    _ensure_columns("documentations", {
+        "shared_id": "INTEGER REFERENCES shared_documentations(id)",
+    })
+    _ensure_columns("jobs", {
+        "coalesce_key": "VARCHAR",
+        "priority": "INTEGER NOT NULL DEFAULT 0",
+    })
+
+
+def _ensure_indexes() -> None:
+    # create_all skips existing tables, and with them indexes added later.
+    for index in Documentation.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+def init_db() -> None:
+    Base.metadata.create_all(bind=engine)
+    _ensure_repo_columns()
+    _ensure_indexes()
@@ -2,34 +2,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.router import api_router
-from sqlalchemy import text
-from app.db.session import engine
-from app.db.base import Base
-
-# Create Tables
-Base.metadata.create_all(bind=engine)
-
-
-def _ensure_repo_columns() -> None:
-    if not str(engine.url).startswith("sqlite"):
-        return
-    with engine.begin() as conn:
-        columns = {
-            row[1] for row in conn.execute(text("PRAGMA table_info(repositories)")).fetchall()
-        }
-        if not columns:
-            return
-        if "full_name" not in columns:
-            conn.execute(text("ALTER TABLE repositories ADD COLUMN full_name VARCHAR"))
-        if "docs_active" not in columns:
-            conn.execute(text("ALTER TABLE repositories ADD COLUMN docs_active BOOLEAN DEFAULT 0"))
-        if "docs_style" not in columns:
-            conn.execute(text("ALTER TABLE repositories ADD COLUMN docs_style VARCHAR DEFAULT 'plainText'"))
-        if "docs_complexity" not in columns:
-            conn.execute(text("ALTER TABLE repositories ADD COLUMN docs_complexity INTEGER DEFAULT -1"))
-
-
-_ensure_repo_columns()
+from app.db.init_db import init_db
+from app.db.session import SessionLocal
+from app.services.scheduler import configure_shared_demand
+
+# Create tables and apply column/index migrations
+init_db()
+# Interactive calls here defer background work in the worker processes
+configure_shared_demand(SessionLocal)
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
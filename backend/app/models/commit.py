@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text, UniqueConstraint
+
+from app.db.base import Base
+
+
+class Commit(Base):
+    """A commit in the local commit index, shared by every user of the repo."""
+    __tablename__ = "commits"
+    __table_args__ = (
+        UniqueConstraint("repo_full_name", "sha", name="uq_commit"),
+        # Keyset pagination walks (committed_at, id) newest first.
+        Index("ix_commits_repo_committed", "repo_full_name", "committed_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    repo_full_name = Column(String, nullable=False)
+    sha = Column(String, nullable=False)
+    message = Column(Text, nullable=False, default="")
+    author = Column(String)
+    author_login = Column(String)
+    author_avatar = Column(String)
+    committed_at = Column(DateTime, nullable=False)
+    # File statistics are fetched lazily; NULL until they are.
+    files_changed = Column(Integer)
+    additions = Column(Integer)
+    deletions = Column(Integer)
+    files = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CommitSyncState(Base):
+    """How far the commit index of a repository is synced with GitHub."""
+    __tablename__ = "commit_sync_states"
+
+    repo_full_name = Column(String, primary_key=True)
+    # Newest indexed commit; everything from here back to oldest_sha is indexed.
+    head_sha = Column(String)
+    etag = Column(String)
+    oldest_sha = Column(String)
+    history_complete = Column(Boolean, nullable=False, default=False)
+    synced_at = Column(DateTime)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -17,6 +17,8 @@ class Documentation(Base):
             "complexity",
             name="uq_docs_cache",
         ),
+        # Covers the has_documentation lookup of commit listings.
+        Index("ix_docs_user_commit", "user_id", "commit_sha", "repo_full_name"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -25,8 +27,12 @@ class Documentation(Base):
     commit_sha = Column(String, index=True, nullable=False)
     style = Column(String, index=True, nullable=False)
     complexity = Column(Integer, index=True, nullable=False, default=-1)
+    # Set on rows created through the shared cache; their own content is
+    # left empty. Older rows keep their content here.
+    shared_id = Column(Integer, ForeignKey("shared_documentations.id"), index=True)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     owner = relationship("User", back_populates="docs")
+    shared = relationship("SharedDocumentation")
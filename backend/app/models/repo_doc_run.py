@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+
+class RepoDocRun(Base):
+    __tablename__ = "repo_doc_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    repo_id = Column(Integer, ForeignKey("repositories.id"), index=True, nullable=False)
+    style = Column(String, nullable=False, default="plainText")
+    complexity = Column(Integer, nullable=False, default=-1)
+    ref = Column(String, nullable=False, default="HEAD")
+    force = Column(Boolean, nullable=False, default=False)
+    status = Column(String, index=True, nullable=False, default="running")
+    stage = Column(String, nullable=False, default="pending")
+    files_total = Column(Integer, nullable=False, default=0)
+    files_done = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    repo = relationship("Repository", back_populates="doc_runs")
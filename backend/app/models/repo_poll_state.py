@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+
+from app.db.base import Base
+
+
+class RepoPollState(Base):
+    __tablename__ = "repo_poll_states"
+
+    repo_id = Column(Integer, ForeignKey("repositories.id"), primary_key=True)
+    head_sha = Column(String)
+    etag = Column(String)
+    interval_seconds = Column(Float, nullable=False)
+    next_poll_at = Column(DateTime, index=True, nullable=False, default=datetime.utcnow)
+    last_polled_at = Column(DateTime)
+    last_changed_at = Column(DateTime)
+    last_error = Column(String)
@@ -23,3 +23,4 @@ class Repository(Base):
     owner = relationship("User", back_populates="repos")
     repo_docs = relationship("RepoDocumentation", back_populates="repo")
     file_summaries = relationship("FileSummary", back_populates="repo")
+    doc_runs = relationship("RepoDocRun", back_populates="repo")
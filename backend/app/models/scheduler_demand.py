@@ -0,0 +1,10 @@
+from sqlalchemy import Column, DateTime, String
+
+from app.db.base import Base
+
+
+class SchedulerDemand(Base):
+    __tablename__ = "scheduler_demand"
+
+    process_id = Column(String, primary_key=True)
+    interactive_until = Column(DateTime, index=True, nullable=False)
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, UniqueConstraint
+
+from app.db.base import Base
+
+
+class SharedDocumentation(Base):
+    """
+    Generated commit documentation, shared by every user of a repository.
+
+    Rows are keyed by content inputs only; users reach them through their
+    own ``Documentation`` access rows.
+    """
+    __tablename__ = "shared_documentations"
+    __table_args__ = (
+        UniqueConstraint(
+            "repo_full_name",
+            "commit_sha",
+            "style",
+            "complexity",
+            "prompt_version",
+            name="uq_shared_docs",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    repo_full_name = Column(String, index=True, nullable=False)
+    commit_sha = Column(String, index=True, nullable=False)
+    style = Column(String, nullable=False)
+    complexity = Column(Integer, nullable=False, default=-1)
+    prompt_version = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
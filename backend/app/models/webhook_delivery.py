@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, String
+
+from app.db.base import Base
+
+
+class WebhookDelivery(Base):
+    __tablename__ = "webhook_deliveries"
+
+    delivery_id = Column(String, primary_key=True)
+    event = Column(String)
+    received_at = Column(DateTime, index=True, nullable=False, default=datetime.utcnow)
@@ -28,3 +28,7 @@ class CommitItem(BaseModel):
 
 class CommitListResponse(BaseModel):
     commits: List[CommitItem]
+    # Opaque cursor of the next page; None on the last page.
+    next_cursor: Optional[str] = None
+    # When the commit index of the covered repositories was last synced.
+    synced_at: Optional[str] = None
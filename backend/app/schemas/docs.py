@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -6,6 +6,17 @@ from pydantic import BaseModel
 class DocsGenerateRequest(BaseModel):
     repo_full_name: str
     commit_sha: str
+    # Documents base..commit_sha as one range instead of a single commit.
+    base_sha: Optional[str] = None
+    style: Optional[str] = None
+    complexity: Optional[int] = None
+    force: bool = False
+
+
+class DocsBatchRequest(BaseModel):
+    repo_full_name: str
+    # Commit SHAs or base..head ranges.
+    commit_shas: List[str]
     style: Optional[str] = None
     complexity: Optional[int] = None
     force: bool = False
@@ -20,3 +31,5 @@ class DocsGenerateResponse(BaseModel):
     plain_text: Optional[str] = None
     research_style: Optional[str] = None
     latex: Optional[str] = None
+    # Styles that failed to generate, mapped to the error message.
+    errors: Optional[Dict[str, str]] = None
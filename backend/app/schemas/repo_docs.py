@@ -23,3 +23,17 @@ class RepoDocsResponse(BaseModel):
     complexity: int
     generated_at: str
     content: str
+
+
+class RepoDocsJobResponse(BaseModel):
+    job_id: int
+    repo_full_name: str
+    style: str
+    complexity: int
+    status: str
+    stage: str
+    files_done: int
+    files_total: int
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    finished_at: Optional[str] = None
@@ -9,6 +9,7 @@ from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
 import requests
 
 from app.core.config import settings
+from app.services.scheduler import llm_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -149,7 +150,9 @@ def _generate_with_gemini(prompt: str) -> str:
 def _retry(call: Callable[[], str], provider_label: str) -> str:
     for attempt in range(_MAX_RETRIES):
         try:
-            return call()
+            # The slot is held per attempt so backoff sleeps do not occupy it.
+            with llm_limiter.slot():
+                return call()
         except (ResourceExhausted, ServiceUnavailable):
             if attempt == _MAX_RETRIES - 1:
                 raise HTTPException(
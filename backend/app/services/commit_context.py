@@ -0,0 +1,159 @@
+"""
+Budgeted LLM context for commit diffs.
+
+Files are classified (lockfile, generated, vendored, test, source) and
+ranked, so that source changes get the patch budget and noise such as
+lockfiles and generated code is only counted. The budget for patches is
+shared between files in proportion to their relevance; within a file, the
+hunks with the most changed lines (and those touching definitions) come
+first. Building stops as soon as the budget is used, so the cost does not
+grow with the size of the commit beyond one pass over the file list.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+LOCKFILE = "lockfile"
+GENERATED = "generated"
+VENDORED = "vendored"
+TEST = "test"
+SOURCE = "source"
+
+# Relative share of the patch budget; zero means the patch is never shown.
+WEIGHTS = {
+    SOURCE: 1.0,
+    TEST: 0.4,
+    GENERATED: 0.0,
+    VENDORED: 0.0,
+    LOCKFILE: 0.0,
+}
+
+MAX_LISTED_FILES = 40
+# Fraction of the budget the file list may use.
+LISTING_SHARE = 0.25
+# Smallest slice of a hunk worth including.
+MIN_HUNK_CHARS = 80
+# Patch budget each file should get at least; fewer files get patches
+# rather than all of them getting a useless sliver.
+MIN_FILE_CHARS = 300
+
+_LOCKFILES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "pipfile.lock",
+    "cargo.lock", "gemfile.lock", "composer.lock", "go.sum", "uv.lock", "bun.lockb",
+}
+_VENDORED_DIRS = ("vendor/", "node_modules/", "third_party/", "third-party/", "site-packages/")
+_GENERATED_SUFFIXES = (
+    ".min.js", ".min.css", ".map", ".pb.go", "_pb2.py", "_pb2_grpc.py", ".g.dart", ".designer.cs",
+    ".snap", ".lock", ".svg", ".png", ".jpg", ".ico", ".pdf",
+)
+_GENERATED_DIRS = ("dist/", "build/", "generated/", "__generated__/", "migrations/versions/")
+_TEST_PATTERN = re.compile(r"(^|/)(tests?|__tests__|spec)/|(^|/)test_[^/]*$|_test\.\w+$|\.(test|spec)\.\w+$")
+_DEFINITION = re.compile(r"\b(def|class|function|func|fn|interface|struct|impl|public|export)\b")
+
+
+def classify(filename: str) -> str:
+    path = filename.lower()
+    name = path.rsplit("/", 1)[-1]
+    if name in _LOCKFILES:
+        return LOCKFILE
+    rooted = f"/{path}"
+    if any(f"/{directory}" in rooted for directory in _VENDORED_DIRS):
+        return VENDORED
+    if path.endswith(_GENERATED_SUFFIXES) or any(f"/{directory}" in rooted for directory in _GENERATED_DIRS):
+        return GENERATED
+    if _TEST_PATTERN.search(path):
+        return TEST
+    return SOURCE
+
+
+def _changes(file_info: dict) -> int:
+    return file_info.get("additions", 0) + file_info.get("deletions", 0)
+
+
+def _relevance(file_info: dict, category: str) -> float:
+    # Logarithmic in size, so one huge file does not take the whole budget.
+    return WEIGHTS[category] * (1.0 + math.log1p(_changes(file_info)))
+
+
+def _hunks(patch: str) -> Iterator[str]:
+    start = 0
+    while True:
+        end = patch.find("\n@@", start + 1)
+        if end == -1:
+            yield patch[start:]
+            return
+        yield patch[start:end]
+        start = end + 1
+
+
+def _hunk_score(hunk: str) -> float:
+    changed = sum(1 for line in hunk.split("\n") if line[:1] in ("+", "-"))
+    header = hunk.split("\n", 1)[0]
+    return changed + (5 if _DEFINITION.search(header) else 0)
+
+
+def _ranked(files: Sequence[dict]) -> List[Tuple[float, int, dict, str]]:
+    ranked = []
+    for index, file_info in enumerate(files):
+        category = classify(file_info.get("filename", ""))
+        ranked.append((_relevance(file_info, category), index, file_info, category))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return ranked
+
+
+def _file_line(file_info: dict, category: str) -> str:
+    line = f"- {file_info.get('filename', '')} (+{file_info.get('additions', 0)}/-{file_info.get('deletions', 0)})"
+    return line if category == SOURCE else f"{line} [{category}]"
+
+
+def build_context(header_lines: Sequence[str], files: Sequence[dict], budget: int) -> str:
+    """Returns ``header_lines`` plus the most relevant parts of ``files`` within ``budget`` chars."""
+    parts: List[str] = ["\n".join(header_lines), "Files changed:"]
+    used = sum(len(part) + 1 for part in parts)
+    ranked = _ranked(files)
+
+    listing_budget = used + int(budget * LISTING_SHARE)
+    listed = 0
+    for _, _, file_info, category in ranked[:MAX_LISTED_FILES]:
+        line = _file_line(file_info, category)
+        if used + len(line) + 1 > listing_budget:
+            break
+        parts.append(line)
+        used += len(line) + 1
+        listed += 1
+    if listed < len(ranked):
+        skipped: Dict[str, int] = Counter(category for _, _, _, category in ranked[listed:])
+        summary = ", ".join(f"{count} {category}" for category, count in sorted(skipped.items()))
+        line = f"- ...and {len(ranked) - listed} more files ({summary})"
+        parts.append(line)
+        used += len(line) + 1
+
+    with_patch = [item for item in ranked if item[0] > 0 and item[2].get("patch")]
+    with_patch = with_patch[:max(1, (budget - used) // MIN_FILE_CHARS)]
+    total_relevance = sum(item[0] for item in with_patch)
+    for relevance, _, file_info, _ in with_patch:
+        remaining = budget - used
+        if remaining < MIN_HUNK_CHARS:
+            break
+        # A share of what is left, so whatever a file does not use goes to
+        # the files ranked after it.
+        allowance = remaining * relevance / total_relevance
+        total_relevance -= relevance
+        title = f"\n--- {file_info.get('filename', '')}"
+        if allowance < len(title) + MIN_HUNK_CHARS:
+            continue
+        taken = [title]
+        spent = len(title) + 1
+        for hunk in sorted(_hunks(file_info["patch"]), key=_hunk_score, reverse=True):
+            room = allowance - spent
+            if room < MIN_HUNK_CHARS:
+                break
+            if len(hunk) + 1 > room:
+                hunk = hunk[:int(room) - 16] + "\n...[truncated]"
+            taken.append(hunk)
+            spent += len(hunk) + 1
+        parts.extend(taken)
+        used += spent
+
+    return "\n".join(parts)
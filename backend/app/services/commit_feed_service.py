@@ -0,0 +1,238 @@
+"""
+Commit listing for ``/commits``, served from the local commit index.
+
+The feed covers one repository or, without one, the user's monitored
+repositories (or the most recently updated when none are monitored), all
+taken from the local ``repositories`` table. Stale repositories are synced
+first, with their GitHub calls running concurrently; pages are then read
+from the ``commits`` table with keyset pagination, merged across
+repositories by the query's ordering. File statistics are fetched once per
+commit, the first time a page shows it. A page that runs past the indexed
+history indexes a few older chunks; while some repository's history is
+still incomplete, a short page carries a cursor to continue from. All
+GitHub calls go through the process-wide GitHub limiter, which is the
+global cap on concurrent requests.
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.commit import Commit
+from app.models.documentation import Documentation
+from app.models.repository import Repository
+from app.models.user import User
+from app.services import commit_index
+from app.services.github_service import GitHubService
+
+logger = logging.getLogger(__name__)
+
+MAX_MONITORED_REPOS = 10
+MAX_RECENT_REPOS = 5
+# History chunks indexed per repository for one page; a filtered page that
+# is still short after these returns a cursor to carry on from.
+MAX_HISTORY_CHUNKS_PER_PAGE = 5
+
+
+def _full_name(repo: Repository) -> Optional[str]:
+    if repo.full_name:
+        return repo.full_name
+    # Rows synced before full_name was stored still have the HTML URL.
+    prefix = "https://github.com/"
+    if repo.url and repo.url.startswith(prefix):
+        return repo.url[len(prefix):].strip("/") or None
+    return None
+
+
+def feed_repos(db: Session, user: User) -> List[str]:
+    """Full names of the repositories the aggregate feed covers."""
+    query = db.query(Repository).filter(Repository.owner_id == user.id)
+    repos = query.filter(Repository.is_active.is_(True)).order_by(Repository.id).limit(MAX_MONITORED_REPOS).all()
+    if not repos:
+        repos = query.order_by(
+            Repository.last_updated.is_(None), Repository.last_updated.desc(), Repository.id
+        ).limit(MAX_RECENT_REPOS).all()
+    names = (_full_name(repo) for repo in repos)
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def owns_repo(db: Session, user: User, repo_full_name: str) -> bool:
+    """Whether the repository is among the user's synced repositories."""
+    repos = db.query(Repository).filter(
+        Repository.owner_id == user.id,
+        or_(Repository.full_name == repo_full_name, Repository.name == repo_full_name.split("/")[-1]),
+    )
+    return any(_full_name(repo) == repo_full_name for repo in repos)
+
+
+def _map_concurrently(fn: Callable, items: Sequence) -> List:
+    """Runs ``fn`` over ``items`` in threads, preserving order."""
+    if len(items) < 2:
+        return [fn(item) for item in items]
+    workers = min(len(items), max(1, settings.GITHUB_MAX_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="commit-feed") as pool:
+        # Copied contexts keep the request's scheduler priority.
+        futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def _quietly(fn: Callable, repo_full_name: str, *args: Any) -> Optional[Any]:
+    try:
+        return fn(*args)
+    except HTTPException as exc:
+        # One unreadable or empty repository should not fail the feed.
+        logger.warning("Syncing commits of %s failed: %s", repo_full_name, exc.detail)
+        return None
+
+
+def sync_repos(db: Session, access_token: str, repo_full_names: Sequence[str]) -> None:
+    """Brings stale repositories of the index up to date with GitHub."""
+    now = datetime.utcnow()
+    states = commit_index.get_states(db, repo_full_names)
+    stale = [
+        (name, getattr(states.get(name), "head_sha", None), getattr(states.get(name), "etag", None))
+        for name in repo_full_names
+        if not commit_index.is_fresh(states.get(name), now)
+    ]
+
+    def fetch(item):
+        name, head_sha, etag = item
+        return _quietly(commit_index.fetch_updates, name, access_token, name, head_sha, etag)
+
+    for result in _map_concurrently(fetch, stale):
+        if result is not None:
+            commit_index.apply_updates(db, result, now)
+
+
+def _history_frontier(db: Session, repo_full_names: Sequence[str], since: Optional[datetime]) -> List[Commit]:
+    """
+    The oldest indexed commit of each repository whose older, not yet
+    indexed history could still hold commits at or after ``since``.
+    """
+    states = commit_index.get_states(db, repo_full_names).values()
+    oldest = {(state.repo_full_name, state.oldest_sha) for state in states
+              if state.oldest_sha and not state.history_complete}
+    if not oldest:
+        return []
+    rows = db.query(Commit).filter(
+        Commit.repo_full_name.in_([name for name, _ in oldest]),
+        Commit.sha.in_([sha for _, sha in oldest]),
+    ).all()
+    return [
+        row for row in rows
+        if (row.repo_full_name, row.sha) in oldest and (since is None or row.committed_at >= since)
+    ]
+
+
+def _extend_history(db: Session, access_token: str, frontier: Sequence[Commit]) -> bool:
+    """Indexes one more chunk of history before each commit of ``frontier``."""
+    pending = [(commit.repo_full_name, commit.sha) for commit in frontier]
+
+    def fetch(item):
+        name, oldest_sha = item
+        return _quietly(commit_index.fetch_history, name, access_token, name, oldest_sha)
+
+    extended = False
+    for result in _map_concurrently(fetch, pending):
+        if result is not None:
+            commit_index.apply_history(db, result)
+            extended = True
+    return extended
+
+
+def _next_cursor(
+    db: Session,
+    repo_full_names: Sequence[str],
+    commits: List[Commit],
+    per_page: int,
+    cursor: Optional[str],
+    since: Optional[datetime],
+) -> Optional[str]:
+    if len(commits) == per_page:
+        return commit_index.encode_cursor(commits[-1])
+    frontier = _history_frontier(db, repo_full_names, since)
+    if not frontier:
+        return None
+    # A short page with history still to index: the next request carries on
+    # indexing. Without a commit to continue from, it resumes at the newest
+    # point where a repository's index ends; everything above it was searched.
+    if commits:
+        return commit_index.encode_cursor(commits[-1])
+    newest = max(frontier, key=lambda commit: (commit.committed_at, commit.id))
+    if cursor and commit_index.decode_cursor(cursor) <= (newest.committed_at, newest.id):
+        return cursor
+    return commit_index.encode_cursor(newest)
+
+
+def _fill_stats(db: Session, access_token: str, commits: List) -> None:
+    missing = [commit for commit in commits if commit.files is None]
+    if not missing:
+        return
+
+    def stats(commit) -> Optional[Dict]:
+        return _quietly(GitHubService.get_commit_stats, commit.repo_full_name,
+                        access_token, commit.repo_full_name, commit.sha)
+
+    for commit, commit_stats in zip(missing, _map_concurrently(stats, missing)):
+        if commit_stats is not None:
+            commit_index.store_stats(commit, commit_stats)
+    db.commit()
+
+
+def list_commits(
+    db: Session,
+    user: User,
+    repo_full_names: Sequence[str],
+    per_page: int,
+    cursor: Optional[str] = None,
+    author: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_stats: bool = True,
+) -> Dict[str, Any]:
+    """
+    Returns a page of commits across ``repo_full_names``, newest first, with
+    the cursor of the next page and the sync watermark of the oldest repo.
+    """
+    sync_repos(db, user.access_token, repo_full_names)
+    commits = commit_index.query_page(db, repo_full_names, per_page, cursor, author, since, until)
+    for _ in range(MAX_HISTORY_CHUNKS_PER_PAGE):
+        if len(commits) == per_page:
+            break
+        frontier = _history_frontier(db, repo_full_names, since)
+        if not frontier or not _extend_history(db, user.access_token, frontier):
+            break
+        commits = commit_index.query_page(db, repo_full_names, per_page, cursor, author, since, until)
+    if include_stats:
+        _fill_stats(db, user.access_token, commits)
+
+    states = commit_index.get_states(db, repo_full_names).values()
+    synced = [state.synced_at for state in states if state.synced_at]
+    return {
+        "commits": [commit_index.to_item(commit) for commit in commits],
+        "next_cursor": _next_cursor(db, repo_full_names, commits, per_page, cursor, since),
+        "synced_at": min(synced).isoformat() + "Z" if synced else None,
+    }
+
+
+def annotate_documentation(db: Session, user: User, commits: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copies of ``commits`` with ``has_documentation`` set, from one query."""
+    shas = list({commit.get("full_sha") for commit in commits if commit.get("full_sha")})
+    documented = set()
+    if shas:
+        documented = set(
+            db.query(Documentation.repo_full_name, Documentation.commit_sha)
+            .filter(Documentation.user_id == user.id, Documentation.commit_sha.in_(shas))
+            .distinct()
+            .all()
+        )
+    return [
+        {**commit, "has_documentation": (commit.get("repo_full_name"), commit.get("full_sha")) in documented}
+        for commit in commits
+    ]
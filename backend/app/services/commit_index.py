@@ -0,0 +1,319 @@
+"""
+Local index of repository commits.
+
+``/commits`` is served from the ``commits`` table. Each repository has a
+``CommitSyncState`` recording the newest indexed commit (``head_sha``) and
+the oldest (``oldest_sha``); everything in between is indexed. Syncing is
+incremental: the branch head is resolved with an ETag conditional request
+(a 304 costs no rate limit), and only when it moved are commits listed from
+the new head until the previous one is reached. Older history is filled in
+a chunk at a time from ``oldest_sha`` when a page runs past it, so once a
+repository's history is indexed, scrolling it costs no GitHub calls. When
+the previous head is not reached (a force-push, or more new commits than
+one sync lists), the index is cut back to the commits just listed. Push
+webhooks to the default branch add their commits directly.
+
+Syncing is split into a fetch step that only talks to GitHub (and can run
+on any thread) and an apply step that writes the results.
+"""
+import base64
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.commit import Commit, CommitSyncState
+from app.services.github_service import GitHubService
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 100
+
+
+def _parse_time(value: Optional[str]) -> datetime:
+    """Parses a GitHub timestamp into naive UTC."""
+    if not value:
+        return datetime.utcnow()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return datetime.utcnow()
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class SyncResult:
+    """Commits fetched for one repository, ready to be applied."""
+
+    def __init__(
+        self,
+        repo_full_name: str,
+        head_sha: Optional[str] = None,
+        etag: Optional[str] = None,
+        commits: Optional[List[dict]] = None,
+        contiguous: bool = True,
+        exhausted: bool = False,
+    ):
+        self.repo_full_name = repo_full_name
+        self.head_sha = head_sha
+        self.etag = etag
+        self.commits = commits or []
+        # False when the previous head was not reached, i.e. the fetched
+        # commits do not connect to the indexed ones.
+        self.contiguous = contiguous
+        # True when the listing reached the first commit of the repository.
+        self.exhausted = exhausted
+
+
+def get_states(db: Session, repo_full_names: Sequence[str]) -> Dict[str, CommitSyncState]:
+    if not repo_full_names:
+        return {}
+    rows = db.query(CommitSyncState).filter(CommitSyncState.repo_full_name.in_(list(repo_full_names)))
+    return {state.repo_full_name: state for state in rows}
+
+
+def is_fresh(state: Optional[CommitSyncState], now: Optional[datetime] = None) -> bool:
+    if state is None or state.synced_at is None:
+        return False
+    age = ((now or datetime.utcnow()) - state.synced_at).total_seconds()
+    return age < settings.COMMIT_INDEX_FRESH_SECONDS
+
+
+def _list_from(
+    access_token: str,
+    repo_full_name: str,
+    start_sha: str,
+    stop_sha: Optional[str],
+    limit: int,
+) -> Tuple[List[dict], bool, bool]:
+    """Lists commits from ``start_sha`` until ``stop_sha`` (excluded) or ``limit``.
+
+    Returns (commits, reached stop_sha, reached the first commit).
+    """
+    commits: List[dict] = []
+    page = 1
+    while len(commits) < limit:
+        entries = GitHubService.get_repo_commits(
+            access_token, repo_full_name, per_page=PAGE_SIZE, include_stats=False, sha=start_sha, page=page,
+        )
+        for entry in entries:
+            if stop_sha and entry.get("full_sha") == stop_sha:
+                return commits, True, False
+            commits.append(entry)
+        if len(entries) < PAGE_SIZE:
+            return commits, False, True
+        page += 1
+    return commits[:limit], False, False
+
+
+def fetch_updates(
+    access_token: str,
+    repo_full_name: str,
+    head_sha: Optional[str],
+    etag: Optional[str],
+    limit: Optional[int] = None,
+) -> SyncResult:
+    """
+    Fetches commits newer than ``head_sha`` (recent history when None), at
+    most ``limit`` (``COMMIT_INDEX_SYNC_LIMIT``) of them.
+    """
+    new_head, new_etag = GitHubService.get_head_sha(
+        access_token, repo_full_name, etag=etag if head_sha else None
+    )
+    if new_head is None or new_head == head_sha:
+        return SyncResult(repo_full_name, head_sha, new_etag)
+
+    commits, reached, exhausted = _list_from(
+        access_token, repo_full_name, new_head, head_sha, limit or settings.COMMIT_INDEX_SYNC_LIMIT
+    )
+    return SyncResult(
+        repo_full_name,
+        new_head,
+        new_etag,
+        commits,
+        # Listing the whole history without meeting head_sha means it is
+        # no longer on the branch.
+        contiguous=head_sha is not None and reached,
+        exhausted=exhausted,
+    )
+
+
+def fetch_history(access_token: str, repo_full_name: str, oldest_sha: str) -> SyncResult:
+    """Fetches the chunk of history just before ``oldest_sha``."""
+    commits, _, exhausted = _list_from(access_token, repo_full_name, oldest_sha, None, PAGE_SIZE)
+    # The listing starts with oldest_sha itself.
+    older = [entry for entry in commits if entry.get("full_sha") != oldest_sha]
+    return SyncResult(repo_full_name, commits=older, exhausted=exhausted)
+
+
+def _insert_commits(db: Session, repo_full_name: str, entries: Iterable[Dict[str, Any]]) -> None:
+    entries = [entry for entry in entries if entry.get("sha")]
+    if not entries:
+        return
+    known = {
+        sha for (sha,) in db.query(Commit.sha).filter(
+            Commit.repo_full_name == repo_full_name,
+            Commit.sha.in_([entry["sha"] for entry in entries]),
+        )
+    }
+    for entry in entries:
+        if entry["sha"] in known:
+            continue
+        known.add(entry["sha"])
+        db.add(Commit(repo_full_name=repo_full_name, **entry))
+
+
+def _from_api(entry: dict) -> Dict[str, Any]:
+    return {
+        "sha": entry.get("full_sha"),
+        "message": entry.get("message") or "",
+        "author": entry.get("author"),
+        "author_login": entry.get("author_login"),
+        "author_avatar": entry.get("author_avatar"),
+        "committed_at": _parse_time(entry.get("timestamp")),
+    }
+
+
+def _commit_or_rollback(db: Session) -> None:
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request indexed the same commits or state first.
+        db.rollback()
+
+
+def apply_updates(db: Session, result: SyncResult, now: Optional[datetime] = None) -> None:
+    """Writes the result of ``fetch_updates`` and advances the watermark."""
+    state = db.get(CommitSyncState, result.repo_full_name)
+    if state is None:
+        state = CommitSyncState(repo_full_name=result.repo_full_name, history_complete=False)
+        db.add(state)
+    if result.commits and not result.contiguous:
+        # First sync, a gap or a force-push: the indexed range restarts at
+        # the new head. Indexed commits outside it may no longer be on the
+        # branch, so they are dropped; older history is re-fetched on demand.
+        db.query(Commit).filter(
+            Commit.repo_full_name == result.repo_full_name,
+            Commit.sha.notin_([entry.get("full_sha") for entry in result.commits]),
+        ).delete(synchronize_session=False)
+        state.oldest_sha = result.commits[-1].get("full_sha")
+        state.history_complete = result.exhausted
+    _insert_commits(db, result.repo_full_name, (_from_api(entry) for entry in result.commits))
+    state.head_sha = result.head_sha or state.head_sha
+    state.etag = result.etag
+    state.synced_at = now or datetime.utcnow()
+    _commit_or_rollback(db)
+
+
+def apply_history(db: Session, result: SyncResult) -> None:
+    """Writes the result of ``fetch_history`` and moves ``oldest_sha`` back."""
+    state = db.get(CommitSyncState, result.repo_full_name)
+    if state is None:
+        return
+    _insert_commits(db, result.repo_full_name, (_from_api(entry) for entry in result.commits))
+    if result.commits:
+        state.oldest_sha = result.commits[-1].get("full_sha")
+    state.history_complete = result.exhausted or not result.commits
+    _commit_or_rollback(db)
+
+
+def record_push(
+    db: Session,
+    repo_full_name: str,
+    base_sha: Optional[str],
+    head_sha: str,
+    commits: List[dict],
+) -> None:
+    """Indexes the commits of a push webhook; commits its own transaction."""
+    state = db.get(CommitSyncState, repo_full_name)
+    if state is None:
+        # Not indexed yet; the first sync lists the history anyway.
+        return
+    _insert_commits(db, repo_full_name, (
+        {
+            "sha": item.get("id"),
+            "message": item.get("message") or "",
+            "author": (item.get("author") or {}).get("name"),
+            "author_login": (item.get("author") or {}).get("username"),
+            "committed_at": _parse_time(item.get("timestamp")),
+        }
+        for item in commits
+        if isinstance(item, dict)
+    ))
+    if base_sha and state.head_sha == base_sha:
+        state.head_sha = head_sha
+        state.synced_at = datetime.utcnow()
+    _commit_or_rollback(db)
+
+
+def encode_cursor(commit: Commit) -> str:
+    raw = f"{commit.committed_at.isoformat()}|{commit.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        stamp, commit_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(stamp), int(commit_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def query_page(
+    db: Session,
+    repo_full_names: Sequence[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    author: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Commit]:
+    """Returns up to ``limit`` indexed commits, newest first, after ``cursor``."""
+    query = db.query(Commit).filter(Commit.repo_full_name.in_(list(repo_full_names)))
+    if cursor:
+        stamp, commit_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Commit.committed_at < stamp,
+            and_(Commit.committed_at == stamp, Commit.id < commit_id),
+        ))
+    if author:
+        needle = author.lower()
+        query = query.filter(or_(func.lower(Commit.author) == needle, func.lower(Commit.author_login) == needle))
+    if since:
+        query = query.filter(Commit.committed_at >= since)
+    if until:
+        query = query.filter(Commit.committed_at <= until)
+    return query.order_by(Commit.committed_at.desc(), Commit.id.desc()).limit(limit).all()
+
+
+def store_stats(commit: Commit, stats: Dict[str, Any]) -> None:
+    commit.files_changed = stats.get("files_changed", 0)
+    commit.additions = stats.get("additions", 0)
+    commit.deletions = stats.get("deletions", 0)
+    commit.files = json.dumps(stats.get("files") or [])
+
+
+def to_item(commit: Commit) -> Dict[str, Any]:
+    """The commit in the shape of a ``CommitItem``."""
+    return {
+        "id": commit.sha,
+        "sha": commit.sha[:7],
+        "full_sha": commit.sha,
+        "message": commit.message,
+        "author": commit.author or commit.author_login or "Unknown",
+        "author_avatar": commit.author_avatar,
+        "timestamp": commit.committed_at.isoformat() + "Z",
+        "repo_full_name": commit.repo_full_name,
+        "repo_name": commit.repo_full_name.split("/")[-1],
+        "files_changed": commit.files_changed or 0,
+        "additions": commit.additions or 0,
+        "deletions": commit.deletions or 0,
+        "files": json.loads(commit.files) if commit.files else [],
+    }
@@ -0,0 +1,90 @@
+"""
+Process pool for CPU-bound preprocessing.
+
+Parsing and outlining large source files is pure Python and holds the GIL,
+so running it on request or worker threads stalls every other thread in the
+process. With ``CPU_POOL_WORKERS`` set, such steps run in a shared
+``ProcessPoolExecutor`` instead; with it unset (the default) they run
+inline. Task functions must be picklable, i.e. defined at module level.
+
+Workers are started with the ``spawn`` method so they never inherit locks
+or connections from the threads of the parent process.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, Optional, Sequence, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def _workers() -> int:
+    return max(0, settings.CPU_POOL_WORKERS)
+
+
+def get_executor() -> Optional[Executor]:
+    """Returns the shared pool, or None when offloading is disabled."""
+    global _executor
+    if _workers() == 0:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=_workers(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _reset_broken_pool(broken: Executor) -> None:
+    global _executor
+    logger.warning("CPU pool broke; recreating it on next use")
+    with _executor_lock:
+        # Another thread may already have replaced it.
+        if _executor is broken:
+            _executor = None
+    # Releases the pool's management thread and any remaining children.
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def run(fn: Callable[..., T], *args: Any) -> T:
+    """Runs ``fn(*args)`` in the pool, or inline when the pool is disabled."""
+    executor = get_executor()
+    if executor is None:
+        return fn(*args)
+    try:
+        return executor.submit(fn, *args).result()
+    except BrokenProcessPool:
+        _reset_broken_pool(executor)
+        return fn(*args)
+
+
+def map_tasks(fn: Callable[..., T], arg_tuples: Iterable[Sequence[Any]], chunksize: int = 1) -> List[T]:
+    """Runs ``fn(*args)`` for each tuple, preserving order."""
+    arg_tuples = list(arg_tuples)
+    executor = get_executor()
+    if executor is None or len(arg_tuples) < 2:
+        return [fn(*args) for args in arg_tuples]
+    try:
+        return list(executor.map(fn, *zip(*arg_tuples), chunksize=chunksize))
+    except BrokenProcessPool:
+        _reset_broken_pool(executor)
+        return [fn(*args) for args in arg_tuples]
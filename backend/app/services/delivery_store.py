@@ -0,0 +1,42 @@
+"""
+Dedupe store for GitHub webhook deliveries.
+
+GitHub retries deliveries on timeouts and allows manual redelivery, both
+reusing the original ``X-GitHub-Delivery`` ID. Each ID is claimed once by
+inserting it into ``webhook_deliveries``; the primary key makes the claim
+atomic across API processes. IDs older than ``WEBHOOK_DELIVERY_TTL_SECONDS``
+are evicted as new deliveries arrive.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.webhook_delivery import WebhookDelivery
+
+
+def claim_delivery(db: Session, delivery_id: str, event: Optional[str] = None) -> bool:
+    """Records ``delivery_id``; returns False if it was already seen."""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.WEBHOOK_DELIVERY_TTL_SECONDS)
+    db.query(WebhookDelivery).filter(WebhookDelivery.received_at < cutoff).delete(
+        synchronize_session=False
+    )
+    db.add(WebhookDelivery(delivery_id=delivery_id, event=event, received_at=now))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def release_delivery(db: Session, delivery_id: str) -> None:
+    """Forgets a claimed delivery so that a redelivery is processed again."""
+    db.rollback()
+    db.query(WebhookDelivery).filter(WebhookDelivery.delivery_id == delivery_id).delete(
+        synchronize_session=False
+    )
+    db.commit()
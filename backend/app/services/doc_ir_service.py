@@ -0,0 +1,176 @@
+"""
+Structured intermediate representation (IR) for generated documentation.
+
+With ``DOCS_GENERATION_MODE=ir`` the model is asked once for a JSON
+description of the subject (overview, components, changes, usage notes)
+and every documentation style is rendered from it locally. The IR is
+stored next to the rendered documents under the ``ir`` style, so styles
+requested later are rendered with no LLM call.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+IR_STYLE = "ir"
+STYLES = ("plainText", "research", "latex")
+
+_LATEX_ESCAPES = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+}
+
+
+def ir_enabled() -> bool:
+    return settings.DOCS_GENERATION_MODE == "ir"
+
+
+def ir_prompt(subject: str, context: str, complexity: Optional[int]) -> str:
+    complexity_hint = ""
+    if complexity is not None:
+        complexity = max(0, min(complexity, 100))
+        complexity_hint = f" Target complexity: {complexity}/100."
+
+    return f"""
+    You are an expert technical writer.{complexity_hint}
+    Describe the {subject} below as a single JSON object and nothing else, with keys:
+    "title" (string), "overview" (2-4 sentences),
+    "components" (list of {{"name": string, "description": string}}),
+    "changes" (list of strings; empty if not applicable),
+    "usage_notes" (list of strings).
+    Use plain text in every value (no Markdown or LaTeX).
+    Base your response strictly on the context below.
+
+    Context:
+    {context}
+    """
+
+
+def _text(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _text_list(value: Any) -> List[str]:
+    if not isinstance(value, list):
+        return []
+    return [item.strip() for item in value if isinstance(item, str) and item.strip()]
+
+
+def parse_ir(raw: str) -> Dict[str, Any]:
+    """Parses and normalizes the model's JSON reply."""
+    start, end = raw.find("{"), raw.rfind("}")
+    try:
+        data = json.loads(raw[start:end + 1]) if start != -1 and end > start else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not _text(data.get("overview")):
+        raise HTTPException(status_code=502, detail="AI returned an invalid documentation structure.")
+
+    components = []
+    for item in data.get("components") or []:
+        if isinstance(item, dict) and _text(item.get("name")):
+            components.append({"name": _text(item["name"]), "description": _text(item.get("description"))})
+
+    return {
+        "title": _text(data.get("title")),
+        "overview": _text(data["overview"]),
+        "components": components,
+        "changes": _text_list(data.get("changes")),
+        "usage_notes": _text_list(data.get("usage_notes")),
+    }
+
+
+def dumps(ir: Dict[str, Any]) -> str:
+    return json.dumps(ir, ensure_ascii=False)
+
+
+def loads(content: str) -> Dict[str, Any]:
+    return json.loads(content)
+
+
+def latex_escape(text: str) -> str:
+    return "".join(_LATEX_ESCAPES.get(char, char) for char in text)
+
+
+def _render_plain(ir: Dict[str, Any]) -> str:
+    parts = [ir["overview"]]
+    if ir["components"]:
+        parts.append("Key components:\n" + "\n".join(
+            f"- {item['name']}: {item['description']}" if item["description"] else f"- {item['name']}"
+            for item in ir["components"]
+        ))
+    if ir["changes"]:
+        parts.append("Changes:\n" + "\n".join(f"- {change}" for change in ir["changes"]))
+    if ir["usage_notes"]:
+        parts.append("Usage notes:\n" + "\n".join(f"- {note}" for note in ir["usage_notes"]))
+    return "\n\n".join(parts)
+
+
+def _render_research(ir: Dict[str, Any]) -> str:
+    parts = []
+    if ir["title"]:
+        parts.append(f"# {ir['title']}")
+    parts.append(f"## Abstract\n\n{ir['overview']}")
+    section = 1
+    if ir["components"]:
+        body = "\n\n".join(
+            f"### {section}.{index} {item['name']}\n\n{item['description']}".rstrip()
+            for index, item in enumerate(ir["components"], start=1)
+        )
+        parts.append(f"## {section}. System Components\n\n{body}")
+        section += 1
+    if ir["changes"]:
+        body = "\n".join(f"{index}. {change}" for index, change in enumerate(ir["changes"], start=1))
+        parts.append(f"## {section}. Modifications\n\n{body}")
+        section += 1
+    if ir["usage_notes"]:
+        body = "\n".join(f"- {note}" for note in ir["usage_notes"])
+        parts.append(f"## {section}. Operational Considerations\n\n{body}")
+    return "\n\n".join(parts)
+
+
+def _latex_list(items: List[str]) -> str:
+    lines = "\n".join(f"  \\item {latex_escape(item)}" for item in items)
+    return f"\\begin{{itemize}}\n{lines}\n\\end{{itemize}}"
+
+
+def _render_latex(ir: Dict[str, Any]) -> str:
+    parts = [f"\\section{{{latex_escape(ir['title'] or 'Overview')}}}", latex_escape(ir["overview"])]
+    if ir["components"]:
+        parts.append("\\subsection{Components}")
+        parts.append("\\begin{description}\n" + "\n".join(
+            f"  \\item[{latex_escape(item['name'])}] {latex_escape(item['description'])}".rstrip()
+            for item in ir["components"]
+        ) + "\n\\end{description}")
+    if ir["changes"]:
+        parts.append("\\subsection{Changes}")
+        parts.append(_latex_list(ir["changes"]))
+    if ir["usage_notes"]:
+        parts.append("\\subsection{Usage Notes}")
+        parts.append(_latex_list(ir["usage_notes"]))
+    return "\n\n".join(parts)
+
+
+_RENDERERS = {
+    "plainText": _render_plain,
+    "research": _render_research,
+    "latex": _render_latex,
+}
+
+
+def render(ir: Dict[str, Any], style: str) -> str:
+    """Renders ``ir`` in ``style`` deterministically."""
+    renderer = _RENDERERS.get(style)
+    if renderer is None:
+        raise HTTPException(status_code=400, detail="Unsupported style")
+    return renderer(ir)
@@ -3,6 +3,16 @@ import requests
 from fastapi import HTTPException
 from fastapi.responses import RedirectResponse
 from app.core.config import settings
+from app.services.scheduler import github_limiter
+
+
+class GitHubError(HTTPException):
+    """A GitHub API error; ``upstream_status`` is the status GitHub answered with."""
+
+    def __init__(self, detail: str, upstream_status: int):
+        super().__init__(status_code=400, detail=detail)
+        self.upstream_status = upstream_status
+
 
 class GitHubService:
     REQUEST_TIMEOUT = (5, 20)
@@ -10,7 +20,8 @@ class GitHubService:
     @staticmethod
     def _request(method: str, url: str, **kwargs) -> requests.Response:
         try:
-            return requests.request(method, url, timeout=GitHubService.REQUEST_TIMEOUT, **kwargs)
+            with github_limiter.slot():
+                return requests.request(method, url, timeout=GitHubService.REQUEST_TIMEOUT, **kwargs)
         except requests.Timeout:
             raise HTTPException(status_code=504, detail="GitHub API request timed out")
         except requests.RequestException as exc:
@@ -31,10 +42,7 @@ class GitHubService:
             detail = response.json().get("message", response.text)
         except Exception:
             detail = response.text
-        raise HTTPException(
-            status_code=400,
-            detail=f"{context}: HTTP {response.status_code} - {detail}"
-        )
+        raise GitHubError(f"{context}: HTTP {response.status_code} - {detail}", response.status_code)
 
     @staticmethod
     def get_login_redirect():
@@ -193,6 +201,28 @@ class GitHubService:
                         return 0
         return 0
 
+    @staticmethod
+    def _is_rate_limited(response: requests.Response) -> bool:
+        # Primary limits empty the remaining quota; secondary limits send Retry-After.
+        return response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers
+
+    @staticmethod
+    def can_read_repo(access_token: str, repo_full_name: str) -> bool:
+        """
+        Whether the token can read the repository (GitHub answers 403 or 404
+        otherwise). A rate-limited 403 says nothing about access and is
+        raised as an error.
+        """
+        url = f"https://api.github.com/repos/{repo_full_name}"
+        headers = GitHubService._headers(access_token)
+        response = GitHubService._request("get", url, headers=headers)
+        if response.status_code == 404:
+            return False
+        if response.status_code == 403 and not GitHubService._is_rate_limited(response):
+            return False
+        GitHubService._raise_for_status(response, "Failed to check repository access")
+        return True
+
     @staticmethod
     def get_commit_detail(access_token: str, repo_full_name: str, sha: str, include_patch: bool = True):
         """Get detailed information for a specific commit."""
@@ -209,11 +239,50 @@ class GitHubService:
         return data
 
     @staticmethod
-    def get_repo_commits(access_token: str, repo_full_name: str, per_page: int = 20, include_stats: bool = True):
-        """Fetch commits from a repository with optional stats."""
+    def compare_commits(access_token: str, repo_full_name: str, base: str, head: str):
+        """Compares two commits, returning the aggregate file list with patches."""
+        url = f"https://api.github.com/repos/{repo_full_name}/compare/{base}...{head}"
+        headers = GitHubService._headers(access_token)
+        response = GitHubService._request("get", url, headers=headers)
+        GitHubService._raise_for_status(response, "Failed to compare commits")
+        return response.json()
+
+    @staticmethod
+    def get_head_sha(access_token: str, repo_full_name: str, ref: str = "HEAD", etag: str = None):
+        """
+        Resolves ``ref`` to a commit SHA with a conditional request.
+
+        Returns ``(sha, etag)``; ``sha`` is None when GitHub answers 304 Not
+        Modified for ``etag``, which does not count against the rate limit.
+        """
+        url = f"https://api.github.com/repos/{repo_full_name}/commits/{ref}"
+        headers = GitHubService._headers(access_token)
+        headers["Accept"] = "application/vnd.github.sha"
+        if etag:
+            headers["If-None-Match"] = etag
+        response = GitHubService._request("get", url, headers=headers)
+        if response.status_code == 304:
+            return None, etag
+        GitHubService._raise_for_status(response, "Failed to resolve branch head")
+        return response.text.strip(), response.headers.get("ETag")
+
+    @staticmethod
+    def get_repo_commits(
+        access_token: str,
+        repo_full_name: str,
+        per_page: int = 20,
+        include_stats: bool = True,
+        sha: str = None,
+        page: int = 1,
+    ):
+        """Fetch commits from a repository with optional stats, starting at ``sha``."""
         url = f"https://api.github.com/repos/{repo_full_name}/commits"
         headers = GitHubService._headers(access_token)
         params = {"per_page": per_page}
+        if sha:
+            params["sha"] = sha
+        if page > 1:
+            params["page"] = page
         response = GitHubService._request("get", url, headers=headers, params=params)
         GitHubService._raise_for_status(response, "Failed to fetch commits")
 
@@ -232,6 +301,7 @@ class GitHubService:
                 "full_sha": sha,
                 "message": commit_info.get("message") or "",
                 "author": author_name,
+                "author_login": user_info.get("login"),
                 "author_avatar": user_info.get("avatar_url"),
                 "timestamp": author_info.get("date"),
                 "repo_full_name": repo_full_name,
@@ -239,26 +309,31 @@ class GitHubService:
             }
 
             if include_stats and sha:
-                detail = GitHubService.get_commit_detail(
-                    access_token, repo_full_name, sha, include_patch=False
-                )
-                stats = detail.get("stats", {})
-                files = detail.get("files", []) or []
-                entry.update({
-                    "files_changed": len(files),
-                    "additions": stats.get("additions", 0),
-                    "deletions": stats.get("deletions", 0),
-                    "files": [
-                        {
-                            "filename": f.get("filename"),
-                            "additions": f.get("additions", 0),
-                            "deletions": f.get("deletions", 0),
-                        }
-                        for f in files
-                    ],
-                })
+                entry.update(GitHubService.get_commit_stats(access_token, repo_full_name, sha))
 
             results.append(entry)
 
         return results
 
+    @staticmethod
+    def get_commit_stats(access_token: str, repo_full_name: str, sha: str):
+        """File change statistics of a commit, in the shape of a commit list entry."""
+        detail = GitHubService.get_commit_detail(
+            access_token, repo_full_name, sha, include_patch=False
+        )
+        stats = detail.get("stats", {})
+        files = detail.get("files", []) or []
+        return {
+            "files_changed": len(files),
+            "additions": stats.get("additions", 0),
+            "deletions": stats.get("deletions", 0),
+            "files": [
+                {
+                    "filename": f.get("filename"),
+                    "additions": f.get("additions", 0),
+                    "deletions": f.get("deletions", 0),
+                }
+                for f in files
+            ],
+        }
+
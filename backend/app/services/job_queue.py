@@ -0,0 +1,220 @@
+"""
+Durable, database-backed job queue.
+
+Jobs are rows in the ``jobs`` table. Workers lease a job by atomically
+flipping it to ``running`` with a lease deadline (visibility timeout); a job
+whose worker dies becomes visible again once the lease expires. Failed jobs
+are retried with exponential backoff until ``max_attempts`` is reached, after
+which they are parked in the ``dead`` state for inspection.
+
+Jobs enqueued with a ``coalesce_key`` are merged into an existing queued job
+with the same kind and key, so a burst of events for one subject runs once.
+
+A worker records the outcome only while it still holds the lease, so a job
+taken over by another worker after a lost lease is left to that worker.
+Done jobs are deleted after ``JOB_DONE_RETENTION_SECONDS``.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"
+
+_LEASE_CANDIDATES = 10
+_MERGE_RETRIES = 5
+
+
+def _available(now: datetime):
+    return or_(
+        and_(Job.status == STATUS_QUEUED, Job.run_after <= now),
+        and_(Job.status == STATUS_RUNNING, Job.lease_expires_at < now),
+    )
+
+
+def job_payload(job: Job) -> Dict[str, Any]:
+    return json.loads(job.payload or "{}")
+
+
+def _merge_into_queued(
+    db: Session,
+    kind: str,
+    coalesce_key: str,
+    payload: Dict[str, Any],
+    merge: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+) -> Optional[Job]:
+    for _ in range(_MERGE_RETRIES):
+        existing = db.query(Job).filter(
+            Job.kind == kind,
+            Job.coalesce_key == coalesce_key,
+            Job.status == STATUS_QUEUED,
+        ).order_by(Job.id).first()
+        if existing is None:
+            return None
+        previous = existing.payload
+        merged = json.dumps(merge(json.loads(previous or "{}"), payload))
+        # Compare-and-set on the old payload so concurrent merges are not lost
+        # and a job leased in the meantime is left alone.
+        result = db.execute(
+            update(Job)
+            .where(Job.id == existing.id, Job.status == STATUS_QUEUED, Job.payload == previous)
+            .values(payload=merged, updated_at=datetime.utcnow())
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.get(Job, existing.id, populate_existing=True)
+    return None
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    delay_seconds: float = 0,
+    max_attempts: Optional[int] = None,
+    coalesce_key: Optional[str] = None,
+    merge: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = None,
+    priority: int = 0,
+) -> Job:
+    """
+    Persists a new job and commits it.
+
+    With ``coalesce_key`` and ``merge``, the payload is folded into a job of
+    the same kind and key that is still queued (``merge(existing, new)``)
+    instead of creating another job. The merged job keeps its original
+    ``run_after``, so ``delay_seconds`` acts as the coalescing window.
+
+    Available jobs are leased in ``priority`` order (lower first), then by
+    ``run_after``.
+    """
+    if coalesce_key and merge:
+        merged = _merge_into_queued(db, kind, coalesce_key, payload, merge)
+        if merged is not None:
+            return merged
+
+    job = Job(
+        kind=kind,
+        coalesce_key=coalesce_key,
+        priority=priority,
+        payload=json.dumps(payload),
+        status=STATUS_QUEUED,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def lease(
+    db: Session,
+    worker_id: str,
+    kinds: Optional[Iterable[str]] = None,
+    visibility_timeout: Optional[float] = None,
+) -> Optional[Job]:
+    """
+    Claims the next available job for ``worker_id``.
+
+    The claim is a conditional UPDATE on the row, so concurrent workers in
+    other threads, processes or hosts can never lease the same job twice.
+    """
+    timeout = visibility_timeout or settings.JOB_VISIBILITY_TIMEOUT_SECONDS
+    now = datetime.utcnow()
+    query = db.query(Job.id).filter(_available(now))
+    if kinds:
+        query = query.filter(Job.kind.in_(list(kinds)))
+    candidates = [row.id for row in query.order_by(Job.priority, Job.run_after, Job.id).limit(_LEASE_CANDIDATES)]
+    db.commit()
+
+    for job_id in candidates:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, _available(now))
+            .values(
+                status=STATUS_RUNNING,
+                locked_by=worker_id,
+                lease_expires_at=now + timedelta(seconds=timeout),
+                attempts=Job.attempts + 1,
+                updated_at=now,
+            )
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.get(Job, job_id, populate_existing=True)
+    return None
+
+
+def extend_lease(db: Session, job: Job, worker_id: str, visibility_timeout: Optional[float] = None) -> bool:
+    """Pushes the lease deadline out; returns False if the lease was lost."""
+    timeout = visibility_timeout or settings.JOB_VISIBILITY_TIMEOUT_SECONDS
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == STATUS_RUNNING, Job.locked_by == worker_id)
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=timeout))
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _finish_leased(db: Session, job: Job, worker_id: str, **values: Any) -> bool:
+    """
+    Updates a job ``worker_id`` still holds. Returns False, leaving the row
+    alone, when the lease was lost and another worker may own the job.
+    """
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == STATUS_RUNNING, Job.locked_by == worker_id)
+        .values(lease_expires_at=None, updated_at=datetime.utcnow(), **values)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _purge_done(db: Session) -> None:
+    # Finished jobs are only kept for a while; the poll chain alone adds one
+    # every POLL_TICK_SECONDS. Dead jobs are kept for inspection.
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_DONE_RETENTION_SECONDS)
+    db.query(Job).filter(Job.status == STATUS_DONE, Job.finished_at < cutoff).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def complete(db: Session, job: Job, worker_id: str) -> bool:
+    """Marks a leased job done; returns False if the lease was lost."""
+    done = _finish_leased(db, job, worker_id, status=STATUS_DONE, finished_at=datetime.utcnow())
+    _purge_done(db)
+    return done
+
+
+def defer(db: Session, job: Job, worker_id: str, delay_seconds: float) -> bool:
+    """Puts a leased job back in the queue without using up an attempt."""
+    return _finish_leased(
+        db, job, worker_id,
+        status=STATUS_QUEUED,
+        attempts=max(0, job.attempts - 1),
+        locked_by=None,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds),
+    )
+
+
+def fail(db: Session, job: Job, worker_id: str, error: str) -> bool:
+    """
+    Schedules a retry with exponential backoff, or dead-letters the job.
+    Returns False if the lease was lost.
+    """
+    if job.attempts >= job.max_attempts:
+        values = {"status": STATUS_DEAD, "finished_at": datetime.utcnow()}
+    else:
+        delay = settings.JOB_RETRY_BASE_SECONDS * (2 ** max(0, job.attempts - 1))
+        values = {"status": STATUS_QUEUED, "run_after": datetime.utcnow() + timedelta(seconds=delay)}
+    return _finish_leased(db, job, worker_id, last_error=error, **values)
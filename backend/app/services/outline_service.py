@@ -0,0 +1,359 @@
+import ast
+import os
+import re
+from typing import List, Optional, Tuple
+
+_PYTHON_EXTENSIONS = {".py", ".pyi"}
+_C_LIKE_LANGUAGES = {
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".go": "go",
+    ".java": "java",
+    ".c": "cpp",
+    ".h": "cpp",
+    ".cc": "cpp",
+    ".cpp": "cpp",
+    ".cxx": "cpp",
+    ".hpp": "cpp",
+    ".hh": "cpp",
+}
+
+_MAX_DOC_CHARS = 120
+_MAX_VALUE_CHARS = 60
+_MAX_HEAD_CHARS = 200
+
+_IMPORT_RE = re.compile(
+    r"^(import\b|from\s+\S+\s+import\b|package\b|using\b|#\s*include\b|#\s*import\b|export\s+\*\s+from\b)"
+)
+_REQUIRE_RE = re.compile(r"^(const|let|var)\s+[\w{}\s,]+=\s*require\(")
+_TYPE_RE = re.compile(r"\b(class|interface|struct|enum|namespace|trait|record)\b")
+_GO_TYPE_RE = re.compile(r"^type\s+\w+")
+_CONTROL_RE = re.compile(
+    r"^(if|else|for|while|switch|catch|try|do|return|case|default|finally|synchronized|defer|go|select)\b"
+)
+_FUNCTION_RE = re.compile(r"^[\w$@\s\*&:<>,\[\]\.\"'=?|~]*?[\w$>\]]\s*\(")
+_ARROW_RE = re.compile(r"^(export\s+)?(default\s+)?(const|let|var)\s+[\w$]+\s*=\s*(async\s+)?(\([^)]*\)|[\w$]+)\s*(:\s*[^=]+)?=>")
+_CONSTANT_RE = re.compile(
+    r"^(export\s+)?(const|let|var|static|final|public|private|protected|#\s*define)\b[^=]*(=|\s\w+\s)"
+)
+_GO_CONSTANT_RE = re.compile(r"^(const|var)\b")
+_BRACE_LIST_RE = re.compile(r"^(import\b[^(]*|export(\s+type)?)$")
+
+
+class OutlineError(ValueError):
+    """Raised when a source file cannot be tokenized into an outline."""
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + "\n...[truncated]"
+
+
+def _squash(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    return text[: max_chars - 3] + "..."
+
+
+def _first_sentence(doc: Optional[str]) -> Optional[str]:
+    if not doc:
+        return None
+    paragraph = doc.strip().split("\n\n")[0]
+    return _squash(paragraph, _MAX_DOC_CHARS) or None
+
+
+def _language_for(path: str) -> Optional[str]:
+    _, ext = os.path.splitext(path.lower())
+    if ext in _PYTHON_EXTENSIONS:
+        return "python"
+    return _C_LIKE_LANGUAGES.get(ext)
+
+
+# ---------------------------------------------------------------------------
+# Python (ast)
+# ---------------------------------------------------------------------------
+
+
+def _python_signature(node: ast.AST) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns is not None else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}:"
+
+
+def _python_decorators(node: ast.AST, indent: str) -> List[str]:
+    return [
+        f"{indent}@{_squash(ast.unparse(decorator), _MAX_VALUE_CHARS)}"
+        for decorator in getattr(node, "decorator_list", [])
+    ]
+
+
+def _python_doc(node: ast.AST, indent: str) -> List[str]:
+    doc = _first_sentence(ast.get_docstring(node, clean=True))
+    return [f'{indent}    """{doc}"""'] if doc else []
+
+
+def _python_is_constant(node: ast.AST) -> bool:
+    if isinstance(node, ast.Assign):
+        targets = node.targets
+    elif isinstance(node, ast.AnnAssign):
+        targets = [node.target]
+    else:
+        return False
+    return all(isinstance(target, ast.Name) and target.id.isupper() for target in targets)
+
+
+def _python_outline(content: str) -> List[str]:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError) as exc:
+        raise OutlineError(str(exc)) from exc
+
+    lines: List[str] = []
+    module_doc = _first_sentence(ast.get_docstring(tree, clean=True))
+    if module_doc:
+        lines.append(f'"""{module_doc}"""')
+
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(_squash(ast.unparse(node), _MAX_HEAD_CHARS))
+        elif _python_is_constant(node):
+            lines.append(_squash(ast.unparse(node), _MAX_VALUE_CHARS))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            lines.extend(_python_decorators(node, ""))
+            lines.append(_python_signature(node))
+            lines.extend(_python_doc(node, ""))
+        elif isinstance(node, ast.ClassDef):
+            bases = [ast.unparse(base) for base in node.bases]
+            bases.extend(ast.unparse(keyword) for keyword in node.keywords)
+            header = f"class {node.name}({', '.join(bases)}):" if bases else f"class {node.name}:"
+            lines.extend(_python_decorators(node, ""))
+            lines.append(header)
+            lines.extend(_python_doc(node, ""))
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    lines.extend(_python_decorators(child, "    "))
+                    lines.append("    " + _python_signature(child))
+                    lines.extend(_python_doc(child, "    "))
+                elif isinstance(child, (ast.Assign, ast.AnnAssign)):
+                    lines.append("    " + _squash(ast.unparse(child), _MAX_VALUE_CHARS))
+
+    return lines
+
+
+# ---------------------------------------------------------------------------
+# C-like languages (JS/TS/Go/Java/C++) via a lightweight tokenizer
+# ---------------------------------------------------------------------------
+
+
+def _scan_c_like(content: str) -> List[Tuple[int, str, str, Optional[str], Optional[str]]]:
+    """
+    Splits C-like source into statement heads, ignoring comments and strings.
+
+    Returns ``(depth, kind, head, parent_head, doc)`` tuples where ``kind`` is
+    ``"block"`` for heads followed by ``{`` and ``"stmt"`` otherwise.
+    """
+    entries: List[Tuple[int, str, str, Optional[str], Optional[str]]] = []
+    stack: List[str] = []
+    groups: List[str] = []
+    current: List[str] = []
+    paren_depth = 0
+    pending_doc: Optional[str] = None
+    at_line_start = True
+    i = 0
+    length = len(content)
+
+    def parent() -> Optional[str]:
+        return stack[-1] if stack else None
+
+    def flush_group() -> None:
+        text = "".join(current).strip()
+        current.clear()
+        if text:
+            groups.append(text)
+
+    def emit_statements() -> None:
+        nonlocal pending_doc
+        flush_group()
+        for text in groups:
+            entries.append((len(stack), "stmt", text, parent(), pending_doc))
+            pending_doc = None
+        groups.clear()
+
+    while i < length:
+        char = content[i]
+        nxt = content[i + 1] if i + 1 < length else ""
+
+        if char == "/" and nxt == "/":
+            end = content.find("\n", i)
+            end = length if end == -1 else end
+            comment = content[i + 2:end].strip().lstrip("/").strip()
+            if comment:
+                pending_doc = comment if pending_doc is None else f"{pending_doc} {comment}"
+            i = end
+            continue
+        if char == "/" and nxt == "*":
+            end = content.find("*/", i + 2)
+            if end == -1:
+                raise OutlineError("Unterminated block comment")
+            body = content[i + 2:end]
+            cleaned = " ".join(line.strip().lstrip("*").strip() for line in body.splitlines())
+            pending_doc = cleaned.strip() or pending_doc
+            i = end + 2
+            continue
+        if char in "\"'`":
+            end = i + 1
+            while end < length and content[end] != char:
+                if content[end] == "\\":
+                    end += 1
+                elif content[end] == "\n" and char != "`":
+                    break
+                end += 1
+            if end >= length and char == "`":
+                raise OutlineError("Unterminated template literal")
+            if end >= length or content[end] != char:
+                # Stray quote (e.g. an apostrophe in JSX text): keep scanning.
+                current.append(char)
+                i += 1
+                continue
+            literal = content[i:end + 1]
+            current.append(literal if len(literal) <= _MAX_VALUE_CHARS else literal[0] + "..." + literal[-1])
+            i = end + 1
+            continue
+        if char == "#" and at_line_start:
+            end = content.find("\n", i)
+            end = length if end == -1 else end
+            emit_statements()
+            entries.append((len(stack), "stmt", content[i:end].strip(), parent(), None))
+            i = end
+            continue
+
+        if char == "\n":
+            at_line_start = True
+            if paren_depth == 0:
+                flush_group()
+            else:
+                current.append(" ")
+            i += 1
+            continue
+        if not char.isspace():
+            at_line_start = False
+
+        if char in "([":
+            paren_depth += 1
+            current.append(char)
+        elif char in ")]":
+            paren_depth = max(0, paren_depth - 1)
+            current.append(char)
+        elif char == "{" and (paren_depth or _BRACE_LIST_RE.match("".join(current).strip())):
+            # Braces nested in parentheses or import/export lists are not blocks.
+            paren_depth += 1
+            current.append(char)
+        elif char == "}" and paren_depth:
+            paren_depth -= 1
+            current.append(char)
+        elif char == "{":
+            flush_group()
+            head = groups.pop() if groups else ""
+            for text in groups:
+                entries.append((len(stack), "stmt", text, parent(), None))
+            groups.clear()
+            entries.append((len(stack), "block", head, parent(), pending_doc))
+            pending_doc = None
+            stack.append(head)
+        elif char == "}":
+            emit_statements()
+            if not stack:
+                raise OutlineError("Unbalanced closing brace")
+            stack.pop()
+            pending_doc = None
+        elif char == ";" and paren_depth == 0:
+            emit_statements()
+        else:
+            current.append(char)
+        i += 1
+
+    emit_statements()
+    if stack or paren_depth:
+        raise OutlineError("Unbalanced braces or parentheses")
+    return entries
+
+
+def _is_type_head(head: Optional[str]) -> bool:
+    if not head:
+        return False
+    return bool(_TYPE_RE.search(head) or _GO_TYPE_RE.match(head))
+
+
+def _c_like_outline(content: str, language: str) -> List[str]:
+    lines: List[str] = []
+    for depth, kind, head, parent_head, doc in _scan_c_like(content):
+        head = _squash(head, _MAX_HEAD_CHARS)
+        if not head or _CONTROL_RE.match(head):
+            continue
+
+        if depth == 0:
+            indent = ""
+        elif depth == 1 and _is_type_head(parent_head):
+            indent = "    "
+        else:
+            continue
+
+        if depth == 0 and (_IMPORT_RE.match(head) or _REQUIRE_RE.match(head)):
+            lines.append(head)
+            continue
+
+        is_type = _is_type_head(head) and not head.endswith(")")
+        is_function = bool(_FUNCTION_RE.match(head) or _ARROW_RE.match(head))
+        is_constant = kind == "stmt" and bool(
+            _CONSTANT_RE.match(head) or (language == "go" and _GO_CONSTANT_RE.match(head))
+        )
+
+        if kind == "block" and depth == 0 and head.endswith("=") and _CONSTANT_RE.match(head):
+            lines.append(f"{indent}{_squash(head, _MAX_VALUE_CHARS)} {{ ... }};")
+        elif kind == "block" and (is_type or is_function):
+            signature = head.split("=>")[0].rstrip() + " =>" if "=>" in head else head
+            if doc:
+                lines.append(f"{indent}// {_first_sentence(doc)}")
+            lines.append(f"{indent}{signature} {{ ... }}")
+        elif kind == "stmt" and depth == 1 and (is_function or is_constant):
+            lines.append(f"{indent}{_squash(head, _MAX_HEAD_CHARS)};")
+        elif kind == "stmt" and (is_constant or (language == "go" and _GO_TYPE_RE.match(head))):
+            lines.append(f"{indent}{_squash(head, _MAX_VALUE_CHARS)};")
+    return lines
+
+
+def extract_outline(path: str, content: str, max_chars: int) -> str:
+    """
+    Produces a compact structural skeleton of a source file for summarization.
+
+    Files that already fit in ``max_chars`` are returned unchanged. Larger
+    files are reduced to imports, top-level constants, and class/function
+    signatures with the first line of their docstrings. Unsupported languages
+    and files that fail to parse fall back to plain truncation.
+    """
+    if len(content) <= max_chars:
+        return content
+
+    language = _language_for(path)
+    if language is None:
+        return _truncate(content, max_chars)
+
+    try:
+        if language == "python":
+            lines = _python_outline(content)
+        else:
+            lines = _c_like_outline(content, language)
+    except (OutlineError, RecursionError):
+        return _truncate(content, max_chars)
+
+    if not lines:
+        return _truncate(content, max_chars)
+
+    header = f"[Outline of {path}: bodies omitted, {len(content)} chars in original]"
+    return _truncate("\n".join([header, *lines]), max_chars)
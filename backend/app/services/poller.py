@@ -0,0 +1,189 @@
+"""
+Commit detection by polling, for repositories without a webhook.
+
+Monitored (``is_active``) and docs-enabled (``docs_active``) repositories
+are checked by resolving their default branch head with an ETag conditional
+request, so a poll of an unchanged repository is answered with 304 and costs
+no rate limit. Each repository has its own interval: it halves when the head
+moved and grows while it stays put, within ``POLL_MIN_INTERVAL_SECONDS`` and
+``POLL_MAX_INTERVAL_SECONDS``, and every poll is jittered so polls spread out
+over time. A moved head on a docs-enabled repository is queued as a ``push``
+job, the same pipeline GitHub webhooks use.
+
+The poll loop itself is a ``poll`` job that re-enqueues itself. It is queued
+with a coalesce key, so however many workers are running there is one poll
+chain, and each repository is claimed with a conditional UPDATE before it is
+polled.
+"""
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.repo_poll_state import RepoPollState
+from app.models.repository import Repository
+from app.models.user import User
+from app.services import job_queue
+from app.services.github_service import GitHubError, GitHubService
+from app.services.push_service import merge_push_payloads, push_coalesce_key
+from app.services.scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+POLL_JOB_KIND = "poll"
+_JITTER = 0.2
+_CHANGE_FACTOR = 0.5
+_IDLE_FACTOR = 1.5
+_ERROR_FACTOR = 2.0
+# Errors that will not clear up by retrying soon: the token or the
+# repository access is gone.
+_PERMANENT_ERRORS = {401, 403, 404}
+
+
+def _keep_older(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    return older
+
+
+def schedule_next_poll(db: Session, delay_seconds: Optional[float] = None) -> None:
+    """Queues the next poll cycle unless one is already queued."""
+    job_queue.enqueue(
+        db,
+        POLL_JOB_KIND,
+        {},
+        delay_seconds=settings.POLL_TICK_SECONDS if delay_seconds is None else delay_seconds,
+        coalesce_key=POLL_JOB_KIND,
+        merge=_keep_older,
+        priority=Priority.PREWARM,
+    )
+
+
+def _jittered(seconds: float) -> timedelta:
+    return timedelta(seconds=seconds * random.uniform(1 - _JITTER, 1 + _JITTER))
+
+
+def _clamp_interval(seconds: float) -> float:
+    return max(settings.POLL_MIN_INTERVAL_SECONDS, min(seconds, settings.POLL_MAX_INTERVAL_SECONDS))
+
+
+def _watched():
+    return or_(Repository.is_active.is_(True), Repository.docs_active.is_(True))
+
+
+def _create_missing_states(db: Session, now: datetime) -> None:
+    missing = db.execute(
+        select(Repository.id)
+        .outerjoin(RepoPollState, RepoPollState.repo_id == Repository.id)
+        .where(_watched(), RepoPollState.repo_id.is_(None))
+    ).scalars().all()
+    for repo_id in missing:
+        # Spread first polls over one minimum interval instead of a burst.
+        db.add(RepoPollState(
+            repo_id=repo_id,
+            interval_seconds=settings.POLL_MIN_INTERVAL_SECONDS,
+            next_poll_at=now + timedelta(seconds=random.uniform(0, settings.POLL_MIN_INTERVAL_SECONDS)),
+        ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+def record_head(db: Session, repo_full_name: str, head_sha: str) -> None:
+    """Notes a head learned from a webhook so the poller does not report it again."""
+    db.execute(
+        update(RepoPollState)
+        .where(RepoPollState.repo_id.in_(
+            select(Repository.id).where(Repository.full_name == repo_full_name)
+        ))
+        .values(head_sha=head_sha)
+    )
+
+
+def _claim(db: Session, state: RepoPollState, now: datetime) -> bool:
+    # Push the deadline out before the network call so that a concurrent
+    # poller skips this repository.
+    result = db.execute(
+        update(RepoPollState)
+        .where(RepoPollState.repo_id == state.repo_id, RepoPollState.next_poll_at == state.next_poll_at)
+        .values(next_poll_at=now + timedelta(seconds=settings.POLL_MAX_INTERVAL_SECONDS))
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _poll_repo(db: Session, state: RepoPollState, repo: Repository, now: datetime) -> None:
+    repo_full_name = repo.full_name
+    user = db.get(User, repo.owner_id)
+    if not repo_full_name or not user or not user.access_token:
+        state.interval_seconds = settings.POLL_MAX_INTERVAL_SECONDS
+        return
+
+    try:
+        head_sha, etag = GitHubService.get_head_sha(user.access_token, repo_full_name, etag=state.etag)
+    except HTTPException as exc:
+        logger.warning("Polling %s failed: %s", repo_full_name, exc.detail)
+        state.last_error = str(exc.detail)
+        if isinstance(exc, GitHubError) and exc.upstream_status in _PERMANENT_ERRORS:
+            state.interval_seconds = settings.POLL_MAX_INTERVAL_SECONDS
+        else:
+            state.interval_seconds = _clamp_interval(state.interval_seconds * _ERROR_FACTOR)
+        return
+
+    state.last_error = None
+    state.etag = etag
+    if head_sha is None or head_sha == state.head_sha:
+        state.interval_seconds = _clamp_interval(state.interval_seconds * _IDLE_FACTOR)
+        return
+
+    previous = state.head_sha
+    state.head_sha = head_sha
+    state.last_changed_at = now
+    state.interval_seconds = _clamp_interval(state.interval_seconds * _CHANGE_FACTOR)
+    if previous and repo.docs_active:
+        # No file list: the push job derives it from the compare API.
+        job_queue.enqueue(
+            db,
+            "push",
+            {
+                "repo_full_name": repo_full_name,
+                "head_sha": head_sha,
+                "base_sha": previous,
+                "changed_files": [],
+                "removed_files": [],
+                "files_unknown": True,
+            },
+            delay_seconds=settings.PUSH_COALESCE_WINDOW_SECONDS,
+            coalesce_key=push_coalesce_key(repo_full_name),
+            merge=merge_push_payloads,
+            priority=Priority.WEBHOOK,
+        )
+
+
+def poll_due_repos(db: Session, limit: Optional[int] = None) -> int:
+    """Polls watched repositories that are due; returns how many were polled."""
+    now = datetime.utcnow()
+    _create_missing_states(db, now)
+    due = db.query(RepoPollState, Repository).join(
+        Repository, Repository.id == RepoPollState.repo_id
+    ).filter(
+        _watched(),
+        RepoPollState.next_poll_at <= now,
+    ).order_by(RepoPollState.next_poll_at).limit(limit or settings.POLL_BATCH_SIZE).all()
+
+    polled = 0
+    for state, repo in due:
+        if not _claim(db, state, now):
+            continue
+        db.refresh(state)
+        _poll_repo(db, state, repo, now)
+        state.last_polled_at = now
+        state.next_poll_at = now + _jittered(state.interval_seconds)
+        db.commit()
+        polled += 1
+    return polled
@@ -0,0 +1,151 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.repository import Repository
+from app.models.user import User
+from app.services.github_service import GitHubService
+from app.services.repo_doc_service import update_repo_from_push
+
+
+def apply_file_changes(
+    changed: Iterable[str],
+    removed: Iterable[str],
+    later_changed: Iterable[str],
+    later_removed: Iterable[str],
+) -> Tuple[List[str], List[str]]:
+    """
+    Folds a later set of file changes onto an earlier one.
+
+    The later event wins: a path removed after being changed ends up removed,
+    and a path re-added after being removed ends up changed.
+    """
+    changed_set = set(changed)
+    removed_set = set(removed)
+    for path in later_removed:
+        changed_set.discard(path)
+        removed_set.add(path)
+    for path in later_changed:
+        removed_set.discard(path)
+        changed_set.add(path)
+    return sorted(changed_set), sorted(removed_set)
+
+
+def is_default_branch_push(data: Dict[str, Any]) -> bool:
+    """Whether a push webhook payload updates the repository's default branch."""
+    default_branch = (data.get("repository") or {}).get("default_branch")
+    return bool(default_branch) and data.get("ref") == f"refs/heads/{default_branch}"
+
+
+def push_coalesce_key(repo_full_name: str, data: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Coalesce key for push jobs, so only pushes to the same ref are merged.
+
+    Default-branch pushes (and polls, which follow the default branch) share
+    the repository's key; pushes to other refs are keyed by their ref.
+    """
+    if data is None or is_default_branch_push(data):
+        return repo_full_name
+    return f"{repo_full_name}@{data.get('ref') or ''}"
+
+
+def collect_push_files(commits: Iterable[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    """Returns the (changed, removed) paths of a push, applying commits in order."""
+    changed: Set[str] = set()
+    removed: Set[str] = set()
+    # Fold into sets and sort once at the end; a push can carry hundreds of commits.
+    for commit in commits:
+        for path in commit.get("removed") or []:
+            changed.discard(path)
+            removed.add(path)
+        for key in ("added", "modified"):
+            for path in commit.get(key) or []:
+                removed.discard(path)
+                changed.add(path)
+    return sorted(changed), sorted(removed)
+
+
+def files_from_comparison(comparison: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """Returns the (changed, removed) paths listed by a compare API response."""
+    changed: Set[str] = set()
+    removed: Set[str] = set()
+    for item in comparison.get("files") or []:
+        path = item.get("filename")
+        if not path:
+            continue
+        if item.get("status") == "removed":
+            removed.add(path)
+            continue
+        changed.add(path)
+        if item.get("previous_filename"):
+            removed.add(item["previous_filename"])
+    return sorted(changed), sorted(removed - changed)
+
+
+def merge_push_payloads(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """Coalesces two queued push jobs for the same repository into one."""
+    merged = {
+        "repo_full_name": newer.get("repo_full_name") or older.get("repo_full_name"),
+        "head_sha": newer.get("head_sha"),
+        "base_sha": older.get("base_sha"),
+    }
+    if older.get("files_unknown") or newer.get("files_unknown"):
+        # A polled range has no file list, so neither has the merged range:
+        # it is taken from the compare API over the whole of it.
+        merged.update(changed_files=[], removed_files=[], files_unknown=True)
+        return merged
+    merged["changed_files"], merged["removed_files"] = apply_file_changes(
+        older.get("changed_files") or [],
+        older.get("removed_files") or [],
+        newer.get("changed_files") or [],
+        newer.get("removed_files") or [],
+    )
+    return merged
+
+
+def process_push_event(
+    db: Session,
+    repo_full_name: str,
+    head_sha: str,
+    changed_files: Iterable[str],
+    removed_files: Iterable[str],
+    base_sha: Optional[str] = None,
+    files_unknown: bool = False,
+) -> None:
+    """
+    Applies a push to the stored documentation of a docs-enabled repository.
+
+    ``files_unknown`` marks a push whose file lists are not known (a polled
+    head); they are then taken from the compare API.
+    """
+    repo = db.query(Repository).filter(Repository.full_name == repo_full_name).first()
+    if not repo:
+        repo_name = repo_full_name.split("/")[-1]
+        repo = db.query(Repository).filter(Repository.name == repo_name).first()
+    if not repo or not repo.docs_active:
+        return
+
+    user = db.query(User).filter(User.id == repo.owner_id).first()
+    if not user or not user.access_token:
+        return
+
+    # Polled heads arrive without a file list; take it from the compare API.
+    # Jobs queued before files_unknown existed only have empty lists.
+    comparison = None
+    unknown = files_unknown or (not changed_files and not removed_files)
+    if unknown and base_sha and set(base_sha) != {"0"}:
+        comparison = GitHubService.compare_commits(
+            user.access_token, repo.full_name or repo_full_name, base_sha, head_sha
+        )
+        changed_files, removed_files = files_from_comparison(comparison)
+
+    update_repo_from_push(
+        db=db,
+        repo=repo,
+        access_token=user.access_token,
+        changed_files=changed_files,
+        removed_files=removed_files,
+        head_sha=head_sha,
+        base_sha=base_sha,
+        comparison=comparison,
+    )
@@ -1,18 +1,44 @@
+import logging
 import os
-from typing import Iterable, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from fastapi import HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.file_summary import FileSummary
+from app.models.repo_doc_run import RepoDocRun
 from app.models.repo_documentation import RepoDocumentation
 from app.models.repository import Repository
+from app.models.user import User
+from app.services import cpu_pool, doc_ir_service, job_queue
+from app.services.repo_lock import RepoBusy, RepoLockHandle, repo_lock
 from app.services.ai_service import generate_text
 from app.services.github_service import GitHubService
+from app.services.outline_service import extract_outline
+from app.services.scheduler import Priority
+
+logger = logging.getLogger(__name__)
 
 MAX_FILES = 60
 MAX_FILE_CHARS = 4000
 MAX_SUMMARY_CHARS = 12000
+CHECKPOINT_BATCH_SIZE = 5
+
+# Push updates: diffs up to SKIP_DIFF_LINES changed lines keep the existing
+# summary; diffs up to SMALL_DIFF_LINES update it from the patch alone.
+SKIP_DIFF_LINES = 2
+SMALL_DIFF_LINES = 40
+MAX_PATCH_CHARS = 3000
+
+_UNCHANGED_MARKER = "UNCHANGED"
+
+REPO_DOCS_JOB_KIND = "repo_docs"
+
+_RESUMABLE_STATUSES = ("queued", "running", "failed")
+_ACTIVE_STATUSES = ("queued", "running")
 
 _SKIP_DIRS = {
     ".git",
@@ -102,6 +128,13 @@ def _file_summary_prompt(path: str, content: str) -> str:
     """
 
 
+def _format_summaries(summaries: Sequence[Tuple[str, str]]) -> str:
+    formatted = "\n".join(
+        f"File: {path}\nSummary: {summary}\n" for path, summary in summaries
+    )
+    return _truncate(formatted, MAX_SUMMARY_CHARS)
+
+
 def _repo_doc_prompt(style: str, summaries: Sequence[Tuple[str, str]], complexity: Optional[int]) -> str:
     complexity_hint = ""
     if complexity is not None:
@@ -126,10 +159,7 @@ def _repo_doc_prompt(style: str, summaries: Sequence[Tuple[str, str]], complexit
     else:
         instruction = "Write technical documentation for the repository."
 
-    formatted = "\n".join(
-        f"File: {path}\nSummary: {summary}\n" for path, summary in summaries
-    )
-    formatted = _truncate(formatted, MAX_SUMMARY_CHARS)
+    formatted = _format_summaries(summaries)
 
     return f"""
     You are an expert technical writer.{complexity_hint}
@@ -141,11 +171,70 @@ def _repo_doc_prompt(style: str, summaries: Sequence[Tuple[str, str]], complexit
     """
 
 
+def _summary_update_prompt(path: str, summary: str, patch: str) -> str:
+    return f"""
+    You are an expert technical writer maintaining repo-level documentation.
+    Below is the existing summary of a file and a diff that was just applied to it.
+    Return the updated summary (3-6 sentences) reflecting the change.
+    If the existing summary is still accurate, reply with exactly {_UNCHANGED_MARKER}.
+
+    File path: {path}
+    Existing summary:
+    {summary}
+
+    Diff:
+    {_truncate(patch, MAX_PATCH_CHARS)}
+    """
+
+
+def _outline_all(files: Sequence[Tuple[str, str]]) -> List[str]:
+    """Returns the contents of ``files``, with oversized ones outlined."""
+    contents = [content for _, content in files]
+    large = [index for index, content in enumerate(contents) if len(content) > MAX_FILE_CHARS]
+    # Parsing large files is CPU-bound; one pool batch keeps it off request
+    # and worker threads and parses the files in parallel.
+    outlines = cpu_pool.map_tasks(
+        extract_outline, [(files[index][0], contents[index], MAX_FILE_CHARS) for index in large]
+    )
+    for index, outline in zip(large, outlines):
+        contents[index] = outline
+    return contents
+
+
 def _summarize_file(path: str, content: str) -> str:
     prompt = _file_summary_prompt(path, content)
     return generate_text(prompt)
 
 
+def _summarize_files(
+    access_token: str,
+    repo_full_name: str,
+    ref: str,
+    files: Sequence[Tuple[str, Optional[str]]],
+) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Yields (path, summary, blob sha) for each ``(path, blob sha)`` with text
+    content at ``ref``. The batch is fetched and outlined before the first
+    summary, and summaries are yielded as they are written. If a fetch
+    fails, the files fetched before it are still summarized (so a retry
+    resumes after them) before the error is raised.
+    """
+    fetched = []
+    failure: Optional[Exception] = None
+    try:
+        for path, blob_sha in files:
+            content, sha = GitHubService.get_file_content(access_token, repo_full_name, path, ref=ref)
+            if content:
+                fetched.append((path, content, sha or blob_sha))
+    except Exception as exc:
+        failure = exc
+    contents = _outline_all([(path, content) for path, content, _ in fetched])
+    for (path, _, sha), content in zip(fetched, contents):
+        yield path, _summarize_file(path, content), sha
+    if failure is not None:
+        raise failure
+
+
 def _upsert_repo_doc(
     db: Session,
     repo: Repository,
@@ -172,70 +261,482 @@ def _upsert_repo_doc(
     return doc
 
 
-def generate_repo_documentation(
+def _ir_is_current(db: Session, repo: Repository, ir_row: RepoDocumentation) -> bool:
+    latest_summary = db.query(func.max(FileSummary.updated_at)).filter(
+        FileSummary.repo_id == repo.id
+    ).scalar()
+    stamp = ir_row.updated_at or ir_row.created_at
+    return latest_summary is None or (stamp is not None and stamp >= latest_summary)
+
+
+def _write_repo_doc(
+    db: Session,
+    repo: Repository,
+    style: str,
+    complexity_value: int,
+    summaries: Sequence[Tuple[str, str]],
+    prompt_complexity: Optional[int],
+    reuse_ir: bool,
+) -> RepoDocumentation:
+    """
+    Generates the repo document in ``style`` and upserts it (uncommitted).
+
+    In IR mode the stored IR is rendered directly when it is newer than
+    every file summary and ``reuse_ir`` is set; otherwise a new IR is
+    generated and all stored styles of this complexity are re-rendered.
+    """
+    if not doc_ir_service.ir_enabled():
+        content = generate_text(_repo_doc_prompt(style, summaries, prompt_complexity))
+        return _upsert_repo_doc(db, repo, style, complexity_value, content)
+
+    ir_row = db.query(RepoDocumentation).filter_by(
+        repo_id=repo.id, style=doc_ir_service.IR_STYLE, complexity=complexity_value
+    ).first()
+    if reuse_ir and ir_row and _ir_is_current(db, repo, ir_row):
+        ir = doc_ir_service.loads(ir_row.content)
+        return _upsert_repo_doc(db, repo, style, complexity_value, doc_ir_service.render(ir, style))
+
+    prompt = doc_ir_service.ir_prompt("repository", _format_summaries(summaries), prompt_complexity)
+    ir = doc_ir_service.parse_ir(generate_text(prompt))
+    _upsert_repo_doc(db, repo, doc_ir_service.IR_STYLE, complexity_value, doc_ir_service.dumps(ir))
+    for other in db.query(RepoDocumentation).filter(
+        RepoDocumentation.repo_id == repo.id,
+        RepoDocumentation.complexity == complexity_value,
+        RepoDocumentation.style.in_(doc_ir_service.STYLES),
+    ):
+        other.content = doc_ir_service.render(ir, other.style)
+    return _upsert_repo_doc(db, repo, style, complexity_value, doc_ir_service.render(ir, style))
+
+
+def _start_run(
+    db: Session,
+    repo: Repository,
+    style: str,
+    complexity: int,
+    ref: str,
+    force: bool,
+) -> RepoDocRun:
+    run = db.query(RepoDocRun).filter(
+        RepoDocRun.repo_id == repo.id,
+        RepoDocRun.style == style,
+        RepoDocRun.complexity == complexity,
+        RepoDocRun.ref == ref,
+        RepoDocRun.status.in_(_RESUMABLE_STATUSES),
+    ).order_by(RepoDocRun.id.desc()).first()
+
+    if run:
+        run.status = "running"
+        run.stage = "listing"
+        run.error = None
+        run.force = run.force or force
+    else:
+        run = RepoDocRun(
+            repo_id=repo.id,
+            style=style,
+            complexity=complexity,
+            ref=ref,
+            force=force,
+            status="running",
+            stage="listing",
+        )
+        db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def _is_stale(run: RepoDocRun) -> bool:
+    if run.status != "running" or run.updated_at is None:
+        return False
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT_SECONDS)
+    return run.updated_at < cutoff
+
+
+def queue_repo_documentation(
     db: Session,
     repo: Repository,
-    access_token: str,
     style: str,
     complexity: Optional[int],
     force: bool = False,
     ref: str = "HEAD",
-):
-    repo_full_name = _repo_full_name(repo)
-    tree = GitHubService.get_repo_tree(access_token, repo_full_name, ref=ref)
+) -> RepoDocRun:
+    """
+    Records a documentation run and hands it to the background worker.
 
-    summaries: List[Tuple[str, str]] = []
-    processed = 0
+    A queued or running run for the same repo, style, complexity and ref is
+    returned as is instead of starting a second one; a failed run is queued
+    again so it resumes from its checkpoint.
+    """
+    complexity_value = complexity if complexity is not None else -1
+    run = db.query(RepoDocRun).filter(
+        RepoDocRun.repo_id == repo.id,
+        RepoDocRun.style == style,
+        RepoDocRun.complexity == complexity_value,
+        RepoDocRun.ref == ref,
+        RepoDocRun.status.in_(_RESUMABLE_STATUSES),
+    ).order_by(RepoDocRun.id.desc()).first()
+
+    if run and run.status in _ACTIVE_STATUSES and not _is_stale(run):
+        return run
+
+    if run:
+        run.status = "queued"
+        run.error = None
+        run.finished_at = None
+        run.force = run.force or force
+    else:
+        run = RepoDocRun(
+            repo_id=repo.id,
+            style=style,
+            complexity=complexity_value,
+            ref=ref,
+            force=force,
+            status="queued",
+            stage="queued",
+        )
+        db.add(run)
+    db.commit()
+    db.refresh(run)
+    job_queue.enqueue(db, REPO_DOCS_JOB_KIND, {"run_id": run.id}, priority=Priority.MANUAL)
+    return run
+
+
+def process_repo_doc_run(db: Session, run_id: int) -> None:
+    """Executes a queued documentation run; used by the background worker."""
+    run = db.get(RepoDocRun, run_id)
+    if run is None or run.status == "completed":
+        return
+    repo = db.get(Repository, run.repo_id)
+    user = db.get(User, repo.owner_id) if repo else None
+    if not user or not user.access_token:
+        _fail_run(db, run, HTTPException(status_code=401, detail="Missing GitHub access token"))
+        return
+
+    generate_repo_documentation(
+        db=db,
+        repo=repo,
+        access_token=user.access_token,
+        style=run.style,
+        complexity=run.complexity if run.complexity >= 0 else None,
+        force=run.force,
+        ref=run.ref,
+    )
+
+
+def _is_checkpointed(existing: Optional[FileSummary], blob_sha: Optional[str], run: RepoDocRun) -> bool:
+    if not existing or existing.blob_sha != blob_sha:
+        return False
+    if not run.force:
+        return True
+    # A forced run only trusts summaries it already rewrote before a restart.
+    return existing.updated_at is not None and existing.updated_at >= run.created_at
 
-    for item in tree:
-        if item.get("type") != "blob":
-            continue
-        path = item.get("path") or ""
-        if not path or _should_skip_path(path):
-            continue
-        if processed >= MAX_FILES:
-            break
-
-        blob_sha = item.get("sha")
-        existing = db.query(FileSummary).filter_by(repo_id=repo.id, path=path).first()
-        if existing and existing.blob_sha == blob_sha and not force:
-            summaries.append((path, existing.summary))
-            processed += 1
-            continue
-
-        content, sha = GitHubService.get_file_content(access_token, repo_full_name, path, ref=ref)
-        if not content:
-            continue
-        content = _truncate(content, MAX_FILE_CHARS)
-        summary = _summarize_file(path, content)
 
+def _write_summaries(
+    db: Session,
+    repo: Repository,
+    existing_by_path: Dict[str, FileSummary],
+    pending: List[Tuple[str, str, Optional[str]]],
+    last_commit_sha: Optional[str] = None,
+) -> None:
+    now = datetime.utcnow()
+    for path, summary, blob_sha in pending:
+        existing = existing_by_path.get(path)
         if existing:
             existing.summary = summary
-            existing.blob_sha = sha or blob_sha
+            existing.blob_sha = blob_sha
+            existing.updated_at = now
+            if last_commit_sha:
+                existing.last_commit_sha = last_commit_sha
         else:
             existing = FileSummary(
                 repo_id=repo.id,
                 path=path,
                 summary=summary,
-                blob_sha=sha or blob_sha,
+                blob_sha=blob_sha,
+                last_commit_sha=last_commit_sha,
             )
             db.add(existing)
+            existing_by_path[path] = existing
+    pending.clear()
 
-        summaries.append((path, summary))
-        processed += 1
 
-    if not summaries:
-        raise HTTPException(status_code=400, detail="No text files found to document.")
+def _checkpoint(
+    db: Session,
+    repo: Repository,
+    run: RepoDocRun,
+    existing_by_path: Dict[str, FileSummary],
+    pending: List[Tuple[str, str, Optional[str]]],
+    files_done: int,
+) -> None:
+    # Summaries are buffered in memory during LLM calls and written here in
+    # one short transaction, so the SQLite writer lock is never held across
+    # network requests.
+    _write_summaries(db, repo, existing_by_path, pending)
+    run.files_done = files_done
+    db.commit()
 
-    complexity_value = complexity if complexity is not None else -1
-    prompt = _repo_doc_prompt(style, summaries, complexity)
-    content = generate_text(prompt)
-    doc = _upsert_repo_doc(db, repo, style, complexity_value, content)
+
+def _fail_run(db: Session, run: RepoDocRun, exc: Exception) -> None:
+    run.status = "failed"
+    run.error = str(exc.detail if isinstance(exc, HTTPException) else exc)
+    run.finished_at = datetime.utcnow()
     db.commit()
+
+
+def _shared_result(
+    db: Session,
+    repo: Repository,
+    style: str,
+    complexity: int,
+    ref: str,
+    since: datetime,
+) -> Optional[RepoDocumentation]:
+    """Returns the document of an identical run that finished after ``since``."""
+    finished = db.query(RepoDocRun.id).filter(
+        RepoDocRun.repo_id == repo.id,
+        RepoDocRun.style == style,
+        RepoDocRun.complexity == complexity,
+        RepoDocRun.ref == ref,
+        RepoDocRun.status == "completed",
+        RepoDocRun.finished_at >= since,
+    ).first()
+    if finished is None:
+        return None
+    return db.query(RepoDocumentation).filter_by(
+        repo_id=repo.id, style=style, complexity=complexity
+    ).first()
+
+
+def generate_repo_documentation(
+    db: Session,
+    repo: Repository,
+    access_token: str,
+    style: str,
+    complexity: Optional[int],
+    force: bool = False,
+    ref: str = "HEAD",
+    lock_wait_seconds: float = 0,
+):
+    """
+    Summarizes the repository's files and writes the repo-level document.
+
+    Progress is tracked in a ``RepoDocRun`` and file summaries are committed
+    every ``CHECKPOINT_BATCH_SIZE`` files, so a retry after a failure resumes
+    from the last checkpoint instead of re-summarizing every file.
+
+    Runs hold the repository's lock. If another run holds it, this waits up
+    to ``lock_wait_seconds`` (raising ``RepoBusy`` after that), and a caller
+    that waited for an identical run shares its result instead of redoing it.
+    """
+    requested_at = datetime.utcnow()
+    complexity_value = complexity if complexity is not None else -1
+    with repo_lock(db, repo.id, wait_seconds=lock_wait_seconds) as lock:
+        if lock.waited and not force:
+            shared = _shared_result(db, repo, style, complexity_value, ref, requested_at)
+            if shared is not None:
+                return shared
+        return _generate_locked(db, repo, access_token, style, complexity, force, ref, lock)
+
+
+def _generate_locked(
+    db: Session,
+    repo: Repository,
+    access_token: str,
+    style: str,
+    complexity: Optional[int],
+    force: bool,
+    ref: str,
+    lock: RepoLockHandle,
+):
+    repo_full_name = _repo_full_name(repo)
+    complexity_value = complexity if complexity is not None else -1
+    run = _start_run(db, repo, style, complexity_value, ref, force)
+
+    pending: List[Tuple[str, str, Optional[str]]] = []
+    summaries: List[Tuple[str, str]] = []
+    existing_by_path: Dict[str, FileSummary] = {}
+    processed = 0
+
+    try:
+        tree = GitHubService.get_repo_tree(access_token, repo_full_name, ref=ref)
+        candidates = [
+            item for item in tree
+            if item.get("type") == "blob"
+            and item.get("path")
+            and not _should_skip_path(item["path"])
+        ]
+        existing_by_path = {
+            item.path: item
+            for item in db.query(FileSummary).filter_by(repo_id=repo.id).all()
+        }
+        run.stage = "summarizing"
+        run.files_total = min(len(candidates), MAX_FILES)
+        run.files_done = 0
+        db.commit()
+
+        def summarize(batch: List[Tuple[str, Optional[str]]]) -> None:
+            nonlocal processed
+            for path, summary, sha in _summarize_files(access_token, repo_full_name, ref, batch):
+                pending.append((path, summary, sha))
+                summaries.append((path, summary))
+                processed += 1
+
+        # Files are summarized a checkpoint batch at a time, so the large
+        # files of a batch are outlined together.
+        batch: List[Tuple[str, Optional[str]]] = []
+        for item in candidates:
+            if processed + len(batch) >= MAX_FILES:
+                break
+            path = item["path"]
+            blob_sha = item.get("sha")
+            existing = existing_by_path.get(path)
+            if _is_checkpointed(existing, blob_sha, run):
+                summaries.append((path, existing.summary))
+                processed += 1
+                continue
+
+            batch.append((path, blob_sha))
+            if len(batch) >= CHECKPOINT_BATCH_SIZE:
+                summarize(batch)
+                batch = []
+                _checkpoint(db, repo, run, existing_by_path, pending, processed)
+                lock.ensure_held()
+
+        summarize(batch)
+        _checkpoint(db, repo, run, existing_by_path, pending, processed)
+        # Checkpointed and new summaries were collected out of order.
+        summaries.sort(key=lambda entry: entry[0])
+
+        if not summaries:
+            raise HTTPException(status_code=400, detail="No text files found to document.")
+
+        run.stage = "writing"
+        db.commit()
+        lock.ensure_held()
+        doc = _write_repo_doc(db, repo, style, complexity_value, summaries, complexity, reuse_ir=not force)
+        run.status = "completed"
+        run.stage = "done"
+        run.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        try:
+            if not isinstance(exc, RepoBusy):
+                # After losing the lock the summaries belong to the new holder.
+                _checkpoint(db, repo, run, existing_by_path, pending, processed)
+            _fail_run(db, run, exc)
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to record checkpoint for repo doc run %s", run.id)
+        raise
+
     db.refresh(doc)
     return doc
 
 
+def _is_null_sha(sha: Optional[str]) -> bool:
+    return not sha or set(sha) == {"0"}
+
+
+def _classify_change(file_info: Optional[dict], existing: Optional[FileSummary]) -> str:
+    """Returns ``"skip"``, ``"patch"`` or ``"full"`` for a changed file."""
+    if existing is None or file_info is None:
+        return "full"
+    changes = file_info.get("changes")
+    if changes is None:
+        changes = (file_info.get("additions") or 0) + (file_info.get("deletions") or 0)
+    if changes <= SKIP_DIFF_LINES:
+        return "skip"
+    if changes <= SMALL_DIFF_LINES and file_info.get("patch"):
+        return "patch"
+    return "full"
+
+
+def _fetch_push_diff(
+    access_token: str,
+    repo_full_name: str,
+    base_sha: Optional[str],
+    head_sha: str,
+    comparison: Optional[dict] = None,
+) -> Dict[str, dict]:
+    if comparison is None:
+        if _is_null_sha(base_sha):
+            return {}
+        try:
+            comparison = GitHubService.compare_commits(access_token, repo_full_name, base_sha, head_sha)
+        except HTTPException as exc:
+            logger.warning("Compare %s...%s failed for %s: %s", base_sha, head_sha, repo_full_name, exc.detail)
+            return {}
+    return {
+        item["filename"]: item
+        for item in comparison.get("files") or []
+        if item.get("filename")
+    }
+
+
+def _detect_renames(
+    access_token: str,
+    repo_full_name: str,
+    head_sha: str,
+    changed: Sequence[str],
+    removed: Sequence[str],
+    existing_by_path: Dict[str, FileSummary],
+    diff_by_path: Dict[str, dict],
+) -> Dict[str, str]:
+    """
+    Maps newly added paths to the removed paths they were moved from.
+
+    Uses the compare API's ``renamed`` status when available and otherwise
+    matches blob SHAs of added files against the stored summaries of removed
+    ones, resolving added blob SHAs from the head tree only when needed.
+    """
+    removed_set = {path for path in removed if path in existing_by_path}
+    added = [path for path in changed if path not in existing_by_path]
+    if not removed_set or not added:
+        return {}
+
+    renames: Dict[str, str] = {}
+    for path in added:
+        file_info = diff_by_path.get(path) or {}
+        previous = file_info.get("previous_filename")
+        if file_info.get("status") == "renamed" and previous in removed_set:
+            renames[path] = previous
+            removed_set.discard(previous)
+
+    unmatched = [path for path in added if path not in renames]
+    removed_by_blob = {
+        existing_by_path[path].blob_sha: path
+        for path in removed_set
+        if existing_by_path[path].blob_sha
+    }
+    if not unmatched or not removed_by_blob:
+        return renames
+
+    blob_by_path = {
+        path: diff_by_path[path]["sha"]
+        for path in unmatched
+        if diff_by_path.get(path, {}).get("sha")
+    }
+    if len(blob_by_path) < len(unmatched):
+        try:
+            tree = GitHubService.get_repo_tree(access_token, repo_full_name, ref=head_sha)
+        except HTTPException as exc:
+            logger.warning("Tree lookup for rename detection failed for %s: %s", repo_full_name, exc.detail)
+            tree = []
+        wanted = set(unmatched) - set(blob_by_path)
+        for item in tree:
+            if item.get("path") in wanted and item.get("sha"):
+                blob_by_path[item["path"]] = item["sha"]
+
+    for path, blob_sha in blob_by_path.items():
+        previous = removed_by_blob.pop(blob_sha, None)
+        if previous:
+            renames[path] = previous
+            diff_by_path.setdefault(path, {"filename": path, "changes": 0, "sha": blob_sha})
+    return renames
+
+
 def update_repo_from_push(
     db: Session,
     repo: Repository,
@@ -243,47 +744,126 @@ def update_repo_from_push(
     changed_files: Iterable[str],
     removed_files: Iterable[str],
     head_sha: str,
+    base_sha: Optional[str] = None,
+    lock_wait_seconds: float = 0,
+    comparison: Optional[dict] = None,
 ):
-    repo_full_name = _repo_full_name(repo)
+    """
+    Refreshes file summaries for a push and regenerates the repo document.
 
-    for path in removed_files:
-        db.query(FileSummary).filter_by(repo_id=repo.id, path=path).delete()
+    When ``base_sha`` is known the push diff is fetched once via the compare
+    API: files with trivial diffs keep their summary, small diffs update the
+    existing summary from the patch, and only larger changes are re-summarized
+    from full content. Renamed or moved files are re-keyed onto their new
+    path. The repo document is regenerated only if the summary set actually
+    changed.
+
+    A ``comparison`` already fetched for ``base_sha...head_sha`` is reused.
+    Holds the repository's lock like ``generate_repo_documentation``.
+    """
+    with repo_lock(db, repo.id, wait_seconds=lock_wait_seconds) as lock:
+        _update_locked(
+            db, repo, access_token, changed_files, removed_files, head_sha, base_sha, comparison, lock
+        )
 
-    for path in changed_files:
-        if _should_skip_path(path):
-            continue
-        content, sha = GitHubService.get_file_content(access_token, repo_full_name, path, ref=head_sha)
-        if not content:
-            continue
-        content = _truncate(content, MAX_FILE_CHARS)
-        summary = _summarize_file(path, content)
 
-        existing = db.query(FileSummary).filter_by(repo_id=repo.id, path=path).first()
-        if existing:
-            existing.summary = summary
-            existing.blob_sha = sha
-            existing.last_commit_sha = head_sha
+def _update_locked(
+    db: Session,
+    repo: Repository,
+    access_token: str,
+    changed_files: Iterable[str],
+    removed_files: Iterable[str],
+    head_sha: str,
+    base_sha: Optional[str],
+    comparison: Optional[dict],
+    lock: RepoLockHandle,
+) -> None:
+    repo_full_name = _repo_full_name(repo)
+    removed = list(removed_files)
+    changed = [path for path in changed_files if not _should_skip_path(path)]
+
+    diff_by_path = _fetch_push_diff(access_token, repo_full_name, base_sha, head_sha, comparison) if changed else {}
+    existing_by_path = {
+        item.path: item
+        for item in db.query(FileSummary).filter(
+            FileSummary.repo_id == repo.id,
+            FileSummary.path.in_(changed + removed),
+        ).all()
+    }
+
+    # Moved files keep their summary under the new path with no LLM call.
+    renames = _detect_renames(
+        access_token, repo_full_name, head_sha, changed, removed, existing_by_path, diff_by_path
+    )
+    for new_path, old_path in renames.items():
+        existing_by_path[new_path] = existing_by_path.pop(old_path)
+    renamed_from = set(renames.values())
+    removed = [path for path in removed if path not in renamed_from]
+    material = any(path in existing_by_path for path in removed)
+
+    # Fetch and summarize first, with no transaction open (the lease is
+    # refreshed as it goes, which commits).
+    pending: List[Tuple[str, str, Optional[str]]] = []
+    updated: List[Tuple[str, str]] = []
+    full: List[Tuple[str, Optional[str]]] = []
+    for path in changed:
+        existing = existing_by_path.get(path)
+        file_info = diff_by_path.get(path)
+        mode = _classify_change(file_info, existing)
+
+        if mode == "skip":
+            pending.append((path, existing.summary, file_info.get("sha") or existing.blob_sha))
+        elif mode == "patch":
+            prompt = _summary_update_prompt(path, existing.summary, file_info["patch"])
+            summary = generate_text(prompt).strip()
+            if not summary or summary == _UNCHANGED_MARKER:
+                summary = existing.summary
+            pending.append((path, summary, file_info.get("sha") or existing.blob_sha))
+            updated.append((path, summary))
+            if len(updated) % CHECKPOINT_BATCH_SIZE == 0:
+                lock.ensure_held()
         else:
-            db.add(
-                FileSummary(
-                    repo_id=repo.id,
-                    path=path,
-                    summary=summary,
-                    blob_sha=sha,
-                    last_commit_sha=head_sha,
-                )
-            )
+            full.append((path, None))
+
+    # Whole files are summarized a batch at a time, so large files in a
+    # batch are outlined together.
+    for start in range(0, len(full), CHECKPOINT_BATCH_SIZE):
+        batch = full[start:start + CHECKPOINT_BATCH_SIZE]
+        for path, summary, sha in _summarize_files(access_token, repo_full_name, head_sha, batch):
+            pending.append((path, summary, sha))
+            updated.append((path, summary))
+        lock.ensure_held()
+
+    for path, summary in updated:
+        existing = existing_by_path.get(path)
+        if existing is None or summary != existing.summary:
+            material = True
+
+    for new_path in renames:
+        existing_by_path[new_path].path = new_path
+    for path in removed:
+        existing = existing_by_path.pop(path, None)
+        if existing is not None:
+            db.delete(existing)
+    _write_summaries(db, repo, existing_by_path, pending, last_commit_sha=head_sha)
+    db.commit()
+
+    style = repo.docs_style or "plainText"
+    complexity_value = repo.docs_complexity if repo.docs_complexity is not None else -1
+    has_doc = db.query(RepoDocumentation.id).filter_by(
+        repo_id=repo.id,
+        style=style,
+        complexity=complexity_value,
+    ).first() is not None
+    if not material and has_doc:
+        return
 
     summaries = [
         (item.path, item.summary)
-        for item in db.query(FileSummary).filter_by(repo_id=repo.id).order_by(FileSummary.path).all()
-    ][:MAX_FILES]
+        for item in db.query(FileSummary).filter_by(repo_id=repo.id).order_by(FileSummary.path).limit(MAX_FILES)
+    ]
 
     if summaries:
-        style = repo.docs_style or "plainText"
-        complexity_value = repo.docs_complexity if repo.docs_complexity is not None else -1
-        prompt = _repo_doc_prompt(style, summaries, complexity_value)
-        content = generate_text(prompt)
-        _upsert_repo_doc(db, repo, style, complexity_value, content)
-
-    db.commit()
+        lock.ensure_held()
+        _write_repo_doc(db, repo, style, complexity_value, summaries, complexity_value, reuse_ir=not material)
+        db.commit()
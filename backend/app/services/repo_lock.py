@@ -0,0 +1,117 @@
+"""
+Per-repository single-writer lock for documentation runs.
+
+A lock is a row in ``repo_locks`` keyed by repo ID. Inserting the row (or
+taking over an expired one with a conditional UPDATE) is atomic in the
+database, so at most one thread, process or host documents a repository at
+a time. Locks carry a lease that the holder refreshes while it works; a
+crashed holder's lock can be taken over once ``REPO_LOCK_TTL_SECONDS`` pass.
+A holder that finds its lock taken over stops with ``RepoBusy``.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.repo_lock import RepoLock
+
+_POLL_SECONDS = 0.5
+
+
+class RepoBusy(HTTPException):
+    """Raised when another run holds the repository's lock."""
+
+    def __init__(self, repo_id: int):
+        super().__init__(status_code=409, detail="Documentation for this repository is already being generated.")
+        self.repo_id = repo_id
+
+
+class RepoLockHandle:
+    def __init__(self, db: Session, repo_id: int, owner: str, waited: bool):
+        self.db = db
+        self.repo_id = repo_id
+        self.owner = owner
+        # True if another run held the lock when this one first asked for it.
+        self.waited = waited
+
+    def refresh(self) -> bool:
+        """Extends the lease; returns False if the lock was lost."""
+        result = self.db.execute(
+            update(RepoLock)
+            .where(RepoLock.repo_id == self.repo_id, RepoLock.owner == self.owner)
+            .values(expires_at=_expiry())
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def ensure_held(self) -> None:
+        """Extends the lease; raises ``RepoBusy`` if another run took the lock."""
+        if not self.refresh():
+            raise RepoBusy(self.repo_id)
+
+    def release(self) -> None:
+        self.db.execute(
+            delete(RepoLock).where(RepoLock.repo_id == self.repo_id, RepoLock.owner == self.owner)
+        )
+        self.db.commit()
+
+
+def _expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.REPO_LOCK_TTL_SECONDS)
+
+
+def _try_acquire(db: Session, repo_id: int, owner: str) -> bool:
+    now = datetime.utcnow()
+    takeover = db.execute(
+        update(RepoLock)
+        .where(RepoLock.repo_id == repo_id, RepoLock.expires_at < now)
+        .values(owner=owner, acquired_at=now, expires_at=_expiry())
+    )
+    db.commit()
+    if takeover.rowcount == 1:
+        return True
+
+    db.add(RepoLock(repo_id=repo_id, owner=owner, acquired_at=now, expires_at=_expiry()))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def acquire(db: Session, repo_id: int, wait_seconds: float = 0) -> RepoLockHandle:
+    """
+    Takes the lock for ``repo_id``, waiting up to ``wait_seconds`` for the
+    current holder to finish. Raises ``RepoBusy`` if it is still held.
+
+    Commits the session, so callers must not have pending changes.
+    """
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + wait_seconds
+    waited = False
+    while not _try_acquire(db, repo_id, owner):
+        waited = True
+        if time.monotonic() >= deadline:
+            raise RepoBusy(repo_id)
+        time.sleep(_POLL_SECONDS)
+    return RepoLockHandle(db, repo_id, owner, waited)
+
+
+@contextmanager
+def repo_lock(db: Session, repo_id: int, wait_seconds: float = 0) -> Iterator[RepoLockHandle]:
+    handle = acquire(db, repo_id, wait_seconds)
+    try:
+        yield handle
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        handle.release()
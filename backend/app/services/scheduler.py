@@ -0,0 +1,277 @@
+"""
+Priority scheduling for outbound LLM and GitHub calls.
+
+Every LLM request and GitHub API call takes a slot from a bounded pool for
+its resource. Waiters are served strictly by priority class, so an
+interactive request never queues behind a backlog of webhook work, and
+background classes may not take the slots reserved for interactive calls.
+
+The class of the current call is carried in a context variable; request
+handlers run as ``INTERACTIVE`` by default and background work opts into a
+lower class with ``with priority(Priority.WEBHOOK): ...``. Context variables
+follow FastAPI's threadpool hops, so the class set around a call reaches the
+service layer without threading it through every signature.
+
+Slot bounds apply per process: the API and every ``app.worker`` process
+have their own pools. Demand is shared through the database instead: a
+process serving interactive calls publishes that in ``scheduler_demand``,
+and while another process has published recent demand, background callers
+are held to ``SCHEDULER_BACKGROUND_SLOTS_UNDER_DEMAND`` slots, so a large
+push being processed by workers yields to a user waiting on the API.
+"""
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.scheduler_demand import SchedulerDemand
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+
+    INTERACTIVE = 0
+    MANUAL = 1
+    WEBHOOK = 2
+    PREWARM = 3
+
+
+_current: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "scheduler_priority", default=Priority.INTERACTIVE
+)
+
+
+def current_priority() -> Priority:
+    return _current.get()
+
+
+@contextmanager
+def priority(level: Priority) -> Iterator[None]:
+    """Runs the enclosed calls under ``level``."""
+    token = _current.set(Priority(level))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class SharedDemand:
+    """
+    Interactive demand shared between processes through the database.
+
+    ``note`` publishes that this process is serving interactive calls, at
+    most every half ``hold_seconds`` and off the caller's thread. ``active``
+    reports whether any other process has published demand within
+    ``hold_seconds``. It only reads a flag, which a background thread
+    refreshes from the database every ``check_interval`` seconds, so slot
+    accounting never waits on the database. Until ``configure`` is called
+    both are no-ops, and database errors count as no demand, so scheduling
+    never fails because of this signal.
+    """
+
+    def __init__(self, hold_seconds: float, check_interval: float = 1.0, process_id: Optional[str] = None):
+        self.hold_seconds = hold_seconds
+        self.check_interval = check_interval
+        self.process_id = process_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._lock = threading.Lock()
+        self._next_publish = 0.0
+        self._active = False
+        self._stopped = threading.Event()
+
+    def configure(self, session_factory: Callable[[], Session], watch: bool = True) -> None:
+        """Enables the signal; ``watch`` starts the thread that refreshes ``active``."""
+        self._session_factory = session_factory
+        if watch:
+            threading.Thread(target=self._watch, name="scheduler-demand", daemon=True).start()
+
+    def close(self) -> None:
+        self._stopped.set()
+
+    def _watch(self) -> None:
+        while True:
+            self.refresh()
+            if self._stopped.wait(self.check_interval):
+                return
+
+    @property
+    def configured(self) -> bool:
+        return self._session_factory is not None
+
+    def note(self) -> None:
+        if self._session_factory is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_publish:
+                return
+            self._next_publish = now + self.hold_seconds / 2
+        threading.Thread(target=self.publish, daemon=True).start()
+
+    def publish(self) -> None:
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            db.query(SchedulerDemand).filter(
+                SchedulerDemand.interactive_until < now,
+                SchedulerDemand.process_id != self.process_id,
+            ).delete(synchronize_session=False)
+            db.merge(SchedulerDemand(
+                process_id=self.process_id,
+                interactive_until=now + timedelta(seconds=self.hold_seconds),
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to publish interactive demand")
+        finally:
+            db.close()
+
+    def refresh(self) -> None:
+        """Re-reads whether another process has published demand."""
+        db = self._session_factory()
+        try:
+            active = db.query(SchedulerDemand.process_id).filter(
+                SchedulerDemand.interactive_until > datetime.utcnow(),
+                SchedulerDemand.process_id != self.process_id,
+            ).first() is not None
+        except Exception:
+            logger.exception("Failed to read interactive demand")
+            active = False
+        finally:
+            db.close()
+        self._active = active
+
+    def active(self) -> bool:
+        return self._active
+
+
+class PriorityLimiter:
+    """
+    A counting semaphore that grants slots in priority order.
+
+    ``reserved`` slots are only handed to ``INTERACTIVE`` callers, so a
+    saturated background backlog still leaves headroom for users. Background
+    callers are also deferred while any interactive caller is waiting, and
+    held to ``background_under_demand`` slots while ``demand`` reports
+    interactive load in another process.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        reserved: int = 0,
+        demand: Optional[SharedDemand] = None,
+        background_under_demand: int = 1,
+    ):
+        self.capacity = max(1, capacity)
+        self.reserved = max(0, min(reserved, self.capacity - 1))
+        self.demand = demand
+        self.background_under_demand = max(1, background_under_demand)
+        self.in_use = 0
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    def _limit_for(self, level: Priority) -> int:
+        if level == Priority.INTERACTIVE:
+            return self.capacity
+        limit = self.capacity - self.reserved
+        # A cached flag: this runs under the condition and must not block.
+        if self.demand is not None and self.demand.active():
+            limit = min(limit, self.background_under_demand)
+        return limit
+
+    def _can_enter(self, entry: Tuple[int, int]) -> bool:
+        # Strict priority: only the best waiter (FIFO within a class) may take
+        # a free slot, so background callers defer to any waiting user.
+        if entry != self._waiters[0]:
+            return False
+        return self.in_use < self._limit_for(Priority(entry[0]))
+
+    def acquire(self, level: Optional[Priority] = None, timeout: Optional[float] = None) -> bool:
+        level = current_priority() if level is None else Priority(level)
+        entry = (int(level), next(self._seq))
+        # Demand elsewhere can end without a release here, so background
+        # waiters re-check it rather than only waiting for a notification.
+        recheck = None
+        if self.demand is not None:
+            if level == Priority.INTERACTIVE:
+                self.demand.note()
+            elif self.demand.configured:
+                recheck = self.demand.check_interval
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while not self._can_enter(entry):
+                    wait = recheck
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+                self.in_use += 1
+                return True
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, level: Optional[Priority] = None) -> Iterator[None]:
+        self.acquire(level)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            result = {"in_use": self.in_use, "capacity": self.capacity}
+            for level in Priority:
+                result[f"waiting_{level.name.lower()}"] = sum(
+                    1 for waiter, _ in self._waiters if waiter == level
+                )
+            return result
+
+
+shared_demand = SharedDemand(settings.SCHEDULER_DEMAND_HOLD_SECONDS)
+
+llm_limiter = PriorityLimiter(
+    settings.LLM_MAX_CONCURRENCY,
+    reserved=settings.SCHEDULER_INTERACTIVE_RESERVED_SLOTS,
+    demand=shared_demand,
+    background_under_demand=settings.SCHEDULER_BACKGROUND_SLOTS_UNDER_DEMAND,
+)
+github_limiter = PriorityLimiter(
+    settings.GITHUB_MAX_CONCURRENCY,
+    reserved=settings.SCHEDULER_INTERACTIVE_RESERVED_SLOTS,
+    demand=shared_demand,
+    background_under_demand=settings.SCHEDULER_BACKGROUND_SLOTS_UNDER_DEMAND,
+)
+
+
+def configure_shared_demand(session_factory: Callable[[], Session]) -> None:
+    """Enables cross-process demand for this process unless it is switched off."""
+    if settings.SCHEDULER_SHARED_DEMAND:
+        shared_demand.configure(session_factory)
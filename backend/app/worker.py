@@ -0,0 +1,183 @@
+"""
+Background job worker.
+
+Run one or more worker processes (on any number of hosts sharing the
+database) alongside the API:
+
+    python -m app.worker
+
+Workers lease jobs from the ``jobs`` table, dispatch them to the handler
+registered for their ``kind`` and record the outcome. Leases are extended
+while a job runs, so a crashed worker's job is picked up by another worker
+once its visibility timeout expires.
+"""
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import SessionLocal
+from app.models.job import Job
+from app.services import job_queue
+from app.services.poller import POLL_JOB_KIND, poll_due_repos, schedule_next_poll
+from app.services.push_service import process_push_event
+from app.services.repo_lock import RepoBusy
+from app.services.repo_doc_service import REPO_DOCS_JOB_KIND, process_repo_doc_run
+from app.services.scheduler import Priority, configure_shared_demand, priority
+
+logger = logging.getLogger(__name__)
+
+
+def _handle_push(db: Session, payload: Dict[str, Any]) -> None:
+    process_push_event(
+        db,
+        repo_full_name=payload["repo_full_name"],
+        head_sha=payload["head_sha"],
+        changed_files=payload.get("changed_files") or [],
+        removed_files=payload.get("removed_files") or [],
+        base_sha=payload.get("base_sha"),
+        files_unknown=bool(payload.get("files_unknown")),
+    )
+
+
+def _handle_repo_docs(db: Session, payload: Dict[str, Any]) -> None:
+    process_repo_doc_run(db, payload["run_id"])
+
+
+def _handle_poll(db: Session, payload: Dict[str, Any]) -> None:
+    # Polling failures are logged rather than retried: the chain re-enqueues
+    # itself either way, and the next cycle picks up where this one stopped.
+    try:
+        poll_due_repos(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Poll cycle failed")
+    if settings.POLL_ENABLED:
+        schedule_next_poll(db)
+
+
+HANDLERS: Dict[str, Callable[[Session, Dict[str, Any]], None]] = {
+    "push": _handle_push,
+    REPO_DOCS_JOB_KIND: _handle_repo_docs,
+    POLL_JOB_KIND: _handle_poll,
+}
+
+# Scheduler class for the LLM and GitHub calls each job kind makes.
+JOB_PRIORITIES: Dict[str, Priority] = {
+    "push": Priority.WEBHOOK,
+    REPO_DOCS_JOB_KIND: Priority.MANUAL,
+    POLL_JOB_KIND: Priority.PREWARM,
+}
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class _LeaseKeeper(threading.Thread):
+    """Extends a running job's lease until stopped."""
+
+    def __init__(self, job: Job, worker_id: str, session_factory: Callable[[], Session]):
+        super().__init__(daemon=True)
+        self.job = job
+        self.worker_id = worker_id
+        self.session_factory = session_factory
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        interval = max(1.0, settings.JOB_VISIBILITY_TIMEOUT_SECONDS / 3)
+        while not self.stopped.wait(interval):
+            db = self.session_factory()
+            try:
+                if not job_queue.extend_lease(db, self.job, self.worker_id):
+                    logger.warning("Lost lease on job %s", self.job.id)
+                    return
+            except Exception:
+                logger.exception("Failed to extend lease on job %s", self.job.id)
+            finally:
+                db.close()
+
+
+def run_once(
+    worker_id: Optional[str] = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> bool:
+    """Leases and runs a single job. Returns False when the queue is empty."""
+    worker_id = worker_id or default_worker_id()
+    db = session_factory()
+    try:
+        job = job_queue.lease(db, worker_id, kinds=HANDLERS.keys())
+        if job is None:
+            return False
+
+        keeper = _LeaseKeeper(job, worker_id, session_factory)
+        keeper.start()
+        try:
+            with priority(JOB_PRIORITIES.get(job.kind, Priority.PREWARM)):
+                HANDLERS[job.kind](db, job_queue.job_payload(job))
+        except RepoBusy:
+            # Another run is documenting this repo; try again once it is done.
+            db.rollback()
+            recorded = job_queue.defer(db, job, worker_id, settings.REPO_LOCK_RETRY_SECONDS)
+        except Exception as exc:
+            db.rollback()
+            detail = exc.detail if isinstance(exc, HTTPException) else exc
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            recorded = job_queue.fail(db, job, worker_id, str(detail))
+        else:
+            recorded = job_queue.complete(db, job, worker_id)
+        finally:
+            keeper.stopped.set()
+        if not recorded:
+            logger.warning("Lost lease on job %s; its outcome was not recorded", job.id)
+        return True
+    finally:
+        db.close()
+
+
+def run_forever(worker_id: Optional[str] = None, poll_interval: Optional[float] = None) -> None:
+    worker_id = worker_id or default_worker_id()
+    poll_interval = poll_interval or settings.JOB_POLL_INTERVAL_SECONDS
+    logger.info("Worker %s started", worker_id)
+    if settings.POLL_ENABLED:
+        db = SessionLocal()
+        try:
+            # Coalesced: all workers share a single poll chain.
+            schedule_next_poll(db, delay_seconds=0)
+        finally:
+            db.close()
+    while True:
+        try:
+            if run_once(worker_id):
+                continue
+        except Exception:
+            logger.exception("Worker loop error")
+        time.sleep(poll_interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AutoDoc background job worker")
+    parser.add_argument("--once", action="store_true", help="Process queued jobs, then exit")
+    parser.add_argument("--poll-interval", type=float, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    init_db()
+    configure_shared_demand(SessionLocal)
+    if args.once:
+        while run_once():
+            pass
+        return
+    run_forever(poll_interval=args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
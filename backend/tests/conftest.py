@@ -21,12 +21,23 @@ os.environ["GITHUB_CLIENT_SECRET"] = "test_client_secret"
 os.environ["REDIRECT_URI"] = "http://localhost:5173/callback"
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["GEMINI_API_KEY"] = "test_api_key"
+os.environ["SCHEDULER_SHARED_DEMAND"] = "false"
 
 from app.db.base import Base
 from app.db.session import get_db
 from app.main import app
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """In-process caches are keyed by row IDs, which restart in every test database."""
+    from app.core import cache
+
+    cache.clear_all()
+    yield
+    cache.clear_all()
+
+
 @pytest.fixture(scope="function")
 def test_db():
     """Create a fresh test database for each test."""
@@ -0,0 +1,96 @@
+"""
+Integration tests for the /commits feed cache.
+
+The commit index service is mocked.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints import commits
+from app.core.cache import StaleWhileRevalidateCache
+from app.models.documentation import Documentation
+from app.models.user import User
+
+AUTH = {"Authorization": "Bearer feed_token"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def user(test_db):
+    user = User(github_username="feeduser", access_token="feed_token")
+    test_db.add(user)
+    test_db.commit()
+    return user
+
+
+@pytest.fixture
+def feed_cache():
+    clock, spawned = FakeClock(), []
+    cache = StaleWhileRevalidateCache(10, fresh_seconds=30, stale_seconds=600, clock=clock, spawn=spawned.append)
+    with patch.object(commits, "_feed_cache", cache):
+        yield clock, spawned
+
+
+def _page(label):
+    return {"commits": [{"full_sha": label, "message": label}], "next_cursor": None, "synced_at": None}
+
+
+class TestCommitsFeedCache:
+    """Tests for the stale-while-revalidate cache in front of /commits."""
+
+    def test_dashboard_refresh_is_served_from_cache(self, client, user, feed_cache):
+        with patch.object(commits.commit_feed_service, "list_commits", return_value=_page("a")) as mock_list:
+            client.get("/api/v1/commits/", headers=AUTH)
+            response = client.get("/api/v1/commits/", headers=AUTH)
+
+        assert response.json()["commits"][0]["full_sha"] == "a"
+        assert mock_list.call_count == 1
+
+    def test_stale_page_is_served_and_refreshed_in_background(self, client, test_db, user, feed_cache):
+        clock, spawned = feed_cache
+        with patch.object(commits.commit_feed_service, "list_commits", return_value=_page("a")):
+            client.get("/api/v1/commits/", headers=AUTH)
+
+        clock.now = 60
+        with patch.object(commits.commit_feed_service, "list_commits", return_value=_page("b")), \
+             patch.object(commits, "SessionLocal", sessionmaker(bind=test_db.get_bind())):
+            stale = client.get("/api/v1/commits/", headers=AUTH)
+            spawned[0]()
+            fresh = client.get("/api/v1/commits/", headers=AUTH)
+
+        assert stale.json()["commits"][0]["full_sha"] == "a"
+        assert fresh.json()["commits"][0]["full_sha"] == "b"
+
+    def test_cache_key_includes_parameters_and_filters_bypass_it(self, client, user, feed_cache):
+        with patch.object(commits.commit_feed_service, "list_commits", return_value=_page("a")) as mock_list:
+            client.get("/api/v1/commits/", headers=AUTH)
+            client.get("/api/v1/commits/?per_page=10", headers=AUTH)
+            client.get("/api/v1/commits/?include_stats=false", headers=AUTH)
+            client.get("/api/v1/commits/?author=ada", headers=AUTH)
+            client.get("/api/v1/commits/?author=ada", headers=AUTH)
+
+        assert mock_list.call_count == 5
+
+
+    def test_cached_page_shows_documentation_generated_since(self, client, test_db, user, feed_cache):
+        page = {"commits": [{"full_sha": "a", "repo_full_name": "feeduser/repo"}], "next_cursor": None}
+        with patch.object(commits.commit_feed_service, "list_commits", return_value=page):
+            before = client.get("/api/v1/commits/", headers=AUTH)
+            test_db.add(Documentation(
+                user_id=user.id, repo_full_name="feeduser/repo", commit_sha="a", style="plainText", content="x",
+            ))
+            test_db.commit()
+            after = client.get("/api/v1/commits/", headers=AUTH)
+
+        assert before.json()["commits"][0]["has_documentation"] is False
+        assert after.json()["commits"][0]["has_documentation"] is True
@@ -0,0 +1,472 @@
+"""
+Integration tests for commit documentation generation and its read cache.
+
+GitHub and the LLM providers are mocked.
+"""
+
+import json
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints import docs
+from app.models.documentation import Documentation
+from app.models.shared_documentation import SharedDocumentation
+from app.models.user import User
+
+AUTH = {"Authorization": "Bearer docs_token"}
+REQUEST = {"repo_full_name": "docsuser/demo", "commit_sha": "abcdef1234567"}
+
+
+@pytest.fixture(autouse=True)
+def stream_sessions(test_db):
+    """Sessions the batch stream opens, bound to the test database."""
+    sessions = []
+
+    def stream_session():
+        session = sessionmaker(autoflush=False, bind=test_db.get_bind())()
+        session.close = Mock(wraps=session.close)
+        sessions.append(session)
+        return session
+
+    with patch.object(docs, "SessionLocal", side_effect=stream_session):
+        yield sessions
+
+
+@pytest.fixture
+def user(test_db):
+    user = User(github_username="docsuser", access_token="docs_token")
+    test_db.add(user)
+    test_db.commit()
+    return user
+
+
+def _cache(db, user, styles):
+    for style in styles:
+        db.add(Documentation(
+            user_id=user.id,
+            repo_full_name=REQUEST["repo_full_name"],
+            commit_sha=REQUEST["commit_sha"],
+            style=style,
+            complexity=-1,
+            content=f"cached {style}",
+        ))
+    db.commit()
+
+
+def _count_documentation_selects(test_db):
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "documentations" in statement:
+            statements.append(statement)
+
+    event.listen(test_db.get_bind(), "before_cursor_execute", before_execute)
+    return statements
+
+
+class TestGenerateDocsCache:
+    """Tests for the cached path of /docs/generate."""
+
+    def test_all_styles_cached_use_one_query_and_no_github(self, client, test_db, user):
+        _cache(test_db, user, ["plainText", "research", "latex"])
+        statements = _count_documentation_selects(test_db)
+
+        with patch.object(docs.GitHubService, "get_commit_detail") as mock_detail:
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["plain_text"] == "cached plainText"
+        assert body["latex"] == "cached latex"
+        assert mock_detail.call_count == 0
+        assert len(statements) == 1
+        assert " IN " in statements[0].upper()
+
+    def test_repeat_request_is_served_from_memory(self, client, test_db, user):
+        _cache(test_db, user, ["plainText"])
+        request = {**REQUEST, "style": "plainText"}
+        client.post("/api/v1/docs/generate", json=request, headers=AUTH)
+        statements = _count_documentation_selects(test_db)
+
+        response = client.post("/api/v1/docs/generate", json=request, headers=AUTH)
+
+        assert response.json()["plain_text"] == "cached plainText"
+        assert statements == []
+
+    def test_only_missing_styles_are_generated(self, client, test_db, user):
+        _cache(test_db, user, ["plainText", "research"])
+
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value="fresh latex") as mock_llm:
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        body = response.json()
+        assert mock_llm.call_count == 1
+        assert body["plain_text"] == "cached plainText"
+        assert body["latex"] == "fresh latex"
+        assert test_db.query(Documentation).count() == 3
+
+    def test_force_regenerates_and_refreshes_cache(self, client, test_db, user):
+        _cache(test_db, user, ["plainText"])
+        request = {**REQUEST, "style": "plainText"}
+        client.post("/api/v1/docs/generate", json=request, headers=AUTH)
+
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value="regenerated"):
+            client.post("/api/v1/docs/generate", json={**request, "force": True}, headers=AUTH)
+        response = client.post("/api/v1/docs/generate", json=request, headers=AUTH)
+
+        assert response.json()["plain_text"] == "regenerated"
+        test_db.expire_all()
+        assert test_db.query(Documentation).one().shared.content == "regenerated"
+
+
+class TestGenerateDocsConcurrency:
+    """Tests for concurrent style generation."""
+
+    def test_styles_are_generated_concurrently(self, client, test_db, user):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def llm(prompt):
+            # Only returns once all three styles are in flight at the same time.
+            barrier.wait()
+            return "LaTeX" if "LaTeX" in prompt else "doc"
+
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", side_effect=llm):
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        body = response.json()
+        assert response.status_code == 200
+        assert body["latex"] == "LaTeX"
+        assert body["errors"] is None
+        assert test_db.query(Documentation).count() == 3
+
+    def test_partial_failure_returns_successful_styles(self, client, test_db, user):
+        def llm(prompt):
+            if "academic" in prompt:
+                raise HTTPException(status_code=502, detail="provider down")
+            return "ok"
+
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", side_effect=llm):
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        body = response.json()
+        assert response.status_code == 200
+        assert body["plain_text"] == "ok"
+        assert body["research_style"] is None
+        assert body["errors"] == {"research": "provider down"}
+        assert {doc.style for doc in test_db.query(Documentation).all()} == {"plainText", "latex"}
+
+    def test_total_failure_raises(self, client, test_db, user):
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", side_effect=HTTPException(status_code=429, detail="quota")):
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        assert response.status_code == 429
+        assert test_db.query(Documentation).count() == 0
+
+
+IR_REPLY = '{"title": "Fix", "overview": "Fixes the parser.", "components": [], "changes": ["Handle 100% of inputs"], "usage_notes": []}'
+
+
+class TestGenerateDocsIR:
+    """Tests for DOCS_GENERATION_MODE=ir."""
+
+    def test_one_llm_call_renders_every_style(self, client, test_db, user):
+        with patch.object(docs.doc_ir_service, "ir_enabled", return_value=True), \
+             patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value=IR_REPLY) as mock_llm:
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        body = response.json()
+        assert mock_llm.call_count == 1
+        assert body["plain_text"].startswith("Fixes the parser.")
+        assert "## Abstract" in body["research_style"]
+        assert r"100\% of inputs" in body["latex"]
+        styles = {doc.style for doc in test_db.query(Documentation).all()}
+        assert styles == {"plainText", "research", "latex", "ir"}
+
+    def test_cached_ir_renders_new_style_without_github_or_llm(self, client, test_db, user):
+        with patch.object(docs.doc_ir_service, "ir_enabled", return_value=True), \
+             patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value=IR_REPLY):
+            client.post("/api/v1/docs/generate", json={**REQUEST, "style": "plainText"}, headers=AUTH)
+
+        with patch.object(docs.doc_ir_service, "ir_enabled", return_value=True), \
+             patch.object(docs.GitHubService, "get_commit_detail") as mock_detail, \
+             patch.object(docs, "generate_text") as mock_llm:
+            response = client.post("/api/v1/docs/generate", json={**REQUEST, "style": "latex"}, headers=AUTH)
+
+        assert response.json()["latex"].startswith(r"\section{Fix}")
+        assert mock_detail.call_count == 0
+        assert mock_llm.call_count == 0
+
+
+class TestSharedDocs:
+    """Documents are generated once per commit and shared between users."""
+
+    def _teammate(self, test_db):
+        teammate = User(github_username="teammate", access_token="team_token")
+        test_db.add(teammate)
+        test_db.commit()
+        return {"Authorization": "Bearer team_token"}
+
+    def test_second_user_reuses_shared_docs_after_access_check(self, client, test_db, user):
+        team_auth = self._teammate(test_db)
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value="shared doc"):
+            client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        with patch.object(docs.GitHubService, "can_read_repo", return_value=True) as mock_access, \
+             patch.object(docs.GitHubService, "get_commit_detail") as mock_detail, \
+             patch.object(docs, "generate_text") as mock_llm:
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=team_auth)
+
+        assert response.status_code == 200
+        assert response.json()["latex"] == "shared doc"
+        assert mock_access.call_args.args == ("team_token", REQUEST["repo_full_name"])
+        assert mock_detail.call_count == 0
+        assert mock_llm.call_count == 0
+        assert test_db.query(SharedDocumentation).count() == 3
+        assert test_db.query(Documentation).count() == 6
+
+    def test_user_without_repo_access_is_refused(self, client, test_db, user):
+        team_auth = self._teammate(test_db)
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value="shared doc"):
+            client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        with patch.object(docs.GitHubService, "can_read_repo", return_value=False), \
+             patch.object(docs, "generate_text") as mock_llm:
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=team_auth)
+
+        assert response.status_code == 404
+        assert mock_llm.call_count == 0
+        assert test_db.query(Documentation).count() == 3
+
+    def test_rate_limited_access_check_is_not_cached(self, client, test_db, user):
+        team_auth = self._teammate(test_db)
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value="shared doc"):
+            client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        rate_limited = HTTPException(status_code=400, detail="Failed to check repository access: HTTP 403")
+        with patch.object(docs.GitHubService, "can_read_repo", side_effect=rate_limited):
+            refused = client.post("/api/v1/docs/generate", json=REQUEST, headers=team_auth)
+        with patch.object(docs.GitHubService, "can_read_repo", return_value=True) as mock_access, \
+             patch.object(docs, "generate_text") as mock_llm:
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=team_auth)
+
+        assert refused.status_code == 400
+        assert mock_access.call_count == 1
+        assert response.status_code == 200
+        assert response.json()["latex"] == "shared doc"
+        assert mock_llm.call_count == 0
+
+    def test_new_prompt_version_is_not_served(self, client, test_db, user):
+        team_auth = self._teammate(test_db)
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value="old prompt"):
+            client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        with patch.object(docs, "PROMPT_VERSION", "2"), \
+             patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value="new prompt") as mock_llm:
+            response = client.post("/api/v1/docs/generate", json=REQUEST, headers=team_auth)
+
+        assert response.json()["plain_text"] == "new prompt"
+        assert mock_llm.call_count == 3
+
+
+class TestGenerateDocsBatch:
+    """Tests for /docs/generate-batch."""
+
+    def _lines(self, response):
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_cached_commits_come_first_and_errors_do_not_abort(self, client, test_db, user):
+        _cache(test_db, user, ["plainText"])
+
+        def detail(token, repo, sha, include_patch=True):
+            if sha == "bad":
+                raise HTTPException(status_code=400, detail="No commit found")
+            return {}
+
+        batch = {
+            "repo_full_name": REQUEST["repo_full_name"],
+            "commit_shas": [REQUEST["commit_sha"], "bad", "good", "good"],
+            "style": "plainText",
+        }
+        with patch.object(docs.GitHubService, "get_commit_detail", side_effect=detail), \
+             patch.object(docs, "generate_text", return_value="fresh") as mock_llm:
+            response = client.post("/api/v1/docs/generate-batch", json=batch, headers=AUTH)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = self._lines(response)
+        assert lines[0]["plain_text"] == "cached plainText"
+        by_sha = {line["commit_sha"]: line for line in lines[1:]}
+        assert len(lines) == 3
+        assert by_sha["good"]["plain_text"] == "fresh"
+        assert by_sha["bad"] == {"commit_sha": "bad", "status_code": 400, "error": "No commit found"}
+        assert mock_llm.call_count == 1
+
+    def test_stream_saves_on_its_own_session_and_closes_it(self, client, test_db, user, stream_sessions):
+        teammate = User(github_username="teammate", access_token="team_token")
+        test_db.add(teammate)
+        test_db.commit()
+        with patch.object(docs.GitHubService, "get_commit_detail", return_value={}), \
+             patch.object(docs, "generate_text", return_value="shared doc"):
+            client.post("/api/v1/docs/generate", json=REQUEST, headers=AUTH)
+
+        batch = {"repo_full_name": REQUEST["repo_full_name"], "commit_shas": [REQUEST["commit_sha"]]}
+        with patch.object(docs.GitHubService, "can_read_repo", return_value=True), \
+             patch.object(docs, "generate_text") as mock_llm:
+            response = client.post(
+                "/api/v1/docs/generate-batch", json=batch, headers={"Authorization": "Bearer team_token"}
+            )
+
+        assert self._lines(response)[0]["latex"] == "shared doc"
+        assert mock_llm.call_count == 0
+        assert test_db.query(Documentation).filter_by(user_id=teammate.id).count() == 3
+        assert len(stream_sessions) == 1
+        assert stream_sessions[0].close.call_count == 1
+
+    def test_commits_are_fetched_concurrently(self, client, test_db, user):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def detail(token, repo, sha, include_patch=True):
+            # Only returns once all three commits are being fetched at once.
+            barrier.wait()
+            return {}
+
+        batch = {"repo_full_name": REQUEST["repo_full_name"], "commit_shas": ["a", "b", "c"], "style": "latex"}
+        with patch.object(docs.GitHubService, "get_commit_detail", side_effect=detail), \
+             patch.object(docs, "generate_text", return_value="doc"):
+            response = client.post("/api/v1/docs/generate-batch", json=batch, headers=AUTH)
+
+        assert sorted(line["commit_sha"] for line in self._lines(response)) == ["a", "b", "c"]
+        assert test_db.query(Documentation).count() == 3
+
+    def test_cache_is_probed_with_one_query(self, client, test_db, user):
+        statements = _count_documentation_selects(test_db)
+        batch = {"repo_full_name": REQUEST["repo_full_name"], "commit_shas": [f"sha{i}" for i in range(20)]}
+
+        with patch.object(docs, "_generate_commit_docs", side_effect=HTTPException(status_code=429, detail="quota")):
+            response = client.post("/api/v1/docs/generate-batch", json=batch, headers=AUTH)
+
+        assert len(self._lines(response)) == 20
+        assert len([statement for statement in statements if "FROM documentations" in statement]) == 1
+
+    def test_oversized_batch_is_rejected(self, client, user):
+        batch = {"repo_full_name": REQUEST["repo_full_name"], "commit_shas": [str(i) for i in range(101)]}
+
+        response = client.post("/api/v1/docs/generate-batch", json=batch, headers=AUTH)
+
+        assert response.status_code == 400
+
+
+BASE_SHA = "a" * 40
+HEAD_SHA = "b" * 40
+
+COMPARISON = {
+    "total_commits": 2,
+    "base_commit": {"sha": BASE_SHA},
+    "commits": [
+        {"sha": "c" * 40, "commit": {"message": "Add parser\n\nLong body", "author": {"name": "Ada"}}},
+        {"sha": HEAD_SHA, "commit": {"message": "Fix parser", "author": {"name": "Lin"}}},
+    ],
+    "files": [
+        {"filename": "parser.py", "additions": 10, "deletions": 2, "patch": "@@ -1 +1 @@"},
+        {"filename": "README.md", "additions": 1, "deletions": 0},
+    ],
+}
+
+
+class TestGenerateDocsRange:
+    """Tests for base..head range documentation."""
+
+    def test_range_uses_one_compare_and_one_llm_call(self, client, test_db, user):
+        request = {**REQUEST, "base_sha": "1111111aaaa", "commit_sha": "2222222bbbb", "style": "plainText"}
+
+        with patch.object(docs.GitHubService, "compare_commits", return_value=COMPARISON) as mock_compare, \
+             patch.object(docs.GitHubService, "get_commit_detail") as mock_detail, \
+             patch.object(docs, "generate_text", return_value="release notes") as mock_llm:
+            response = client.post("/api/v1/docs/generate", json=request, headers=AUTH)
+
+        body = response.json()
+        assert body["plain_text"] == "release notes"
+        assert body["commit_sha"] == "1111111aaaa..2222222bbbb"
+        assert body["commit_short_sha"] == "1111111..2222222"
+        assert mock_compare.call_args.args[1:] == (REQUEST["repo_full_name"], "1111111aaaa", "2222222bbbb")
+        assert mock_compare.call_count == 1
+        assert mock_detail.call_count == 0
+        assert mock_llm.call_count == 1
+        prompt = mock_llm.call_args.args[0]
+        assert "commit range" in prompt
+        assert "- Add parser (Ada)" in prompt
+        assert "Stats: +11 -2 (2 files)" in prompt
+
+    def test_range_is_cached_by_base_and_head(self, client, test_db, user):
+        request = {**REQUEST, "commit_sha": f"{BASE_SHA}..{HEAD_SHA}", "style": "latex"}
+        with patch.object(docs.GitHubService, "compare_commits", return_value=COMPARISON), \
+             patch.object(docs, "generate_text", return_value="range doc"):
+            client.post("/api/v1/docs/generate", json=request, headers=AUTH)
+
+        with patch.object(docs.GitHubService, "compare_commits") as mock_compare:
+            response = client.post(
+                "/api/v1/docs/generate",
+                json={**REQUEST, "base_sha": BASE_SHA, "commit_sha": HEAD_SHA, "style": "latex"},
+                headers=AUTH,
+            )
+
+        assert response.json()["latex"] == "range doc"
+        assert mock_compare.call_count == 0
+        assert test_db.query(Documentation).one().commit_sha == f"{BASE_SHA}..{HEAD_SHA}"
+
+    def test_ref_range_is_cached_by_resolved_shas(self, client, test_db, user):
+        request = {**REQUEST, "commit_sha": "v1.0..main", "style": "plainText"}
+        moved = {**COMPARISON, "commits": COMPARISON["commits"] + [
+            {"sha": "d" * 40, "commit": {"message": "Later", "author": {"name": "Ada"}}},
+        ], "total_commits": 3}
+
+        with patch.object(docs.GitHubService, "compare_commits", side_effect=[COMPARISON, COMPARISON, moved]), \
+             patch.object(docs, "generate_text", side_effect=["first", "after move"]) as mock_llm:
+            first = client.post("/api/v1/docs/generate", json=request, headers=AUTH).json()
+            again = client.post("/api/v1/docs/generate", json=request, headers=AUTH).json()
+            after_move = client.post("/api/v1/docs/generate", json=request, headers=AUTH).json()
+
+        assert (first["plain_text"], again["plain_text"], after_move["plain_text"]) == ("first", "first", "after move")
+        assert after_move["commit_sha"] == "v1.0..main"
+        assert mock_llm.call_count == 2
+        assert sorted(doc.commit_sha for doc in test_db.query(Documentation)) == [
+            f"{BASE_SHA}..{HEAD_SHA}", f"{BASE_SHA}..{'d' * 40}",
+        ]
+
+    def test_batch_ranges_resolving_to_the_same_shas_are_generated_once(self, client, test_db, user):
+        batch = {
+            "repo_full_name": REQUEST["repo_full_name"],
+            "commit_shas": ["v1.0..main", f"{BASE_SHA}..{HEAD_SHA}"],
+            "style": "plainText",
+        }
+
+        with patch.object(docs.GitHubService, "compare_commits", return_value=COMPARISON), \
+             patch.object(docs, "generate_text", return_value="range doc") as mock_llm:
+            response = client.post("/api/v1/docs/generate-batch", json=batch, headers=AUTH)
+
+        lines = [json.loads(item) for item in response.text.splitlines()]
+        assert sorted(item["commit_sha"] for item in lines) == sorted(batch["commit_shas"])
+        assert {item["plain_text"] for item in lines} == {"range doc"}
+        assert mock_llm.call_count == 1
+
+    def test_malformed_range_is_rejected(self, client, user):
+        response = client.post("/api/v1/docs/generate", json={**REQUEST, "commit_sha": "..bbb"}, headers=AUTH)
+
+        assert response.status_code == 400
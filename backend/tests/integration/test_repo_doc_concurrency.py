@@ -0,0 +1,182 @@
+"""
+Integration tests for database concurrency during documentation runs.
+
+Uses a file-backed SQLite database so that the writer lock behaves as it
+does in production, then checks that other writers are not blocked while a
+run is waiting on an LLM call.
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.file_summary import FileSummary
+from app.models.repository import Repository
+from app.models.user import User
+from app.services import repo_doc_service
+from app.services.repo_lock import RepoBusy
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Session factory bound to a file-backed SQLite database with a short busy timeout."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'concurrency.db'}",
+        connect_args={"check_same_thread": False, "timeout": 0.5},
+    )
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+
+
+def _seed_repo(factory):
+    db = factory()
+    user = User(github_username="owner", access_token="owner_token")
+    db.add(user)
+    db.commit()
+    repo = Repository(name="demo", full_name="owner/demo", owner_id=user.id, docs_active=True)
+    db.add(repo)
+    db.commit()
+    db.add(FileSummary(repo_id=repo.id, path="old.py", summary="old", blob_sha="old"))
+    db.commit()
+    repo_id = repo.id
+    db.close()
+    return repo_id
+
+
+def _run_while_llm_blocked(factory, target):
+    """Runs ``target`` in a thread and performs an unrelated write while its LLM call is blocked."""
+    llm_started = threading.Event()
+    release_llm = threading.Event()
+    errors = []
+
+    def blocking_llm(prompt):
+        llm_started.set()
+        release_llm.wait(timeout=5)
+        return "summary"
+
+    def worker():
+        db = factory()
+        try:
+            target(db)
+        except Exception as exc:  # pragma: no cover - surfaced via assertion
+            errors.append(exc)
+        finally:
+            db.close()
+
+    with patch.object(repo_doc_service, "generate_text", side_effect=blocking_llm), \
+         patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=[
+             {"type": "blob", "path": f"src/file_{i}.py", "sha": f"sha{i}"}
+             for i in range(repo_doc_service.CHECKPOINT_BATCH_SIZE + 2)
+         ]), \
+         patch.object(repo_doc_service.GitHubService, "get_file_content", return_value=("print(1)", "sha")):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            assert llm_started.wait(timeout=5)
+            other = factory()
+            try:
+                other.add(User(github_username="concurrent_login", access_token="login_token"))
+                other.commit()
+            finally:
+                other.close()
+        finally:
+            release_llm.set()
+            thread.join(timeout=10)
+
+    assert not errors
+    check = factory()
+    try:
+        assert check.query(User).filter_by(github_username="concurrent_login").count() == 1
+    finally:
+        check.close()
+
+
+@pytest.mark.integration
+class TestWritesDuringDocumentationRuns:
+    """Other writers must proceed while a documentation run waits on the LLM."""
+
+    def test_write_during_generate_repo_documentation(self, session_factory):
+        repo_id = _seed_repo(session_factory)
+
+        def target(db):
+            repo = db.get(Repository, repo_id)
+            repo_doc_service.generate_repo_documentation(db, repo, "owner_token", "plainText", None)
+
+        _run_while_llm_blocked(session_factory, target)
+
+    def test_write_during_update_repo_from_push(self, session_factory):
+        repo_id = _seed_repo(session_factory)
+
+        def target(db):
+            repo = db.get(Repository, repo_id)
+            repo_doc_service.update_repo_from_push(
+                db, repo, "owner_token", ["src/new.py"], ["old.py"], "abc123"
+            )
+
+        _run_while_llm_blocked(session_factory, target)
+
+        db = session_factory()
+        try:
+            paths = {item.path for item in db.query(FileSummary).all()}
+        finally:
+            db.close()
+        assert paths == {"src/new.py"}
+
+
+@pytest.mark.integration
+class TestSingleWriterPerRepository:
+    """Concurrent runs on one repository must not both call the LLM."""
+
+    def test_waiting_request_shares_the_running_result(self, session_factory):
+        repo_id = _seed_repo(session_factory)
+        llm_started = threading.Event()
+        release_llm = threading.Event()
+        llm_calls = []
+        results = {}
+
+        def blocking_llm(prompt):
+            llm_calls.append(prompt)
+            llm_started.set()
+            release_llm.wait(timeout=5)
+            return "summary"
+
+        def run(name, lock_wait_seconds):
+            db = session_factory()
+            try:
+                repo = db.get(Repository, repo_id)
+                try:
+                    doc = repo_doc_service.generate_repo_documentation(
+                        db, repo, "owner_token", "plainText", None, lock_wait_seconds=lock_wait_seconds
+                    )
+                    results[name] = doc.id
+                except Exception as exc:
+                    results[name] = exc
+            finally:
+                db.close()
+
+        with patch.object(repo_doc_service, "generate_text", side_effect=blocking_llm), \
+             patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=[
+                 {"type": "blob", "path": "src/file.py", "sha": "sha"}
+             ]), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", return_value=("print(1)", "sha")):
+            first = threading.Thread(target=run, args=("first", 0))
+            first.start()
+            assert llm_started.wait(timeout=5)
+
+            run("rejected", 0)
+            second = threading.Thread(target=run, args=("second", 10))
+            second.start()
+            release_llm.set()
+            first.join(timeout=10)
+            second.join(timeout=10)
+
+        assert isinstance(results["rejected"], RepoBusy)
+        assert results["second"] == results["first"]
+        assert len(llm_calls) == 2
@@ -0,0 +1,159 @@
+"""
+Integration tests for the asynchronous repo-docs job API.
+
+GitHub and the LLM providers are mocked; jobs are executed by calling the
+worker directly against the in-memory test database.
+"""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import worker
+from app.api.v1.endpoints import repo_docs
+from app.models.job import Job
+from app.models.repo_doc_run import RepoDocRun
+from app.models.repository import Repository
+from app.models.user import User
+from app.services import repo_doc_service
+
+AUTH = {"Authorization": "Bearer jobs_token"}
+
+
+@pytest.fixture
+def repo(test_db):
+    user = User(github_username="jobsuser", access_token="jobs_token")
+    test_db.add(user)
+    test_db.commit()
+    repo = Repository(name="demo", full_name="jobsuser/demo", owner_id=user.id)
+    test_db.add(repo)
+    test_db.commit()
+    return repo
+
+
+def _mock_github_and_llm():
+    tree = [{"type": "blob", "path": f"src/module_{i}.py", "sha": f"sha{i}"} for i in range(2)]
+    return (
+        patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=tree),
+        patch.object(repo_doc_service.GitHubService, "get_file_content", return_value=("print(1)", "sha")),
+        patch.object(repo_doc_service, "generate_text", return_value="generated"),
+    )
+
+
+def _run_worker(test_db):
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=test_db.get_bind())
+    tree, content, llm = _mock_github_and_llm()
+    with tree, content, llm:
+        assert worker.run_once("w", session_factory=factory) is True
+    test_db.expire_all()
+
+
+class TestRepoDocsJobs:
+    """Tests for job creation, polling and streaming."""
+
+    def test_generate_returns_job_immediately(self, client, test_db, repo):
+        with patch.object(repo_doc_service, "generate_text") as mock_llm:
+            response = client.post(
+                "/api/v1/repo-docs/generate",
+                json={"repo_full_name": "jobsuser/demo"},
+                headers=AUTH,
+            )
+
+        assert response.status_code == 202
+        body = response.json()
+        assert body["status"] == "queued"
+        assert mock_llm.call_count == 0
+        job = test_db.query(Job).one()
+        assert job.kind == repo_doc_service.REPO_DOCS_JOB_KIND
+        assert json.loads(job.payload) == {"run_id": body["job_id"]}
+
+    def test_repeated_request_reuses_active_job(self, client, test_db, repo):
+        first = client.post("/api/v1/repo-docs/generate", json={"repo_full_name": "jobsuser/demo"}, headers=AUTH)
+        second = client.post("/api/v1/repo-docs/generate", json={"repo_full_name": "jobsuser/demo"}, headers=AUTH)
+
+        assert first.json()["job_id"] == second.json()["job_id"]
+        assert test_db.query(Job).count() == 1
+
+    def test_worker_completes_job_and_status_reports_progress(self, client, test_db, repo):
+        job_id = client.post(
+            "/api/v1/repo-docs/activate",
+            json={"repo_full_name": "jobsuser/demo"},
+            headers=AUTH,
+        ).json()["job_id"]
+
+        _run_worker(test_db)
+        response = client.get(f"/api/v1/repo-docs/jobs/{job_id}", headers=AUTH)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "completed"
+        assert body["stage"] == "done"
+        assert body["files_done"] == body["files_total"] == 2
+        latest = client.get("/api/v1/repo-docs/latest", params={"repo_full_name": "jobsuser/demo"}, headers=AUTH)
+        assert latest.json()["content"] == "generated"
+
+    def test_wait_flag_runs_synchronously(self, client, test_db, repo):
+        tree, content, llm = _mock_github_and_llm()
+        with tree, content, llm:
+            response = client.post(
+                "/api/v1/repo-docs/generate?wait=true",
+                json={"repo_full_name": "jobsuser/demo"},
+                headers=AUTH,
+            )
+
+        assert response.status_code == 200
+        assert response.json()["content"] == "generated"
+        assert test_db.query(Job).count() == 0
+
+    def test_job_of_other_user_is_not_visible(self, client, test_db, repo):
+        run = RepoDocRun(repo_id=repo.id, status="queued", stage="queued")
+        test_db.add(run)
+        test_db.add(User(github_username="intruder", access_token="intruder_token"))
+        test_db.commit()
+
+        response = client.get(
+            f"/api/v1/repo-docs/jobs/{run.id}",
+            headers={"Authorization": "Bearer intruder_token"},
+        )
+
+        assert response.status_code == 404
+
+    def test_event_stream_emits_progress_until_finished(self, client, test_db, repo):
+        run = RepoDocRun(repo_id=repo.id, status="running", stage="summarizing", files_total=2)
+        test_db.add(run)
+        test_db.commit()
+        polls = []
+
+        async def advance(_seconds):
+            polls.append(_seconds)
+            run.files_done = 2
+            run.status = "completed"
+            run.stage = "done"
+            test_db.commit()
+
+        stream_sessions = []
+
+        def stream_session():
+            session = sessionmaker(bind=test_db.get_bind())()
+            session.close = Mock(wraps=session.close)
+            stream_sessions.append(session)
+            return session
+
+        with patch.object(repo_docs.asyncio, "sleep", side_effect=advance), \
+             patch.object(repo_docs, "SessionLocal", side_effect=stream_session):
+            response = client.get(f"/api/v1/repo-docs/jobs/{run.id}/events", headers=AUTH)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            json.loads(line[len("data: "):])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert [event["status"] for event in events] == ["running", "completed"]
+        assert events[-1]["files_done"] == 2
+        assert len(polls) == 1
+        assert len(stream_sessions) == 1
+        assert stream_sessions[0].close.call_count == 1
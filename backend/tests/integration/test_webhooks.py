@@ -0,0 +1,180 @@
+"""
+Integration tests for the GitHub webhook endpoint.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from app.models.commit import Commit, CommitSyncState
+from app.models.job import Job
+from app.models.repo_poll_state import RepoPollState
+from app.models.repository import Repository
+from app.models.webhook_delivery import WebhookDelivery
+from app.services import job_queue
+from app.services.delivery_store import claim_delivery
+
+
+def _push_payload(**overrides):
+    payload = {
+        "repository": {"full_name": "owner/repo", "default_branch": "main"},
+        "ref": "refs/heads/main",
+        "before": "base",
+        "after": "head",
+        "commits": [
+            {"added": ["new.py"], "modified": ["app.py"], "removed": []},
+            {"added": [], "modified": [], "removed": ["old.py"]},
+        ],
+    }
+    payload.update(overrides)
+    return payload
+
+
+def _post(client, payload, event="push", delivery="delivery-1"):
+    return client.post(
+        "/api/v1/webhooks/github",
+        content=json.dumps(payload),
+        headers={
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-GitHub-Delivery": delivery,
+        },
+    )
+
+
+class TestGitHubWebhook:
+    """Tests for POST /webhooks/github."""
+
+    def test_ping(self, client):
+        assert _post(client, {}, event="ping").json() == {"status": "ok"}
+
+    def test_push_enqueues_job(self, client, test_db):
+        response = _post(client, _push_payload())
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+        job = test_db.query(Job).one()
+        assert job.kind == "push"
+        assert job_queue.job_payload(job) == {
+            "repo_full_name": "owner/repo",
+            "head_sha": "head",
+            "base_sha": "base",
+            "changed_files": ["app.py", "new.py"],
+            "removed_files": ["old.py"],
+        }
+
+    def test_push_adds_commits_to_commit_index(self, client, test_db):
+        test_db.add(CommitSyncState(repo_full_name="owner/repo", head_sha="base", history_complete=True))
+        test_db.commit()
+        commits = [{"id": "head", "message": "Fix", "timestamp": "2025-01-01T00:00:00Z", "author": {"name": "Ada"}}]
+
+        _post(client, _push_payload(commits=commits))
+
+        test_db.expire_all()
+        assert test_db.query(Commit).one().sha == "head"
+        assert test_db.get(CommitSyncState, "owner/repo").head_sha == "head"
+
+    def test_branch_push_is_not_added_to_commit_index(self, client, test_db):
+        test_db.add(CommitSyncState(repo_full_name="owner/repo", head_sha="base", history_complete=True))
+        test_db.commit()
+        commits = [{"id": "head", "message": "WIP", "timestamp": "2025-01-01T00:00:00Z"}]
+
+        _post(client, _push_payload(ref="refs/heads/feature", commits=commits))
+
+        test_db.expire_all()
+        assert test_db.query(Commit).count() == 0
+        assert test_db.get(CommitSyncState, "owner/repo").head_sha == "base"
+
+    def test_branch_push_does_not_move_poll_head(self, client, test_db):
+        repo = Repository(name="repo", full_name="owner/repo", docs_active=True)
+        test_db.add(repo)
+        test_db.commit()
+        test_db.add(RepoPollState(repo_id=repo.id, head_sha="base", interval_seconds=60,
+                                  next_poll_at=datetime.utcnow()))
+        test_db.commit()
+
+        _post(client, _push_payload(ref="refs/heads/feature"), delivery="feature")
+        test_db.expire_all()
+        after_branch_push = test_db.query(RepoPollState).one().head_sha
+        _post(client, _push_payload(after="main-head"), delivery="main")
+        test_db.expire_all()
+
+        assert after_branch_push == "base"
+        assert test_db.query(RepoPollState).one().head_sha == "main-head"
+
+    def test_push_burst_coalesces_into_one_job(self, client, test_db):
+        for i in range(10):
+            _post(client, _push_payload(
+                before=f"sha{i}",
+                after=f"sha{i + 1}",
+                commits=[{"added": [], "modified": [f"file_{i}.py"], "removed": []}],
+            ), delivery=f"delivery-{i}")
+
+        job = test_db.query(Job).one()
+        payload = job_queue.job_payload(job)
+        assert payload["base_sha"] == "sha0"
+        assert payload["head_sha"] == "sha10"
+        assert payload["changed_files"] == sorted(f"file_{i}.py" for i in range(10))
+
+    def test_pushes_to_different_refs_are_not_coalesced(self, client, test_db):
+        _post(client, _push_payload(
+            before="main-base", after="main-head",
+            commits=[{"added": [], "modified": ["main.py"], "removed": []}],
+        ), delivery="delivery-main")
+        _post(client, _push_payload(
+            ref="refs/heads/feature", before="feature-base", after="feature-head",
+            commits=[{"added": [], "modified": ["feature.py"], "removed": []}],
+        ), delivery="delivery-feature")
+
+        payloads = {job_queue.job_payload(job)["head_sha"]: job_queue.job_payload(job) for job in test_db.query(Job)}
+        assert set(payloads) == {"main-head", "feature-head"}
+        assert payloads["main-head"]["base_sha"] == "main-base"
+        assert payloads["main-head"]["changed_files"] == ["main.py"]
+        assert payloads["feature-head"]["base_sha"] == "feature-base"
+        assert payloads["feature-head"]["changed_files"] == ["feature.py"]
+
+    def test_malformed_json_rejected(self, client, test_db):
+        response = client.post(
+            "/api/v1/webhooks/github",
+            content=b"{not json",
+            headers={"Content-Type": "application/json", "X-GitHub-Event": "push"},
+        )
+
+        assert response.status_code == 400
+        assert test_db.query(Job).count() == 0
+
+    def test_invalid_push_payload(self, client, test_db):
+        response = _post(client, _push_payload(after=None))
+
+        assert response.status_code == 400
+        assert test_db.query(Job).count() == 0
+
+
+class TestDeliveryDedupe:
+    """Tests for X-GitHub-Delivery idempotency."""
+
+    def test_redelivery_is_acknowledged_without_new_job(self, client, test_db):
+        first = _post(client, _push_payload(), delivery="same-id")
+        second = _post(client, _push_payload(), delivery="same-id")
+
+        assert first.json()["status"] == "queued"
+        assert second.status_code == 200
+        assert second.json() == {"status": "duplicate"}
+        assert test_db.query(Job).count() == 1
+
+    def test_failed_delivery_can_be_redelivered(self, client, test_db):
+        assert _post(client, _push_payload(after=None), delivery="retry-id").status_code == 400
+
+        response = _post(client, _push_payload(), delivery="retry-id")
+
+        assert response.json()["status"] == "queued"
+
+    def test_expired_delivery_ids_are_evicted(self, test_db):
+        test_db.add(WebhookDelivery(
+            delivery_id="ancient",
+            received_at=datetime.utcnow() - timedelta(days=30),
+        ))
+        test_db.commit()
+
+        assert claim_delivery(test_db, "fresh") is True
+        assert test_db.query(WebhookDelivery).filter_by(delivery_id="ancient").count() == 0
+        assert claim_delivery(test_db, "fresh") is False
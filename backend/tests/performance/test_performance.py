@@ -4,6 +4,7 @@ Performance tests for AutoDoc-Writer backend.
 Tests response times, load handling, and resource usage.
 """
 
+import os
 import pytest
 import time
 from unittest.mock import patch, Mock
@@ -214,6 +215,46 @@ class TestScalability:
         assert elapsed_time < 0.2  # Should generate in under 200ms
 
 
+class TestWebhookPerformance:
+    """Test webhook acknowledgement latency."""
+
+    def test_large_push_payload_ack_time(self, client, test_db):
+        """Test that a multi-megabyte push payload is acknowledged quickly."""
+        import json
+        from app.models.job import Job
+
+        # Arrange - ~2MB payload with thousands of file paths
+        commits = [
+            {
+                "added": [f"src/pkg_{i}/new_{j}.py" for j in range(10)],
+                "modified": [f"src/pkg_{i}/mod_{j}.py" for j in range(10)],
+                "removed": [f"src/pkg_{i}/old_{j}.py" for j in range(5)],
+                "message": "x" * 500,
+            }
+            for i in range(400)
+        ]
+        body = json.dumps({
+            "repository": {"full_name": "owner/big-repo"},
+            "before": "a" * 40,
+            "after": "b" * 40,
+            "commits": commits,
+        })
+
+        # Act
+        start_time = time.time()
+        response = client.post(
+            "/api/v1/webhooks/github",
+            content=body,
+            headers={"Content-Type": "application/json", "X-GitHub-Event": "push"},
+        )
+        elapsed_time = time.time() - start_time
+
+        # Assert
+        assert response.status_code == 200
+        assert test_db.query(Job).count() == 1
+        assert elapsed_time < 0.5
+
+
 class TestResourceCleanup:
     """Test proper resource cleanup."""
 
@@ -263,3 +304,86 @@ class TestResourceCleanup:
         
         # If we get here without crashing, no obvious memory leak
         assert True
+
+
+class TestCpuPoolPerformance:
+    """Benchmark outlining the fixtures corpus the way repo documentation runs do."""
+
+    @staticmethod
+    def _corpus(copies):
+        fixtures_dir = os.path.join(os.path.dirname(__file__), "..", "fixtures")
+        files = []
+        for name in sorted(os.listdir(fixtures_dir)):
+            path = os.path.join(fixtures_dir, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, encoding="utf-8", errors="ignore") as handle:
+                files.append((name, handle.read()))
+        assert any(name == "minified_hell.js" for name, _ in files)
+        return files * copies
+
+    def test_batch_outline_uses_one_pool_call(self):
+        from app.services import cpu_pool
+        from app.services.repo_doc_service import _outline_all
+
+        workers = min(4, os.cpu_count() or 1)
+        corpus = self._corpus(copies=2)
+
+        with patch.object(cpu_pool, "_workers", return_value=0):
+            inline = _outline_all(corpus)
+
+        with patch.object(cpu_pool, "_workers", return_value=workers), \
+             patch.object(cpu_pool, "map_tasks", wraps=cpu_pool.map_tasks) as map_tasks:
+            try:
+                start_time = time.perf_counter()
+                pooled = _outline_all(corpus)
+                elapsed_time = time.perf_counter() - start_time
+            finally:
+                cpu_pool.shutdown()
+
+        assert pooled == inline
+        assert map_tasks.call_count == 1
+        # Includes starting the workers.
+        assert elapsed_time < 30
+
+
+class TestCommitContextPerformance:
+    """Benchmark the commit context builder on a synthetic 1000-file commit."""
+
+    @staticmethod
+    def _commit_files(count):
+        files = []
+        for index in range(count):
+            kind = index % 4
+            if kind == 0:
+                filename = f"packages/pkg_{index}/package-lock.json"
+            elif kind == 1:
+                filename = f"static/build_{index}.min.js"
+            elif kind == 2:
+                filename = f"tests/test_feature_{index}.py"
+            else:
+                filename = f"app/feature_{index}.py"
+            patch = "\n".join(
+                f"@@ -{hunk * 40},20 +{hunk * 40},25 @@ def handler_{index}_{hunk}():\n"
+                + "\n".join(f"+    line_{index}_{hunk}_{line} = compute({line})" for line in range(20))
+                for hunk in range(5)
+            )
+            files.append({"filename": filename, "additions": 100, "deletions": 20, "patch": patch})
+        return files
+
+    def test_build_context_on_1000_files(self):
+        from app.api.v1.endpoints.docs import MAX_CONTEXT_CHARS
+        from app.services.commit_context import build_context
+
+        files = self._commit_files(1000)
+
+        start_time = time.perf_counter()
+        context = build_context(["Commit message: Large change", ""], files, MAX_CONTEXT_CHARS)
+        elapsed_time = time.perf_counter() - start_time
+
+        assert len(context) <= MAX_CONTEXT_CHARS
+        assert "\n--- app/feature_" in context
+        assert "\n--- packages/" not in context
+        assert "\n--- static/" not in context
+        assert "more files (" in context
+        assert elapsed_time < 0.5
@@ -0,0 +1,118 @@
+"""
+Unit tests for the in-process TTL cache.
+"""
+
+import pytest
+
+from app.core.cache import StaleWhileRevalidateCache, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Tests for TTLCache."""
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(max_entries=10, ttl_seconds=5, clock=clock)
+        cache.set("k", "v")
+
+        clock.now = 4.9
+        assert cache.get("k") == "v"
+        clock.now = 5.0
+        assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_zero_ttl_disables_caching(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+
+class TestStaleWhileRevalidateCache:
+    """Tests for StaleWhileRevalidateCache."""
+
+    def _cache(self, clock, spawned):
+        return StaleWhileRevalidateCache(
+            max_entries=10, fresh_seconds=5, stale_seconds=60, clock=clock, spawn=spawned.append
+        )
+
+    def test_fresh_entry_is_served_without_loading(self):
+        clock, spawned = FakeClock(), []
+        cache = self._cache(clock, spawned)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return len(loads)
+
+        assert cache.get("k", load) == 1
+        clock.now = 4
+        assert cache.get("k", load) == 1
+        assert loads == [1]
+        assert spawned == []
+
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        clock, spawned = FakeClock(), []
+        cache = self._cache(clock, spawned)
+        cache.get("k", lambda: "old")
+
+        clock.now = 10
+        assert cache.get("k", lambda: "unused", refresh=lambda: "new") == "old"
+        assert cache.get("k", lambda: "unused", refresh=lambda: "new") == "old"
+        assert len(spawned) == 1
+
+        spawned[0]()
+        assert cache.get("k", lambda: "unused") == "new"
+
+    def test_failed_refresh_keeps_stale_entry(self):
+        clock, spawned = FakeClock(), []
+        cache = self._cache(clock, spawned)
+        cache.get("k", lambda: "old")
+
+        def broken():
+            raise RuntimeError("GitHub down")
+
+        clock.now = 10
+        cache.get("k", broken)
+        spawned[0]()
+
+        assert cache.get("k", broken) == "old"
+        assert len(spawned) == 2
+
+    def test_expired_entry_is_reloaded_but_served_on_error(self):
+        clock, spawned = FakeClock(), []
+        cache = self._cache(clock, spawned)
+        cache.get("k", lambda: "old")
+
+        def broken():
+            raise RuntimeError("GitHub down")
+
+        clock.now = 100
+        assert cache.get("k", broken) == "old"
+        assert cache.get("k", lambda: "new") == "new"
+        assert spawned == []
+
+    def test_miss_propagates_load_errors(self):
+        cache = self._cache(FakeClock(), [])
+
+        with pytest.raises(RuntimeError):
+            cache.get("k", lambda: (_ for _ in ()).throw(RuntimeError("down")))
@@ -0,0 +1,104 @@
+"""
+Unit tests for the budgeted commit context builder.
+"""
+
+import pytest
+
+from app.services import commit_context
+
+
+def _patch(name, hunks=1, lines=5):
+    return "\n".join(
+        f"@@ -{index},{lines} +{index},{lines} @@ def {name}_{index}():\n"
+        + "\n".join(f"+    value_{index}_{line} = {line}" for line in range(lines))
+        for index in range(hunks)
+    )
+
+
+def _file(filename, additions=10, deletions=0, patch=None):
+    return {"filename": filename, "additions": additions, "deletions": deletions, "patch": patch}
+
+
+class TestClassify:
+    """Tests for classify."""
+
+    @pytest.mark.parametrize("filename, category", [
+        ("package-lock.json", "lockfile"),
+        ("backend/poetry.lock", "lockfile"),
+        ("vendor/github.com/lib/pq/conn.go", "vendored"),
+        ("web/node_modules/react/index.js", "vendored"),
+        ("static/app.min.js", "generated"),
+        ("api/service_pb2.py", "generated"),
+        ("frontend/dist/bundle.js", "generated"),
+        ("tests/unit/test_parser.py", "test"),
+        ("src/parser.test.ts", "test"),
+        ("pkg/parser_test.go", "test"),
+        ("app/services/parser.py", "source"),
+        ("README.md", "source"),
+    ])
+    def test_categories(self, filename, category):
+        assert commit_context.classify(filename) == category
+
+
+class TestBuildContext:
+    """Tests for build_context."""
+
+    def test_small_commit_is_complete(self):
+        files = [_file("app/main.py", patch=_patch("main")), _file("tests/test_main.py", patch=_patch("check"))]
+
+        context = commit_context.build_context(["Commit message: Fix", ""], files, 4000)
+
+        assert context.startswith("Commit message: Fix\n\nFiles changed:\n- app/main.py (+10/-0)")
+        assert "- tests/test_main.py (+10/-0) [test]" in context
+        assert "def main_0():" in context
+        assert "def check_0():" in context
+
+    def test_noise_is_listed_without_patch(self):
+        files = [
+            _file("package-lock.json", 5000, 4000, patch="@@ -1 +1 @@\n+lockfile_noise"),
+            _file("app/main.py", 3, 1, patch=_patch("main")),
+        ]
+
+        context = commit_context.build_context([], files, 4000)
+
+        assert context.index("app/main.py") < context.index("package-lock.json")
+        assert "package-lock.json (+5000/-4000) [lockfile]" in context
+        assert "lockfile_noise" not in context
+
+    def test_stays_within_budget_and_summarizes_unlisted_files(self):
+        files = [_file(f"src/module_{index}.py", patch=_patch(f"m{index}", hunks=3)) for index in range(200)]
+
+        context = commit_context.build_context(["Header"], files, 2000)
+
+        assert len(context) <= 2000
+        assert "- ...and " in context
+        assert "more files (" in context
+
+    def test_source_gets_larger_share_than_tests(self):
+        files = [
+            _file("tests/test_big.py", 50, patch=_patch("test_case", hunks=20)),
+            _file("app/big.py", 50, patch=_patch("feature", hunks=20)),
+        ]
+
+        context = commit_context.build_context([], files, 3000)
+        source, test = context.split("\n--- tests/test_big.py")
+        assert "--- app/big.py" in source
+        assert len(source) > len(test)
+
+    def test_hunks_ranked_by_changed_lines(self):
+        patch = "\n".join([
+            "@@ -1,1 +1,1 @@\n+tiny_change",
+            "@@ -50,30 +50,30 @@\n" + "\n".join(f"+large_change_{line}" for line in range(30)),
+        ])
+
+        context = commit_context.build_context([], [_file("app/main.py", patch=patch)], 4000)
+
+        assert context.index("large_change_0") < context.index("tiny_change")
+
+    def test_oversized_hunk_is_truncated(self):
+        patch = "@@ -1,1 +1,1 @@\n" + "+x" * 5000
+
+        context = commit_context.build_context([], [_file("app/main.py", patch=patch)], 1000)
+
+        assert len(context) <= 1000
+        assert context.endswith("...[truncated]")
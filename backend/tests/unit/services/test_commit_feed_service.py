@@ -0,0 +1,274 @@
+"""
+Unit tests for the aggregate commit feed.
+
+GitHub is mocked; the database is the in-memory test database from conftest.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.models.commit import Commit, CommitSyncState
+from app.models.documentation import Documentation
+from app.models.repository import Repository
+from app.models.user import User
+from app.services import commit_feed_service
+
+
+def _user_with_repos(db, monitored=(), others=()):
+    user = User(github_username="feeduser", access_token="feed_token")
+    db.add(user)
+    db.commit()
+    for index, name in enumerate(monitored + others):
+        db.add(Repository(
+            name=name,
+            full_name=f"feeduser/{name}",
+            last_updated=f"2025-01-0{index + 1}T00:00:00Z",
+            is_active=name in monitored,
+            owner_id=user.id,
+        ))
+    db.commit()
+    return user
+
+
+class TestFeedRepos:
+    """Tests for feed_repos."""
+
+    def test_monitored_repos_come_from_the_database(self, test_db):
+        user = _user_with_repos(test_db, monitored=("a", "b"), others=("c",))
+
+        with patch.object(commit_feed_service.GitHubService, "get_user_repos") as mock_repos:
+            names = commit_feed_service.feed_repos(test_db, user)
+
+        assert names == ["feeduser/a", "feeduser/b"]
+        assert mock_repos.call_count == 0
+
+    def test_recent_repos_without_monitoring_and_url_fallback(self, test_db):
+        user = _user_with_repos(test_db, others=("a", "b"))
+        test_db.add(Repository(name="old", url="https://github.com/feeduser/old", owner_id=user.id))
+        test_db.commit()
+
+        assert commit_feed_service.feed_repos(test_db, user) == ["feeduser/b", "feeduser/a", "feeduser/old"]
+
+
+class FakeGitHub:
+    """A linear history per repository, newest first, served like GitHub."""
+
+    def __init__(self, repos, commits_per_repo=3):
+        self.history = {
+            name: [
+                {
+                    "full_sha": f"{name}-{n}",
+                    "message": f"commit {n}",
+                    "author": "Ada",
+                    "repo_full_name": name,
+                    "timestamp": (datetime(2025, 2, 1) + timedelta(hours=n, minutes=offset)).isoformat() + "Z",
+                }
+                for n in reversed(range(commits_per_repo))
+            ]
+            for offset, name in enumerate(repos)
+        }
+        self.calls = 0
+        self.failing = set()
+
+    def get_head_sha(self, access_token, repo_full_name, ref="HEAD", etag=None):
+        self.calls += 1
+        if repo_full_name in self.failing:
+            raise HTTPException(status_code=400, detail="Git Repository is empty.")
+        head = self.history[repo_full_name][0]["full_sha"]
+        if etag == f'"{head}"':
+            return None, etag
+        return head, f'"{head}"'
+
+    def get_repo_commits(self, access_token, repo_full_name, per_page=20, include_stats=True, sha=None, page=1):
+        self.calls += 1
+        history = self.history[repo_full_name]
+        start = [entry["full_sha"] for entry in history].index(sha) if sha else 0
+        start += (page - 1) * per_page
+        return [dict(entry) for entry in history[start:start + per_page]]
+
+    def get_commit_stats(self, access_token, repo_full_name, sha):
+        self.calls += 1
+        return {"files_changed": 1, "additions": 2, "deletions": 0, "files": []}
+
+    def push(self, repo_full_name, sha):
+        self.history[repo_full_name].insert(0, {
+            "full_sha": sha, "message": "new", "author": "Lin",
+            "repo_full_name": repo_full_name, "timestamp": "2025-03-01T00:00:00Z",
+        })
+
+
+def _patched(fake):
+    service = commit_feed_service.GitHubService
+    return patch.multiple(
+        service,
+        get_head_sha=fake.get_head_sha,
+        get_repo_commits=fake.get_repo_commits,
+        get_commit_stats=fake.get_commit_stats,
+    )
+
+
+class TestListCommits:
+    """Tests for list_commits."""
+
+    REPOS = ["feeduser/a", "feeduser/b", "feeduser/c"]
+
+    def test_merges_repos_newest_first_with_stats(self, test_db):
+        user = _user_with_repos(test_db, monitored=("a", "b", "c"))
+        fake = FakeGitHub(self.REPOS)
+
+        with _patched(fake):
+            page = commit_feed_service.list_commits(test_db, user, self.REPOS, per_page=4)
+
+        timestamps = [commit["timestamp"] for commit in page["commits"]]
+        assert timestamps == sorted(timestamps, reverse=True)
+        assert page["commits"][0]["full_sha"] == "feeduser/c-2"
+        assert page["commits"][0]["additions"] == 2
+        assert page["next_cursor"] is not None
+        assert page["synced_at"] is not None
+
+    def test_scrolling_a_synced_history_costs_no_github_calls(self, test_db):
+        user = _user_with_repos(test_db, monitored=("a", "b", "c"))
+        fake = FakeGitHub(self.REPOS)
+
+        with _patched(fake):
+            first = commit_feed_service.list_commits(test_db, user, self.REPOS, per_page=4, include_stats=False)
+            calls = fake.calls
+            second = commit_feed_service.list_commits(
+                test_db, user, self.REPOS, per_page=4, cursor=first["next_cursor"], include_stats=False
+            )
+            third = commit_feed_service.list_commits(
+                test_db, user, self.REPOS, per_page=4, cursor=second["next_cursor"], include_stats=False
+            )
+
+        shas = [c["full_sha"] for page in (first, second, third) for c in page["commits"]]
+        assert len(shas) == len(set(shas)) == 9
+        assert third["next_cursor"] is None
+        assert fake.calls == calls
+
+    def test_stale_index_syncs_incrementally(self, test_db):
+        user = _user_with_repos(test_db, monitored=("a",))
+        fake = FakeGitHub(["feeduser/a"])
+        with _patched(fake):
+            commit_feed_service.list_commits(test_db, user, ["feeduser/a"], per_page=2, include_stats=False)
+
+        test_db.query(CommitSyncState).update({"synced_at": datetime.utcnow() - timedelta(hours=1)})
+        test_db.commit()
+        fake.push("feeduser/a", "feeduser/a-new")
+        fake.calls = 0
+        with _patched(fake):
+            page = commit_feed_service.list_commits(test_db, user, ["feeduser/a"], per_page=2, include_stats=False)
+
+        assert page["commits"][0]["full_sha"] == "feeduser/a-new"
+        # One conditional head request and one listing page.
+        assert fake.calls == 2
+        assert test_db.query(Commit).count() == 4
+
+    def test_repos_are_synced_concurrently(self, test_db):
+        user = _user_with_repos(test_db, monitored=("a", "b", "c"))
+        fake = FakeGitHub(self.REPOS)
+        barrier = threading.Barrier(3, timeout=5)
+        resolve = fake.get_head_sha
+
+        def get_head_sha(*args, **kwargs):
+            # Only returns once all three repositories are in flight.
+            barrier.wait()
+            return resolve(*args, **kwargs)
+
+        fake.get_head_sha = get_head_sha
+        with _patched(fake):
+            page = commit_feed_service.list_commits(test_db, user, self.REPOS, per_page=20, include_stats=False)
+
+        assert len(page["commits"]) == 9
+
+    def test_failing_repo_is_skipped(self, test_db):
+        user = _user_with_repos(test_db, monitored=("a", "b"))
+        fake = FakeGitHub(["feeduser/a", "feeduser/b"])
+        fake.failing.add("feeduser/b")
+
+        with _patched(fake):
+            page = commit_feed_service.list_commits(
+                test_db, user, ["feeduser/a", "feeduser/b"], per_page=20, include_stats=False
+            )
+
+        assert {commit["repo_full_name"] for commit in page["commits"]} == {"feeduser/a"}
+
+    def test_author_and_date_filters(self, test_db):
+        user = _user_with_repos(test_db, monitored=("a",))
+        fake = FakeGitHub(["feeduser/a"])
+        fake.push("feeduser/a", "by-lin")
+
+        with _patched(fake):
+            by_author = commit_feed_service.list_commits(
+                test_db, user, ["feeduser/a"], per_page=20, author="lin", include_stats=False
+            )
+            by_date = commit_feed_service.list_commits(
+                test_db, user, ["feeduser/a"], per_page=20, include_stats=False,
+                since=datetime(2025, 2, 1, 1), until=datetime(2025, 2, 1, 23),
+            )
+
+        assert [c["full_sha"] for c in by_author["commits"]] == ["by-lin"]
+        assert [c["full_sha"] for c in by_date["commits"]] == ["feeduser/a-2", "feeduser/a-1"]
+
+
+    def test_filtered_page_keeps_a_cursor_until_history_is_indexed(self, test_db):
+        user = _user_with_repos(test_db, monitored=("a",))
+        fake = FakeGitHub(["feeduser/a"], commits_per_repo=1200)
+        fake.history["feeduser/a"][1100]["author"] = "Lin"
+
+        pages = []
+        cursor = None
+        with _patched(fake):
+            while True:
+                page = commit_feed_service.list_commits(
+                    test_db, user, ["feeduser/a"], per_page=20, cursor=cursor, author="lin", include_stats=False
+                )
+                pages.append(page)
+                cursor = page["next_cursor"]
+                if cursor is None or len(pages) > 5:
+                    break
+
+        assert pages[0]["commits"] == []
+        assert pages[0]["next_cursor"] is not None
+        assert [c["full_sha"] for page in pages for c in page["commits"]] == ["feeduser/a-99"]
+        assert pages[-1]["next_cursor"] is None
+        assert test_db.get(CommitSyncState, "feeduser/a").history_complete is True
+
+
+class TestAnnotateDocumentation:
+    """Tests for annotate_documentation."""
+
+    def test_page_is_annotated_with_one_query(self, test_db):
+        user = _user_with_repos(test_db)
+        other = User(github_username="other", access_token="other_token")
+        test_db.add(other)
+        test_db.commit()
+        test_db.add_all([
+            Documentation(user_id=user.id, repo_full_name="feeduser/a", commit_sha="s1", style="plainText", content="x"),
+            Documentation(user_id=user.id, repo_full_name="feeduser/a", commit_sha="s1", style="latex", content="x"),
+            # Same SHA in another repository, and another user's document.
+            Documentation(user_id=user.id, repo_full_name="feeduser/b", commit_sha="s2", style="plainText", content="x"),
+            Documentation(user_id=other.id, repo_full_name="feeduser/a", commit_sha="s3", style="plainText", content="x"),
+        ])
+        test_db.commit()
+        commits = [
+            {"full_sha": sha, "repo_full_name": "feeduser/a"} for sha in ("s1", "s2", "s3", "s4")
+        ]
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if "documentations" in statement:
+                statements.append(statement)
+
+        event.listen(test_db.get_bind(), "before_cursor_execute", before_execute)
+        try:
+            annotated = commit_feed_service.annotate_documentation(test_db, user, commits)
+        finally:
+            event.remove(test_db.get_bind(), "before_cursor_execute", before_execute)
+
+        assert [commit["has_documentation"] for commit in annotated] == [True, False, False, False]
+        assert "has_documentation" not in commits[0]
+        assert len(statements) == 1
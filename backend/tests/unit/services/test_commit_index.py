@@ -0,0 +1,131 @@
+"""
+Unit tests for the local commit index.
+
+GitHub is mocked; the database is the in-memory test database from conftest.
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.commit import Commit, CommitSyncState
+from app.services import commit_index
+
+REPO = "idxuser/demo"
+
+
+def _entries(count, start=0):
+    return [
+        {"full_sha": f"sha{n}", "message": f"m{n}", "timestamp": f"2025-01-01T00:{n % 60:02d}:00Z"}
+        for n in range(start, start + count)
+    ]
+
+
+class TestSync:
+    """Tests for fetch_updates / apply_updates."""
+
+    def test_unchanged_head_only_advances_watermark(self, test_db):
+        test_db.add(CommitSyncState(repo_full_name=REPO, head_sha="sha0", etag='"e"', history_complete=True))
+        test_db.commit()
+
+        with patch.object(commit_index.GitHubService, "get_head_sha", return_value=(None, '"e"')) as mock_head, \
+             patch.object(commit_index.GitHubService, "get_repo_commits") as mock_list:
+            result = commit_index.fetch_updates("token", REPO, "sha0", '"e"')
+        commit_index.apply_updates(test_db, result)
+
+        assert mock_head.call_args.kwargs["etag"] == '"e"'
+        assert mock_list.call_count == 0
+        assert test_db.get(CommitSyncState, REPO).synced_at is not None
+
+    def test_first_sync_is_capped_and_marks_history_incomplete(self, test_db):
+        pages = [_entries(100), _entries(100, 100)]
+
+        with patch.object(commit_index.GitHubService, "get_head_sha", return_value=("sha0", '"e"')), \
+             patch.object(commit_index.GitHubService, "get_repo_commits", side_effect=pages):
+            result = commit_index.fetch_updates("token", REPO, None, None, limit=150)
+        commit_index.apply_updates(test_db, result)
+
+        state = test_db.get(CommitSyncState, REPO)
+        assert test_db.query(Commit).count() == 150
+        assert (state.head_sha, state.oldest_sha, state.history_complete) == ("sha0", "sha149", False)
+
+    def test_force_push_drops_commits_no_longer_on_the_branch(self, test_db):
+        test_db.add(CommitSyncState(repo_full_name=REPO, head_sha="gone", oldest_sha="sha1", history_complete=True))
+        for sha in ("gone", "sha1"):
+            test_db.add(Commit(repo_full_name=REPO, sha=sha, committed_at=datetime(2025, 1, 1)))
+        test_db.add(Commit(repo_full_name="idxuser/other", sha="gone", committed_at=datetime(2025, 1, 1)))
+        test_db.commit()
+
+        # The rewritten branch never reaches the old head.
+        with patch.object(commit_index.GitHubService, "get_head_sha", return_value=("sha0", '"e"')), \
+             patch.object(commit_index.GitHubService, "get_repo_commits", return_value=_entries(2)):
+            result = commit_index.fetch_updates("token", REPO, "gone", '"e"')
+        commit_index.apply_updates(test_db, result)
+
+        state = test_db.get(CommitSyncState, REPO)
+        assert sorted(c.sha for c in test_db.query(Commit).filter(Commit.repo_full_name == REPO)) == ["sha0", "sha1"]
+        assert test_db.query(Commit).filter(Commit.repo_full_name == "idxuser/other").count() == 1
+        assert (state.head_sha, state.oldest_sha, state.history_complete) == ("sha0", "sha1", True)
+
+    def test_history_is_extended_from_oldest_commit(self, test_db):
+        test_db.add(CommitSyncState(repo_full_name=REPO, head_sha="sha0", oldest_sha="sha9", history_complete=False))
+        test_db.commit()
+
+        with patch.object(commit_index.GitHubService, "get_repo_commits", return_value=_entries(5, 9)) as mock_list:
+            commit_index.apply_history(test_db, commit_index.fetch_history("token", REPO, "sha9"))
+
+        state = test_db.get(CommitSyncState, REPO)
+        assert mock_list.call_args.kwargs["sha"] == "sha9"
+        assert test_db.query(Commit).count() == 4
+        assert (state.oldest_sha, state.history_complete) == ("sha13", True)
+
+
+class TestRecordPush:
+    """Tests for record_push."""
+
+    PUSH = [{"id": "new", "message": "Fix", "timestamp": "2025-01-02T10:00:00+02:00", "author": {"name": "Ada"}}]
+
+    def test_contiguous_push_advances_head(self, test_db):
+        test_db.add(CommitSyncState(repo_full_name=REPO, head_sha="old", history_complete=True))
+        test_db.commit()
+
+        commit_index.record_push(test_db, REPO, "old", "new", self.PUSH)
+
+        commit = test_db.query(Commit).one()
+        assert commit.committed_at == datetime(2025, 1, 2, 8, 0)
+        assert test_db.get(CommitSyncState, REPO).head_sha == "new"
+
+    def test_push_with_gap_keeps_head(self, test_db):
+        test_db.add(CommitSyncState(repo_full_name=REPO, head_sha="older", history_complete=True))
+        test_db.commit()
+
+        commit_index.record_push(test_db, REPO, "old", "new", self.PUSH)
+
+        assert test_db.get(CommitSyncState, REPO).head_sha == "older"
+
+    def test_unindexed_repo_is_ignored(self, test_db):
+        commit_index.record_push(test_db, REPO, "old", "new", self.PUSH)
+
+        assert test_db.query(Commit).count() == 0
+
+
+class TestQueryPage:
+    """Tests for keyset pagination."""
+
+    def test_equal_timestamps_are_paged_by_id(self, test_db):
+        for n in range(5):
+            test_db.add(Commit(repo_full_name=REPO, sha=f"s{n}", committed_at=datetime(2025, 1, 1)))
+        test_db.commit()
+
+        first = commit_index.query_page(test_db, [REPO], 3)
+        rest = commit_index.query_page(test_db, [REPO], 3, cursor=commit_index.encode_cursor(first[-1]))
+
+        assert [c.sha for c in first + rest] == ["s4", "s3", "s2", "s1", "s0"]
+
+    def test_invalid_cursor_is_rejected(self, test_db):
+        with pytest.raises(HTTPException) as exc:
+            commit_index.query_page(test_db, [REPO], 3, cursor="not-a-cursor")
+
+        assert exc.value.status_code == 400
@@ -0,0 +1,41 @@
+"""
+Unit tests for the CPU-bound preprocessing pool.
+"""
+
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+
+from app.services import cpu_pool
+from app.services.outline_service import extract_outline
+
+
+class TestCpuPool:
+    """Tests for run/map_tasks with the pool enabled and disabled."""
+
+    def test_disabled_pool_runs_inline(self):
+        with patch.object(cpu_pool, "_workers", return_value=0):
+            assert cpu_pool.get_executor() is None
+            assert cpu_pool.run(divmod, 7, 2) == (3, 1)
+            assert cpu_pool.map_tasks(divmod, [(7, 2), (9, 4)]) == [(3, 1), (2, 1)]
+
+    def test_pool_matches_inline_results(self):
+        content = "def f():\n" + "    x = 1\n" * 2000
+        with patch.object(cpu_pool, "_workers", return_value=2):
+            try:
+                assert cpu_pool.get_executor() is not None
+                pooled = cpu_pool.map_tasks(extract_outline, [("a.py", content, 200), ("b.py", content, 200)])
+                single = cpu_pool.run(extract_outline, "a.py", content, 200)
+            finally:
+                cpu_pool.shutdown()
+
+        assert pooled == [extract_outline("a.py", content, 200), extract_outline("b.py", content, 200)]
+        assert single == pooled[0]
+
+    def test_broken_pool_is_shut_down_and_replaced(self):
+        broken = Mock()
+        broken.submit.return_value.result.side_effect = BrokenProcessPool()
+        with patch.object(cpu_pool, "_workers", return_value=2), patch.object(cpu_pool, "_executor", broken):
+            assert cpu_pool.run(divmod, 7, 2) == (3, 1)
+            assert cpu_pool._executor is None
+
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
@@ -0,0 +1,65 @@
+"""
+Unit tests for the documentation IR parser and renderers.
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import doc_ir_service
+
+REPLY = """Here you go:
+{"title": "Cache_layer", "overview": " Adds a cache. ",
+ "components": [{"name": "TTLCache", "description": "Expires entries."}, {"description": "nameless"}],
+ "changes": ["Cut cost by 50%", 3], "usage_notes": ["Set TTL & size"]}
+"""
+
+
+class TestParseIR:
+    """Tests for parse_ir."""
+
+    def test_normalizes_reply(self):
+        ir = doc_ir_service.parse_ir(REPLY)
+
+        assert ir["overview"] == "Adds a cache."
+        assert ir["components"] == [{"name": "TTLCache", "description": "Expires entries."}]
+        assert ir["changes"] == ["Cut cost by 50%"]
+
+    @pytest.mark.parametrize("raw", ["not json", "{broken", '{"title": "no overview"}'])
+    def test_invalid_reply_is_bad_gateway(self, raw):
+        with pytest.raises(HTTPException) as exc:
+            doc_ir_service.parse_ir(raw)
+
+        assert exc.value.status_code == 502
+
+    def test_round_trip(self):
+        ir = doc_ir_service.parse_ir(REPLY)
+
+        assert doc_ir_service.loads(doc_ir_service.dumps(ir)) == ir
+
+
+class TestRender:
+    """Tests for render."""
+
+    def test_styles_share_content(self):
+        ir = doc_ir_service.parse_ir(REPLY)
+
+        plain = doc_ir_service.render(ir, "plainText")
+        research = doc_ir_service.render(ir, "research")
+
+        assert plain.startswith("Adds a cache.")
+        assert "- TTLCache: Expires entries." in plain
+        assert "## 1. System Components" in research
+        assert "## 2. Modifications\n\n1. Cut cost by 50%" in research
+
+    def test_latex_is_escaped(self):
+        latex = doc_ir_service.render(doc_ir_service.parse_ir(REPLY), "latex")
+
+        assert latex.startswith(r"\section{Cache\_layer}")
+        assert r"\item Cut cost by 50\%" in latex
+        assert r"\item Set TTL \& size" in latex
+
+    def test_unknown_style_is_rejected(self):
+        with pytest.raises(HTTPException) as exc:
+            doc_ir_service.render({}, "haiku")
+
+        assert exc.value.status_code == 400
@@ -171,3 +171,50 @@ class TestGitHubService:
             content, sha = GitHubService.get_file_content("token", "owner/repo", "README.md")        
             assert content.strip() == "hello"
             assert sha == "abc"
+
+    def test_get_head_sha_sends_etag_and_handles_not_modified(self):
+        with patch('app.services.github_service.requests.request') as mock_req:
+            mock_response = Mock()
+            mock_response.status_code = 304
+            mock_req.return_value = mock_response
+
+            sha, etag = GitHubService.get_head_sha("token", "owner/repo", etag='"abc"')
+
+            assert sha is None
+            assert etag == '"abc"'
+            _, kwargs = mock_req.call_args
+            assert kwargs['headers']['If-None-Match'] == '"abc"'
+            assert kwargs['headers']['Accept'] == "application/vnd.github.sha"
+
+    def test_get_head_sha_returns_sha_and_new_etag(self):
+        with patch('app.services.github_service.requests.request') as mock_req:
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.text = "deadbeef\n"
+            mock_response.headers = {"ETag": '"new"'}
+            mock_req.return_value = mock_response
+
+            assert GitHubService.get_head_sha("token", "owner/repo") == ("deadbeef", '"new"')
+
+    def test_can_read_repo_maps_not_found_to_false(self):
+        with patch('app.services.github_service.requests.request') as mock_req:
+            mock_response = Mock()
+            mock_req.return_value = mock_response
+
+            mock_response.status_code = 200
+            assert GitHubService.can_read_repo("token", "owner/repo") is True
+            mock_response.status_code = 404
+            assert GitHubService.can_read_repo("token", "owner/repo") is False
+
+    def test_can_read_repo_raises_on_rate_limit(self):
+        with patch('app.services.github_service.requests.request') as mock_req:
+            mock_response = Mock()
+            mock_response.status_code = 403
+            mock_response.headers = {}
+            mock_req.return_value = mock_response
+            assert GitHubService.can_read_repo("token", "owner/repo") is False
+
+            mock_response.headers = {"X-RateLimit-Remaining": "0"}
+            mock_response.json.return_value = {"message": "API rate limit exceeded"}
+            with pytest.raises(HTTPException):
+                GitHubService.can_read_repo("token", "owner/repo")
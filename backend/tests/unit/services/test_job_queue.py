@@ -0,0 +1,177 @@
+"""
+Unit tests for the database-backed job queue and worker dispatch.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy.orm import sessionmaker
+
+from app import worker
+from app.core.config import settings
+from app.models.job import Job
+from app.services import job_queue
+
+
+class TestJobQueue:
+    """Tests for enqueue/lease/complete/fail."""
+
+    def test_enqueue_and_lease(self, test_db):
+        job = job_queue.enqueue(test_db, "push", {"repo_full_name": "o/r"})
+
+        leased = job_queue.lease(test_db, "worker-1")
+
+        assert leased.id == job.id
+        assert leased.status == job_queue.STATUS_RUNNING
+        assert leased.locked_by == "worker-1"
+        assert leased.attempts == 1
+        assert job_queue.job_payload(leased) == {"repo_full_name": "o/r"}
+
+    def test_leased_job_is_invisible_to_other_workers(self, test_db):
+        job_queue.enqueue(test_db, "push", {})
+
+        assert job_queue.lease(test_db, "worker-1") is not None
+        assert job_queue.lease(test_db, "worker-2") is None
+
+    def test_higher_priority_job_is_leased_first(self, test_db):
+        job_queue.enqueue(test_db, "push", {}, priority=2)
+        manual = job_queue.enqueue(test_db, "repo_docs", {}, priority=1)
+
+        assert job_queue.lease(test_db, "worker-1").id == manual.id
+
+    def test_expired_lease_is_reclaimed(self, test_db):
+        job = job_queue.enqueue(test_db, "push", {})
+        job_queue.lease(test_db, "worker-1")
+        job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        test_db.commit()
+
+        leased = job_queue.lease(test_db, "worker-2")
+
+        assert leased.id == job.id
+        assert leased.locked_by == "worker-2"
+        assert leased.attempts == 2
+
+    def test_delayed_job_not_leased_early(self, test_db):
+        job_queue.enqueue(test_db, "push", {}, delay_seconds=60)
+
+        assert job_queue.lease(test_db, "worker-1") is None
+
+    def test_failure_retries_with_backoff_then_dead_letters(self, test_db):
+        job = job_queue.enqueue(test_db, "push", {}, max_attempts=2)
+
+        job_queue.fail(test_db, job_queue.lease(test_db, "w"), "w", "boom")
+        assert job.status == job_queue.STATUS_QUEUED
+        assert job.run_after > datetime.utcnow()
+
+        job.run_after = datetime.utcnow()
+        test_db.commit()
+        job_queue.fail(test_db, job_queue.lease(test_db, "w"), "w", "boom again")
+
+        assert job.status == job_queue.STATUS_DEAD
+        assert job.last_error == "boom again"
+        assert job_queue.lease(test_db, "w") is None
+
+    def test_extend_lease_requires_ownership(self, test_db):
+        job_queue.enqueue(test_db, "push", {})
+        job = job_queue.lease(test_db, "worker-1")
+
+        assert job_queue.extend_lease(test_db, job, "worker-1") is True
+        assert job_queue.extend_lease(test_db, job, "worker-2") is False
+
+    def test_outcome_after_lost_lease_is_not_recorded(self, test_db):
+        job_queue.enqueue(test_db, "push", {})
+        stale = job_queue.lease(test_db, "worker-1")
+        stale.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        test_db.commit()
+        assert job_queue.lease(test_db, "worker-2").id == stale.id
+
+        assert job_queue.complete(test_db, stale, "worker-1") is False
+        assert job_queue.fail(test_db, stale, "worker-1", "late failure") is False
+
+        job = test_db.query(Job).one()
+        assert (job.status, job.locked_by, job.last_error) == (job_queue.STATUS_RUNNING, "worker-2", None)
+        assert job_queue.complete(test_db, job, "worker-2") is True
+
+    def test_old_done_jobs_are_purged(self, test_db):
+        for _ in range(2):
+            job_queue.enqueue(test_db, "poll", {})
+            job_queue.complete(test_db, job_queue.lease(test_db, "w"), "w")
+        old = test_db.query(Job).order_by(Job.id).first()
+        old.finished_at = datetime.utcnow() - timedelta(seconds=settings.JOB_DONE_RETENTION_SECONDS + 1)
+        old_id = old.id
+        test_db.commit()
+
+        job_queue.enqueue(test_db, "poll", {})
+        job_queue.complete(test_db, job_queue.lease(test_db, "w"), "w")
+
+        assert test_db.query(Job).count() == 2
+        assert test_db.get(Job, old_id) is None
+
+
+class TestWorker:
+    """Tests for worker.run_once dispatch."""
+
+    def _factory(self, test_db):
+        return sessionmaker(autocommit=False, autoflush=False, bind=test_db.get_bind())
+
+    def test_run_once_dispatches_push_job(self, test_db):
+        job_queue.enqueue(test_db, "push", {
+            "repo_full_name": "o/r",
+            "head_sha": "h",
+            "base_sha": "b",
+            "changed_files": ["a.py"],
+            "removed_files": [],
+        })
+
+        with patch.object(worker, "process_push_event") as mock_process:
+            assert worker.run_once("w", session_factory=self._factory(test_db)) is True
+
+        _, kwargs = mock_process.call_args
+        assert kwargs["head_sha"] == "h"
+        assert kwargs["base_sha"] == "b"
+        test_db.expire_all()
+        assert test_db.query(Job).one().status == job_queue.STATUS_DONE
+
+    def test_run_once_records_failure(self, test_db):
+        job_queue.enqueue(test_db, "push", {"repo_full_name": "o/r", "head_sha": "h"})
+
+        with patch.object(worker, "process_push_event", side_effect=RuntimeError("provider down")):
+            worker.run_once("w", session_factory=self._factory(test_db))
+
+        test_db.expire_all()
+        job = test_db.query(Job).one()
+        assert job.status == job_queue.STATUS_QUEUED
+        assert job.last_error == "provider down"
+
+    def test_run_once_returns_false_when_idle(self, test_db):
+        assert worker.run_once("w", session_factory=self._factory(test_db)) is False
+
+
+class TestCoalescing:
+    """Tests for coalesced enqueue."""
+
+    @staticmethod
+    def _merge(older, newer):
+        return {"items": older["items"] + newer["items"]}
+
+    def test_queued_job_absorbs_later_events(self, test_db):
+        first = job_queue.enqueue(test_db, "push", {"items": [1]}, delay_seconds=30, coalesce_key="o/r", merge=self._merge)
+        second = job_queue.enqueue(test_db, "push", {"items": [2]}, delay_seconds=30, coalesce_key="o/r", merge=self._merge)
+
+        assert second.id == first.id
+        assert test_db.query(Job).count() == 1
+        assert job_queue.job_payload(second) == {"items": [1, 2]}
+
+    def test_different_keys_are_not_merged(self, test_db):
+        job_queue.enqueue(test_db, "push", {"items": [1]}, coalesce_key="o/a", merge=self._merge)
+        job_queue.enqueue(test_db, "push", {"items": [2]}, coalesce_key="o/b", merge=self._merge)
+
+        assert test_db.query(Job).count() == 2
+
+    def test_running_job_is_not_merged_into(self, test_db):
+        job_queue.enqueue(test_db, "push", {"items": [1]}, coalesce_key="o/r", merge=self._merge)
+        job_queue.lease(test_db, "w")
+
+        job_queue.enqueue(test_db, "push", {"items": [2]}, coalesce_key="o/r", merge=self._merge)
+
+        assert test_db.query(Job).count() == 2
@@ -0,0 +1,108 @@
+"""
+Unit tests for the source outline extractor.
+
+Uses the edge-case corpus in tests/fixtures to check that large files are
+reduced to their structure and that unparsable files fall back to truncation.
+"""
+
+import os
+
+from app.services.outline_service import extract_outline
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "fixtures")
+
+
+def _fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8", errors="ignore") as handle:
+        return handle.read()
+
+
+class TestExtractOutline:
+    """Tests for extract_outline."""
+
+    def test_small_file_returned_unchanged(self):
+        content = _fixture("legacy_algo.cpp")
+        assert extract_outline("legacy_algo.cpp", content, 4000) == content
+
+    def test_massive_python_file_reduced_to_signatures(self):
+        content = _fixture("massive_file.py")
+        outline = extract_outline("massive_file.py", content, 4000)
+
+        assert "def huge_process():" in outline
+        assert "x_500" not in outline
+        assert len(outline) < len(content) // 10
+
+    def test_python_outline_keeps_imports_constants_and_docstrings(self):
+        content = '"""Billing helpers."""\nimport os\nRATE = 0.2\n' + (
+            "class Invoice(Base):\n"
+            '    """An invoice."""\n'
+            "    def total(self, tax: float = RATE) -> float:\n"
+            '        """Computes the total."""\n'
+            + "        x = 1\n" * 400
+        )
+        outline = extract_outline("billing.py", content, 1000)
+
+        assert '"""Billing helpers."""' in outline
+        assert "import os" in outline
+        assert "RATE = 0.2" in outline
+        assert "class Invoice(Base):" in outline
+        assert "def total(self, tax: float=RATE) -> float:" in outline
+        assert "Computes the total." in outline
+
+    def test_javascript_outline_skips_bodies(self):
+        content = (
+            "import { a, b } from './lib';\n"
+            "const LIMIT = 10;\n"
+            "/** Adds numbers. */\n"
+            "export function add(x, y) {\n"
+            + "  x += 'don't';\n" * 300
+            + "  return x + y;\n}\n"
+            "class Store extends Base {\n  load(id) {\n    return id;\n  }\n}\n"
+        )
+        outline = extract_outline("lib.js", content, 1000)
+
+        assert "import { a, b } from './lib'" in outline
+        assert "const LIMIT = 10;" in outline
+        assert "// Adds numbers." in outline
+        assert "export function add(x, y) { ... }" in outline
+        assert "class Store extends Base { ... }" in outline
+        assert "    load(id) { ... }" in outline
+        assert "return x + y" not in outline
+
+    def test_go_outline(self):
+        content = (
+            "package main\n\nimport (\n\t\"fmt\"\n)\n\n"
+            "type Server struct {\n\tport int\n}\n\n"
+            "// Run starts the server.\n"
+            "func (s *Server) Run() error {\n"
+            + "\tfmt.Println(s.port)\n" * 300
+            + "\treturn nil\n}\n"
+        )
+        outline = extract_outline("main.go", content, 1000)
+
+        assert "package main" in outline
+        assert 'import ( "fmt" )' in outline
+        assert "type Server struct { ... }" in outline
+        assert "func (s *Server) Run() error { ... }" in outline
+
+    def test_syntax_error_falls_back_to_truncation(self):
+        content = _fixture("syntax_error.js")
+        outline = extract_outline("syntax_error.js", content, 60)
+
+        assert outline == content[:60] + "\n...[truncated]"
+
+    def test_invalid_python_falls_back_to_truncation(self):
+        content = _fixture("mixed_indentation.py")
+        outline = extract_outline("mixed_indentation.py", content, 40)
+
+        assert outline == content[:40] + "\n...[truncated]"
+
+    def test_minified_javascript_is_bounded(self):
+        content = _fixture("minified_hell.js")
+        outline = extract_outline("minified_hell.js", content, 4000)
+
+        assert len(outline) <= 4000 + len("\n...[truncated]")
+
+    def test_unknown_language_falls_back_to_truncation(self):
+        content = "x" * 100
+        assert extract_outline("notes.txt", content, 10) == "x" * 10 + "\n...[truncated]"
@@ -0,0 +1,159 @@
+"""
+Unit tests for polling-based commit detection.
+
+GitHub is mocked; the database is the in-memory test database from conftest.
+"""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.job import Job
+from app.models.repo_poll_state import RepoPollState
+from app.models.repository import Repository
+from app.models.user import User
+from app.services import poller
+from app.services.github_service import GitHubError
+
+
+def _watch_repo(db, docs_active=True, head_sha=None, interval=None):
+    user = User(github_username="polluser", access_token="poll_token")
+    db.add(user)
+    db.commit()
+    repo = Repository(name="demo", full_name="polluser/demo", owner_id=user.id, docs_active=docs_active)
+    db.add(repo)
+    db.commit()
+    db.add(RepoPollState(
+        repo_id=repo.id,
+        head_sha=head_sha,
+        etag='"old"' if head_sha else None,
+        interval_seconds=interval or settings.POLL_MIN_INTERVAL_SECONDS * 2,
+        next_poll_at=datetime.utcnow() - timedelta(seconds=1),
+    ))
+    db.commit()
+    return repo
+
+
+def _poll(db, result):
+    with patch.object(poller.GitHubService, "get_head_sha", return_value=result) as mock_head:
+        polled = poller.poll_due_repos(db)
+    db.expire_all()
+    return polled, mock_head
+
+
+class TestPollDueRepos:
+    """Tests for poll_due_repos."""
+
+    def test_new_state_is_created_for_watched_repos_with_spread_start(self, test_db):
+        user = User(github_username="u", access_token="t")
+        test_db.add(user)
+        test_db.commit()
+        test_db.add(Repository(name="a", full_name="u/a", owner_id=user.id, is_active=True))
+        test_db.add(Repository(name="b", full_name="u/b", owner_id=user.id))
+        test_db.commit()
+
+        polled, mock_head = _poll(test_db, ("sha", '"e"'))
+
+        state = test_db.query(RepoPollState).one()
+        assert state.next_poll_at <= datetime.utcnow() + timedelta(seconds=settings.POLL_MIN_INTERVAL_SECONDS)
+        assert polled == 0
+        assert mock_head.call_count == 0
+
+    def test_first_poll_records_head_without_job(self, test_db):
+        _watch_repo(test_db)
+
+        polled, _ = _poll(test_db, ("abc", '"etag"'))
+
+        state = test_db.query(RepoPollState).one()
+        assert polled == 1
+        assert state.head_sha == "abc"
+        assert state.etag == '"etag"'
+        assert test_db.query(Job).count() == 0
+
+    def test_not_modified_backs_off_and_reuses_etag(self, test_db):
+        _watch_repo(test_db, head_sha="abc", interval=100)
+
+        _, mock_head = _poll(test_db, (None, '"old"'))
+
+        assert mock_head.call_args.kwargs["etag"] == '"old"'
+        state = test_db.query(RepoPollState).one()
+        assert state.interval_seconds == 150
+        assert state.next_poll_at > datetime.utcnow() + timedelta(seconds=100)
+        assert test_db.query(Job).count() == 0
+
+    def test_moved_head_enqueues_push_job_and_polls_sooner(self, test_db):
+        _watch_repo(test_db, head_sha="abc", interval=400)
+
+        _poll(test_db, ("def", '"new"'))
+
+        state = test_db.query(RepoPollState).one()
+        assert state.head_sha == "def"
+        assert state.interval_seconds == 200
+        job = test_db.query(Job).one()
+        assert job.kind == "push"
+        payload = json.loads(job.payload)
+        assert (payload["base_sha"], payload["head_sha"]) == ("abc", "def")
+        assert payload["changed_files"] == []
+        assert payload["files_unknown"] is True
+
+    def test_transient_error_backs_off_gradually(self, test_db):
+        _watch_repo(test_db, head_sha="abc", interval=100)
+
+        with patch.object(poller.GitHubService, "get_head_sha", side_effect=HTTPException(status_code=504, detail="timed out")):
+            poller.poll_due_repos(test_db)
+        test_db.expire_all()
+
+        state = test_db.query(RepoPollState).one()
+        assert state.interval_seconds == 200
+        assert state.last_error == "timed out"
+
+    def test_lost_access_backs_off_to_the_maximum(self, test_db):
+        _watch_repo(test_db, head_sha="abc", interval=100)
+
+        with patch.object(poller.GitHubService, "get_head_sha", side_effect=GitHubError("Failed to resolve branch head: HTTP 404 - Not Found", 404)):
+            poller.poll_due_repos(test_db)
+        test_db.expire_all()
+
+        assert test_db.query(RepoPollState).one().interval_seconds == settings.POLL_MAX_INTERVAL_SECONDS
+
+    def test_monitored_only_repo_is_tracked_without_job(self, test_db):
+        _watch_repo(test_db, docs_active=False, head_sha="abc")
+        test_db.query(Repository).update({"is_active": True})
+        test_db.commit()
+
+        _poll(test_db, ("def", '"new"'))
+
+        assert test_db.query(RepoPollState).one().head_sha == "def"
+        assert test_db.query(Job).count() == 0
+
+    def test_repo_claimed_by_another_poller_is_skipped(self, test_db):
+        _watch_repo(test_db, head_sha="abc")
+        state = test_db.query(RepoPollState).one()
+        assert poller._claim(test_db, state, datetime.utcnow()) is True
+
+        polled, mock_head = _poll(test_db, ("def", None))
+
+        assert polled == 0
+        assert mock_head.call_count == 0
+
+
+class TestPollChain:
+    """The poll loop is a single self-rescheduling job."""
+
+    def test_schedule_next_poll_coalesces(self, test_db):
+        poller.schedule_next_poll(test_db)
+        poller.schedule_next_poll(test_db)
+
+        assert test_db.query(Job).filter_by(kind=poller.POLL_JOB_KIND).count() == 1
+
+    def test_webhook_head_is_not_reported_again(self, test_db):
+        _watch_repo(test_db, head_sha="abc")
+
+        poller.record_head(test_db, "polluser/demo", "def")
+        test_db.commit()
+        _poll(test_db, ("def", '"new"'))
+
+        assert test_db.query(Job).count() == 0
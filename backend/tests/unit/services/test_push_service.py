@@ -0,0 +1,124 @@
+"""
+Unit tests for push payload folding and coalescing.
+"""
+
+from unittest.mock import patch
+
+from app.models.repository import Repository
+from app.models.user import User
+from app.services import push_service
+from app.services.push_service import collect_push_files, files_from_comparison, merge_push_payloads
+
+
+class TestCollectPushFiles:
+    """Tests for collect_push_files."""
+
+    def test_commits_applied_in_order(self):
+        commits = [
+            {"added": ["a.py"], "modified": ["b.py"], "removed": ["c.py"]},
+            {"added": ["c.py"], "modified": [], "removed": ["a.py"]},
+        ]
+
+        changed, removed = collect_push_files(commits)
+
+        assert changed == ["b.py", "c.py"]
+        assert removed == ["a.py"]
+
+    def test_empty_push(self):
+        assert collect_push_files([]) == ([], [])
+
+
+class TestMergePushPayloads:
+    """Tests for merge_push_payloads."""
+
+    def test_later_push_wins_and_keeps_earliest_base(self):
+        older = {
+            "repo_full_name": "o/r",
+            "base_sha": "b1",
+            "head_sha": "h1",
+            "changed_files": ["a.py", "b.py"],
+            "removed_files": ["old.py"],
+        }
+        newer = {
+            "repo_full_name": "o/r",
+            "base_sha": "h1",
+            "head_sha": "h2",
+            "changed_files": ["old.py"],
+            "removed_files": ["b.py"],
+        }
+
+        merged = merge_push_payloads(older, newer)
+
+        assert merged == {
+            "repo_full_name": "o/r",
+            "base_sha": "b1",
+            "head_sha": "h2",
+            "changed_files": ["a.py", "old.py"],
+            "removed_files": ["b.py"],
+        }
+
+
+    def test_polled_range_makes_merged_file_list_unknown(self):
+        polled = {"repo_full_name": "o/r", "base_sha": "b1", "head_sha": "h1",
+                  "changed_files": [], "removed_files": [], "files_unknown": True}
+        pushed = {"repo_full_name": "o/r", "base_sha": "h1", "head_sha": "h2",
+                  "changed_files": ["a.py"], "removed_files": []}
+
+        for older, newer in ((polled, pushed), (pushed, dict(polled, base_sha="h2", head_sha="h3"))):
+            merged = merge_push_payloads(older, newer)
+
+            assert merged["files_unknown"] is True
+            assert merged["changed_files"] == merged["removed_files"] == []
+            assert merged["base_sha"] == older["base_sha"]
+
+
+class TestFilesFromComparison:
+    """Tests for files_from_comparison."""
+
+    def test_statuses_map_to_changed_and_removed(self):
+        comparison = {"files": [
+            {"filename": "a.py", "status": "added"},
+            {"filename": "b.py", "status": "modified"},
+            {"filename": "c.py", "status": "removed"},
+            {"filename": "new/d.py", "status": "renamed", "previous_filename": "d.py"},
+        ]}
+
+        assert files_from_comparison(comparison) == (["a.py", "b.py", "new/d.py"], ["c.py", "d.py"])
+
+
+class TestProcessPushEvent:
+    """Tests for process_push_event."""
+
+    def test_push_without_file_list_uses_compare(self, test_db):
+        user = User(github_username="pushuser", access_token="push_token")
+        test_db.add(user)
+        test_db.commit()
+        test_db.add(Repository(name="demo", full_name="pushuser/demo", owner_id=user.id, docs_active=True))
+        test_db.commit()
+        comparison = {"files": [{"filename": "a.py", "status": "modified"}]}
+
+        with patch.object(push_service.GitHubService, "compare_commits", return_value=comparison) as mock_compare, \
+             patch.object(push_service, "update_repo_from_push") as mock_update:
+            push_service.process_push_event(test_db, "pushuser/demo", "head", [], [], base_sha="base")
+
+        mock_compare.assert_called_once_with("push_token", "pushuser/demo", "base", "head")
+        kwargs = mock_update.call_args.kwargs
+        assert kwargs["changed_files"] == ["a.py"]
+        assert kwargs["comparison"] is comparison
+
+    def test_unknown_files_use_compare_over_whole_range(self, test_db):
+        user = User(github_username="pushuser", access_token="push_token")
+        test_db.add(user)
+        test_db.commit()
+        test_db.add(Repository(name="demo", full_name="pushuser/demo", owner_id=user.id, docs_active=True))
+        test_db.commit()
+        comparison = {"files": [{"filename": "polled.py", "status": "modified"}]}
+
+        with patch.object(push_service.GitHubService, "compare_commits", return_value=comparison) as mock_compare, \
+             patch.object(push_service, "update_repo_from_push") as mock_update:
+            push_service.process_push_event(
+                test_db, "pushuser/demo", "h2", ["a.py"], [], base_sha="b1", files_unknown=True
+            )
+
+        mock_compare.assert_called_once_with("push_token", "pushuser/demo", "b1", "h2")
+        assert mock_update.call_args.kwargs["changed_files"] == ["polled.py"]
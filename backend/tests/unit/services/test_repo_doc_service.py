@@ -0,0 +1,346 @@
+"""
+Unit tests for the repository documentation service.
+
+GitHub and the LLM providers are mocked; the database is the in-memory
+test database from conftest.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.file_summary import FileSummary
+from app.models.repo_doc_run import RepoDocRun
+from app.models.repo_documentation import RepoDocumentation
+from app.models.repo_lock import RepoLock
+from app.models.repository import Repository
+from app.models.user import User
+from app.services import repo_doc_service
+from app.services.repo_lock import RepoBusy
+
+
+def _make_repo(db):
+    user = User(github_username="docuser", access_token="doc_token")
+    db.add(user)
+    db.commit()
+    repo = Repository(
+        name="demo",
+        full_name="docuser/demo",
+        url="https://github.com/docuser/demo",
+        last_updated="2025-01-01T00:00:00Z",
+        owner_id=user.id,
+    )
+    db.add(repo)
+    db.commit()
+    db.refresh(repo)
+    return repo
+
+
+def _tree(count):
+    return [
+        {"type": "blob", "path": f"src/module_{i}.py", "sha": f"sha{i}"}
+        for i in range(count)
+    ]
+
+
+def _file_content(token, repo_full_name, path, ref="HEAD"):
+    return f"# {path}\n", "sha" + path.split("_")[-1].split(".")[0]
+
+
+class TestGenerateRepoDocumentation:
+    """Tests for generate_repo_documentation."""
+
+    def test_generates_summaries_and_repo_doc(self, test_db):
+        repo = _make_repo(test_db)
+
+        with patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=_tree(3)), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", side_effect=_file_content), \
+             patch.object(repo_doc_service, "generate_text", return_value="generated") as mock_llm:
+            doc = repo_doc_service.generate_repo_documentation(
+                test_db, repo, "doc_token", "plainText", None
+            )
+
+        assert doc.content == "generated"
+        assert mock_llm.call_count == 4
+        assert test_db.query(FileSummary).count() == 3
+        run = test_db.query(RepoDocRun).one()
+        assert run.status == "completed"
+        assert run.files_done == 3
+
+    def test_large_files_of_a_batch_are_outlined_together(self, test_db):
+        repo = _make_repo(test_db)
+        large = "def f():\n" + "    x = 1\n" * repo_doc_service.MAX_FILE_CHARS
+
+        def content(token, repo_full_name, path, ref="HEAD"):
+            return (large if path.endswith(("_0.py", "_2.py")) else f"# {path}\n"), None
+
+        with patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=_tree(3)), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", side_effect=content), \
+             patch.object(repo_doc_service.cpu_pool, "map_tasks", return_value=["outline 0", "outline 2"]) as mock_map, \
+             patch.object(repo_doc_service, "generate_text", return_value="generated") as mock_llm:
+            repo_doc_service.generate_repo_documentation(test_db, repo, "doc_token", "plainText", None)
+
+        assert mock_map.call_count == 1
+        assert [args[0] for args in mock_map.call_args.args[1]] == ["src/module_0.py", "src/module_2.py"]
+        prompts = [call.args[0] for call in mock_llm.call_args_list]
+        assert any("outline 0" in prompt for prompt in prompts)
+        assert any("outline 2" in prompt for prompt in prompts)
+
+    def test_failed_run_resumes_from_checkpoint(self, test_db):
+        repo = _make_repo(test_db)
+        file_count = repo_doc_service.CHECKPOINT_BATCH_SIZE + 2
+        calls = []
+
+        def flaky_llm(prompt):
+            calls.append(prompt)
+            if "File summaries:" in prompt:
+                raise HTTPException(status_code=502, detail="provider down")
+            return "summary"
+
+        with patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=_tree(file_count)), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", side_effect=_file_content), \
+             patch.object(repo_doc_service, "generate_text", side_effect=flaky_llm):
+            with pytest.raises(HTTPException):
+                repo_doc_service.generate_repo_documentation(
+                    test_db, repo, "doc_token", "plainText", None
+                )
+
+        assert test_db.query(FileSummary).count() == file_count
+        failed = test_db.query(RepoDocRun).one()
+        assert failed.status == "failed"
+        assert failed.error == "provider down"
+
+        with patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=_tree(file_count)), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content") as mock_content, \
+             patch.object(repo_doc_service, "generate_text", return_value="final") as mock_llm:
+            doc = repo_doc_service.generate_repo_documentation(
+                test_db, repo, "doc_token", "plainText", None
+            )
+
+        assert doc.content == "final"
+        assert mock_content.call_count == 0
+        assert mock_llm.call_count == 1
+        run = test_db.query(RepoDocRun).one()
+        assert run.id == failed.id
+        assert run.status == "completed"
+
+    def test_forced_run_resumes_without_redoing_rewritten_files(self, test_db):
+        repo = _make_repo(test_db)
+        for i in range(3):
+            test_db.add(FileSummary(repo_id=repo.id, path=f"src/module_{i}.py", summary="old", blob_sha=f"sha{i}"))
+        test_db.commit()
+
+        def failing_on_third(token, repo_full_name, path, ref="HEAD"):
+            if path.endswith("_2.py"):
+                raise HTTPException(status_code=504, detail="GitHub API request timed out")
+            return _file_content(token, repo_full_name, path, ref)
+
+        with patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=_tree(3)), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", side_effect=failing_on_third), \
+             patch.object(repo_doc_service, "generate_text", return_value="new"):
+            with pytest.raises(HTTPException):
+                repo_doc_service.generate_repo_documentation(
+                    test_db, repo, "doc_token", "plainText", None, force=True
+                )
+
+        with patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=_tree(3)), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", side_effect=_file_content) as mock_content, \
+             patch.object(repo_doc_service, "generate_text", return_value="new"):
+            repo_doc_service.generate_repo_documentation(
+                test_db, repo, "doc_token", "plainText", None, force=True
+            )
+
+        assert [call.args[2] for call in mock_content.call_args_list] == ["src/module_2.py"]
+        assert {item.summary for item in test_db.query(FileSummary).all()} == {"new"}
+        assert test_db.query(RepoDocumentation).one().content == "new"
+
+
+def _seed_push_state(db):
+    repo = _make_repo(db)
+    repo.docs_active = True
+    db.add(FileSummary(repo_id=repo.id, path="src/app.py", summary="Runs the app.", blob_sha="old"))
+    db.add(RepoDocumentation(repo_id=repo.id, style="plainText", complexity=-1, content="repo doc"))
+    db.commit()
+    return repo
+
+
+def _comparison(changes, patch="@@ -1 +1 @@\n-a\n+b"):
+    return {"files": [{
+        "filename": "src/app.py",
+        "status": "modified",
+        "changes": changes,
+        "patch": patch,
+        "sha": "new",
+    }]}
+
+
+class TestUpdateRepoFromPush:
+    """Tests for diff-aware push updates."""
+
+    def _push(self, db, repo, comparison, llm_reply="updated summary"):
+        with patch.object(repo_doc_service.GitHubService, "compare_commits", return_value=comparison), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", return_value=("code", "new")) as mock_content, \
+             patch.object(repo_doc_service, "generate_text", return_value=llm_reply) as mock_llm:
+            repo_doc_service.update_repo_from_push(
+                db, repo, "doc_token", ["src/app.py"], [], "head", base_sha="base"
+            )
+        return mock_content, mock_llm
+
+    def test_trivial_diff_skips_all_llm_calls(self, test_db):
+        repo = _seed_push_state(test_db)
+
+        mock_content, mock_llm = self._push(test_db, repo, _comparison(changes=1))
+
+        assert mock_llm.call_count == 0
+        assert mock_content.call_count == 0
+        summary = test_db.query(FileSummary).one()
+        assert summary.summary == "Runs the app."
+        assert summary.blob_sha == "new"
+        assert summary.last_commit_sha == "head"
+
+    def test_small_diff_updates_summary_from_patch(self, test_db):
+        repo = _seed_push_state(test_db)
+
+        mock_content, mock_llm = self._push(test_db, repo, _comparison(changes=10))
+
+        assert mock_content.call_count == 0
+        assert mock_llm.call_count == 2
+        assert "Existing summary:" in mock_llm.call_args_list[0].args[0]
+        assert test_db.query(FileSummary).one().summary == "updated summary"
+        assert test_db.query(RepoDocumentation).one().content == "updated summary"
+
+    def test_unchanged_reply_does_not_regenerate_repo_doc(self, test_db):
+        repo = _seed_push_state(test_db)
+
+        _, mock_llm = self._push(test_db, repo, _comparison(changes=10), llm_reply="UNCHANGED")
+
+        assert mock_llm.call_count == 1
+        assert test_db.query(FileSummary).one().summary == "Runs the app."
+        assert test_db.query(RepoDocumentation).one().content == "repo doc"
+
+    def test_large_diff_resummarizes_full_content(self, test_db):
+        repo = _seed_push_state(test_db)
+
+        mock_content, mock_llm = self._push(test_db, repo, _comparison(changes=500, patch=None))
+
+        assert mock_content.call_count == 1
+        assert mock_llm.call_count == 2
+        assert "File content:" in mock_llm.call_args_list[0].args[0]
+
+    def test_missing_base_falls_back_to_full_summaries(self, test_db):
+        repo = _seed_push_state(test_db)
+
+        with patch.object(repo_doc_service.GitHubService, "compare_commits") as mock_compare, \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", return_value=("code", "new")), \
+             patch.object(repo_doc_service, "generate_text", return_value="fresh"):
+            repo_doc_service.update_repo_from_push(
+                test_db, repo, "doc_token", ["src/app.py"], [], "head", base_sha="0" * 40
+            )
+
+        assert mock_compare.call_count == 0
+        assert test_db.query(FileSummary).one().summary == "fresh"
+
+    def test_lost_lock_stops_the_update(self, test_db):
+        repo = _seed_push_state(test_db)
+        changed = [f"src/module_{i}.py" for i in range(12)]
+        calls = []
+
+        def summarize(prompt):
+            calls.append(prompt)
+            if len(calls) == 3:
+                # The lease ran out and another run took the lock over.
+                test_db.query(RepoLock).update({"owner": "other-run"})
+                test_db.commit()
+            return "summary"
+
+        with patch.object(repo_doc_service.GitHubService, "compare_commits", return_value={"files": []}), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", return_value=("code", "new")), \
+             patch.object(repo_doc_service, "generate_text", side_effect=summarize):
+            with pytest.raises(RepoBusy):
+                repo_doc_service.update_repo_from_push(test_db, repo, "doc_token", changed, [], "head", base_sha="base")
+
+        assert len(calls) == repo_doc_service.CHECKPOINT_BATCH_SIZE
+        assert [row.path for row in test_db.query(FileSummary)] == ["src/app.py"]
+        assert test_db.query(RepoDocumentation).one().content == "repo doc"
+
+
+class TestRenameDetection:
+    """Tests for rename and move handling in push updates."""
+
+    def test_compare_rename_rekeys_summary_without_llm(self, test_db):
+        repo = _seed_push_state(test_db)
+        comparison = {"files": [{
+            "filename": "lib/app.py",
+            "previous_filename": "src/app.py",
+            "status": "renamed",
+            "changes": 0,
+            "sha": "old",
+        }]}
+
+        with patch.object(repo_doc_service.GitHubService, "compare_commits", return_value=comparison), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content") as mock_content, \
+             patch.object(repo_doc_service, "generate_text") as mock_llm:
+            repo_doc_service.update_repo_from_push(
+                test_db, repo, "doc_token", ["lib/app.py"], ["src/app.py"], "head", base_sha="base"
+            )
+
+        assert mock_llm.call_count == 0
+        assert mock_content.call_count == 0
+        summary = test_db.query(FileSummary).one()
+        assert summary.path == "lib/app.py"
+        assert summary.summary == "Runs the app."
+
+    def test_blob_sha_match_detects_move_without_compare(self, test_db):
+        repo = _seed_push_state(test_db)
+        tree = [{"type": "blob", "path": "pkg/app.py", "sha": "old"}]
+
+        with patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=tree) as mock_tree, \
+             patch.object(repo_doc_service.GitHubService, "get_file_content") as mock_content, \
+             patch.object(repo_doc_service, "generate_text") as mock_llm:
+            repo_doc_service.update_repo_from_push(
+                test_db, repo, "doc_token", ["pkg/app.py"], ["src/app.py"], "head"
+            )
+
+        assert mock_tree.call_count == 1
+        assert mock_llm.call_count == 0
+        assert mock_content.call_count == 0
+        assert [item.path for item in test_db.query(FileSummary).all()] == ["pkg/app.py"]
+
+    def test_unrelated_add_and_remove_are_not_paired(self, test_db):
+        repo = _seed_push_state(test_db)
+        tree = [{"type": "blob", "path": "src/other.py", "sha": "different"}]
+
+        with patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=tree), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", return_value=("code", "different")), \
+             patch.object(repo_doc_service, "generate_text", return_value="Other module.") as mock_llm:
+            repo_doc_service.update_repo_from_push(
+                test_db, repo, "doc_token", ["src/other.py"], ["src/app.py"], "head"
+            )
+
+        assert mock_llm.call_count == 2
+        assert [item.summary for item in test_db.query(FileSummary).all()] == ["Other module."]
+
+
+class TestRepoDocumentationIR:
+    """Tests for DOCS_GENERATION_MODE=ir on repository documents."""
+
+    def test_second_style_is_rendered_from_stored_ir(self, test_db):
+        repo = _make_repo(test_db)
+        reply = '{"title": "Demo", "overview": "A demo service.", "components": [{"name": "api", "description": "HTTP layer"}]}'
+
+        def llm(prompt):
+            return reply if "JSON object" in prompt else "File summary."
+
+        with patch.object(repo_doc_service.doc_ir_service, "ir_enabled", return_value=True), \
+             patch.object(repo_doc_service.GitHubService, "get_repo_tree", return_value=_tree(2)), \
+             patch.object(repo_doc_service.GitHubService, "get_file_content", side_effect=_file_content), \
+             patch.object(repo_doc_service, "generate_text", side_effect=llm) as mock_llm:
+            plain = repo_doc_service.generate_repo_documentation(test_db, repo, "doc_token", "plainText", None)
+            calls = mock_llm.call_count
+            latex = repo_doc_service.generate_repo_documentation(test_db, repo, "doc_token", "latex", None)
+
+        assert calls == 3
+        assert mock_llm.call_count == calls
+        assert plain.content.startswith("A demo service.")
+        assert r"\item[api] HTTP layer" in latex.content
@@ -0,0 +1,67 @@
+"""
+Unit tests for the per-repository documentation lock.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import worker
+from app.models.job import Job
+from app.models.repo_lock import RepoLock
+from app.services import job_queue, repo_lock
+from app.services.repo_lock import RepoBusy
+
+
+class TestRepoLock:
+    """Tests for acquire/release and lease expiry."""
+
+    def test_second_acquire_is_refused_until_release(self, test_db):
+        first = repo_lock.acquire(test_db, 1)
+
+        with pytest.raises(RepoBusy) as excinfo:
+            repo_lock.acquire(test_db, 1)
+        assert excinfo.value.status_code == 409
+        assert repo_lock.acquire(test_db, 2).waited is False
+
+        first.release()
+        assert repo_lock.acquire(test_db, 1).waited is False
+
+    def test_expired_lock_is_taken_over(self, test_db):
+        stale = repo_lock.acquire(test_db, 1)
+        test_db.query(RepoLock).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        test_db.commit()
+
+        fresh = repo_lock.acquire(test_db, 1)
+
+        assert fresh.owner != stale.owner
+        assert stale.refresh() is False
+        stale.release()
+        assert test_db.query(RepoLock).one().owner == fresh.owner
+
+    def test_context_manager_releases_on_error(self, test_db):
+        with pytest.raises(RuntimeError):
+            with repo_lock.repo_lock(test_db, 1):
+                raise RuntimeError("boom")
+
+        assert test_db.query(RepoLock).count() == 0
+
+
+class TestWorkerDefersLockedRepos:
+    """A job for a locked repository goes back to the queue."""
+
+    def test_busy_repo_defers_job_without_using_an_attempt(self, test_db):
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=test_db.get_bind())
+        job_queue.enqueue(test_db, "push", {"repo_full_name": "o/r", "head_sha": "h"})
+
+        with patch.object(worker, "process_push_event", side_effect=RepoBusy(1)):
+            assert worker.run_once("w", session_factory=factory) is True
+
+        test_db.expire_all()
+        job = test_db.query(Job).one()
+        assert job.status == job_queue.STATUS_QUEUED
+        assert job.attempts == 0
+        assert job.last_error is None
+        assert job.run_after > datetime.utcnow()
@@ -0,0 +1,174 @@
+"""
+Unit tests for the priority scheduler.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.scheduler_demand import SchedulerDemand
+from app.services.scheduler import (
+    Priority,
+    PriorityLimiter,
+    SharedDemand,
+    current_priority,
+    priority,
+)
+
+
+def _start_waiter(limiter, level, order):
+    def target():
+        with limiter.slot(level):
+            order.append(level)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def _wait_for_waiters(limiter, count):
+    deadline = time.monotonic() + 2
+    while len(limiter._waiters) < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestPriorityLimiter:
+    """Tests for PriorityLimiter."""
+
+    def test_interactive_waiter_is_served_before_earlier_background_waiters(self):
+        limiter = PriorityLimiter(1)
+        order = []
+        limiter.acquire(Priority.INTERACTIVE)
+
+        threads = [_start_waiter(limiter, Priority.PREWARM, order)]
+        _wait_for_waiters(limiter, 1)
+        threads.append(_start_waiter(limiter, Priority.WEBHOOK, order))
+        _wait_for_waiters(limiter, 2)
+        threads.append(_start_waiter(limiter, Priority.INTERACTIVE, order))
+        _wait_for_waiters(limiter, 3)
+        limiter.release()
+        for thread in threads:
+            thread.join(timeout=2)
+
+        assert order == [Priority.INTERACTIVE, Priority.WEBHOOK, Priority.PREWARM]
+
+    def test_reserved_slots_are_kept_for_interactive_calls(self):
+        limiter = PriorityLimiter(2, reserved=1)
+        assert limiter.acquire(Priority.WEBHOOK, timeout=0.1) is True
+
+        assert limiter.acquire(Priority.WEBHOOK, timeout=0.05) is False
+        assert limiter.acquire(Priority.INTERACTIVE, timeout=0.1) is True
+        assert limiter.stats()["in_use"] == 2
+
+    def test_timed_out_waiter_does_not_block_others(self):
+        limiter = PriorityLimiter(1)
+        limiter.acquire(Priority.INTERACTIVE)
+        assert limiter.acquire(Priority.INTERACTIVE, timeout=0.01) is False
+        limiter.release()
+
+        assert limiter.acquire(Priority.PREWARM, timeout=0.1) is True
+
+
+def _demand(test_db, process_id, check_interval=1.0, watch=False):
+    demand = SharedDemand(hold_seconds=10, check_interval=check_interval, process_id=process_id)
+    demand.configure(sessionmaker(autoflush=False, bind=test_db.get_bind()), watch=watch)
+    return demand
+
+
+class TestSharedDemand:
+    """Tests for interactive demand shared between processes."""
+
+    def test_demand_from_another_process_is_active(self, test_db):
+        api, worker = _demand(test_db, "api"), _demand(test_db, "worker")
+        worker.refresh()
+        assert worker.active() is False
+
+        api.publish()
+        worker.refresh()
+        api.refresh()
+
+        assert worker.active() is True
+        assert api.active() is False
+
+    def test_expired_demand_is_inactive(self, test_db):
+        test_db.add(SchedulerDemand(
+            process_id="api", interactive_until=datetime.utcnow() - timedelta(seconds=1),
+        ))
+        test_db.commit()
+        worker = _demand(test_db, "worker")
+        worker.refresh()
+
+        assert worker.active() is False
+
+    def test_unconfigured_demand_is_a_no_op(self):
+        demand = SharedDemand(hold_seconds=10)
+        demand.note()
+
+        assert demand.active() is False
+
+    def test_background_calls_are_throttled_while_another_process_is_interactive(self, test_db):
+        api, worker = _demand(test_db, "api"), _demand(test_db, "worker")
+        limiter = PriorityLimiter(4, reserved=1, demand=worker, background_under_demand=1)
+        api.publish()
+        worker.refresh()
+
+        assert limiter.acquire(Priority.WEBHOOK, timeout=0.1) is True
+        assert limiter.acquire(Priority.WEBHOOK, timeout=0.05) is False
+        assert limiter.acquire(Priority.INTERACTIVE, timeout=0.1) is True
+
+    def test_acquire_and_release_do_not_query_the_database(self):
+        session_factory = Mock()
+        demand = SharedDemand(hold_seconds=10, process_id="worker")
+        demand.configure(session_factory, watch=False)
+        limiter = PriorityLimiter(4, reserved=1, demand=demand)
+
+        with limiter.slot(Priority.WEBHOOK):
+            pass
+
+        assert session_factory.call_count == 0
+
+    def test_waiting_background_call_proceeds_once_demand_ends(self, test_db):
+        api = _demand(test_db, "api")
+        api.publish()
+        worker = _demand(test_db, "worker", check_interval=0.01, watch=True)
+        try:
+            limiter = PriorityLimiter(4, reserved=1, demand=worker, background_under_demand=1)
+            deadline = time.monotonic() + 2
+            while not worker.active() and time.monotonic() < deadline:
+                time.sleep(0.005)
+            limiter.acquire(Priority.WEBHOOK)
+            acquired = []
+
+            thread = threading.Thread(target=lambda: acquired.append(limiter.acquire(Priority.WEBHOOK, timeout=2)))
+            thread.start()
+            _wait_for_waiters(limiter, 1)
+            test_db.query(SchedulerDemand).delete()
+            test_db.commit()
+            thread.join(timeout=3)
+        finally:
+            worker.close()
+
+        assert acquired == [True]
+        assert limiter.stats()["in_use"] == 2
+
+
+class TestPriorityContext:
+    """Tests for the priority context variable."""
+
+    def test_default_is_interactive_and_context_restores(self):
+        assert current_priority() == Priority.INTERACTIVE
+        with priority(Priority.WEBHOOK):
+            assert current_priority() == Priority.WEBHOOK
+            with priority(Priority.MANUAL):
+                assert current_priority() == Priority.MANUAL
+            assert current_priority() == Priority.WEBHOOK
+        assert current_priority() == Priority.INTERACTIVE
+
+    def test_slot_uses_current_priority(self):
+        limiter = PriorityLimiter(2, reserved=1)
+        with priority(Priority.WEBHOOK):
+            limiter.acquire()
+            assert limiter.acquire(timeout=0.01) is False